@@ -0,0 +1,106 @@
+# 后台维护命令，在 backend 目录下运行：
+#   python -m app.cli rebuild-inventory-summary
+#   python -m app.cli rebuild-daily-movements
+#   python -m app.cli import-materials materials.csv
+#   python -m app.cli rebuild-search-index
+#   python -m app.cli snapshot-inventory
+#   python -m app.cli archive-ledger
+import argparse
+import asyncio
+
+from app.core.config import settings
+from app.core.log import setup_logging
+from app.db.database import SessionLocal, engine
+from app.core.material_import import check_material_file, iter_material_rows
+from app.crud import crud_daily_movement, crud_inventory_snapshot, crud_inventory_summary, crud_ledger_archive, crud_material, crud_material_search, crud_stock_alert
+
+
+async def rebuild_inventory_summary() -> None:
+    async with SessionLocal() as db:
+        await crud_stock_alert.rebuild_stock_alerts(db) # 预警集合与汇总行在同一事务中重建
+        db_summary = await crud_inventory_summary.rebuild_inventory_summary(db)
+        print(
+            f"库存汇总已重建：物资种类 {db_summary.material_types_count}，"
+            f"库存总量 {db_summary.total_stock_quantity}，预警数量 {db_summary.stock_alert_count}"
+        )
+    await engine.dispose()
+
+
+async def rebuild_daily_movements() -> None:
+    async with SessionLocal() as db:
+        row_count = await crud_daily_movement.rebuild_daily_movements(db)
+        print(f"每日出入库汇总已重建：共 {row_count} 行 (物资 x 日期)")
+    await engine.dispose()
+
+
+async def import_materials(path: str, chunk_size: int) -> None:
+    async with SessionLocal() as db:
+        with open(path, "rb") as file:
+            check_material_file(file, path) # 写入任何数据之前先完整解析一遍，文件本身有问题时一行都不导入
+            result = await crud_material.import_materials(db, iter_material_rows(file, path), chunk_size=chunk_size)
+        for error in result.errors:
+            print(f"第 {error.row} 行 ({error.code or '-'}): {error.message}")
+        print(f"物资导入完成：共 {result.total_rows} 行，成功 {result.created_count} 行，失败 {result.error_count} 行")
+    await engine.dispose()
+
+
+async def rebuild_search_index() -> None:
+    async with SessionLocal() as db:
+        indexed = await crud_material_search.rebuild_material_search_index(db)
+        print(f"物资搜索索引已重建：共 {indexed} 种物资")
+    await engine.dispose()
+
+
+async def snapshot_inventory() -> None:
+    async with SessionLocal() as db:
+        taken = await crud_inventory_snapshot.take_inventory_snapshot(db)
+        if taken is None:
+            print("同一时刻已有库存快照，未重复写入")
+        else:
+            snapshot_time, material_count = taken
+            print(f"库存快照已写入：时间点 {snapshot_time}，共 {material_count} 种物资")
+    await engine.dispose()
+
+
+async def archive_ledger(after_days: int, chunk_size: int) -> None:
+    async with SessionLocal() as db:
+        moved = await crud_ledger_archive.archive_ledgers(db, after_days=after_days, chunk_size=chunk_size)
+        print(f"出入库流水归档完成：入库记录 {moved['inbound']} 行，出库记录 {moved['outbound']} 行")
+    await engine.dispose()
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m app.cli", description="仓库管理系统维护命令")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser("rebuild-inventory-summary", help="根据物资和库存余額表从头重新计算库存汇总行和库存预警集合")
+    subparsers.add_parser("rebuild-daily-movements", help="根据出入库流水从头重建每日出入库汇总表 (数据被绕过 API 修改后修复)")
+    import_parser = subparsers.add_parser("import-materials", help="从 CSV 或 Excel (.xlsx) 文件批量导入物资")
+    import_parser.add_argument("path", help="导入文件路径")
+    import_parser.add_argument("--chunk-size", type=int, default=crud_material.IMPORT_CHUNK_SIZE, help="每个事务写入的行数")
+    subparsers.add_parser("rebuild-search-index", help="重建物资编码/名称的子串搜索索引 (数据被绕过 API 修改后修复)")
+    subparsers.add_parser("snapshot-inventory", help="立即取一次库存快照 (可由 cron 等外部调度器定时运行)")
+    archive_parser = subparsers.add_parser("archive-ledger", help="把早于保留期的出入库流水整月搬移到按月归档表")
+    archive_parser.add_argument("--after-days", type=int, default=settings.LEDGER_ARCHIVE_AFTER_DAYS, help="流水表中保留的天数，更早月份的流水被归档")
+    archive_parser.add_argument("--chunk-size", type=int, default=crud_ledger_archive.ARCHIVE_CHUNK_SIZE, help="每个事务搬移的行数")
+    args = parser.parse_args(argv)
+    setup_logging(settings.LOG_LEVEL) # 维护命令同样输出慢查询等日志
+
+    if args.command == "rebuild-inventory-summary":
+        asyncio.run(rebuild_inventory_summary())
+    elif args.command == "rebuild-daily-movements":
+        asyncio.run(rebuild_daily_movements())
+    elif args.command == "rebuild-search-index":
+        asyncio.run(rebuild_search_index())
+    elif args.command == "snapshot-inventory":
+        asyncio.run(snapshot_inventory())
+    elif args.command == "archive-ledger":
+        asyncio.run(archive_ledger(args.after_days, args.chunk_size))
+    elif args.command == "import-materials":
+        try:
+            asyncio.run(import_materials(args.path, args.chunk_size))
+        except ValueError as e: # 文件类型不支持、表头缺少必填列、编码无法解析、CSV 格式错误等
+            parser.exit(1, f"导入失败: {e}\n")
+
+
+if __name__ == "__main__":
+    main()
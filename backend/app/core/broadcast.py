@@ -0,0 +1,84 @@
+import asyncio
+from typing import Iterable
+
+from app.core.config import settings
+
+
+# 单个订阅者的待发送变化：按物资ID合并，同一物资只保留最新状态 (事件携带的是变化后的绝对值，旧值被覆盖不影响正确性)
+# 待发送的物资数超过 limit 时丢弃全部待发送变化并标记 overflowed，由推送端通知客户端重新同步
+class Subscription:
+    __slots__ = ("pending", "ready", "overflowed", "limit")
+
+    def __init__(self, limit: int) -> None:
+        self.pending: dict[int, dict] = {}
+        self.ready = asyncio.Event()
+        self.overflowed = False
+        self.limit = limit
+
+    def offer(self, batch: dict[int, dict]) -> bool:
+        if self.overflowed:
+            return False
+        self.pending.update(batch)
+        if len(self.pending) > self.limit:
+            self.pending.clear()
+            self.overflowed = True
+        self.ready.set()
+        return not self.overflowed
+
+    # 取出全部待发送变化
+    def drain(self) -> list[dict]:
+        events = list(self.pending.values())
+        self.pending.clear()
+        self.ready.clear()
+        return events
+
+
+# 进程内的库存变化广播 (GET /inventory-balances/stream)
+# 写操作提交后调用 publish，不等待、不阻塞：每个订阅者各有一份有界的待发送缓冲，慢客户端只会让自己的缓冲溢出，
+# 不会拖慢写请求或其他订阅者。空闲订阅者只是一个等待 asyncio.Event 的协程，单个 worker 可以挂起数千个连接。
+# 只能看到本进程内的写操作；多 worker 部署时其他进程的修改要等客户端重连 (重新读取快照) 后才可见
+class BalanceBroker:
+    def __init__(self, max_subscribers: int, buffer_size: int) -> None:
+        self.max_subscribers = max_subscribers
+        self.buffer_size = buffer_size
+        self._subscribers: set[Subscription] = set()
+        self.published = 0 # 累计发布的变化数
+        self.overflows = 0 # 累计因缓冲溢出而要求重新同步的次数
+
+    def __len__(self) -> int:
+        return len(self._subscribers)
+
+    def full(self) -> bool:
+        return len(self._subscribers) >= self.max_subscribers
+
+    # 订阅者已满时返回 None
+    def subscribe(self) -> Subscription | None:
+        if self.full():
+            return None
+        subscription = Subscription(self.buffer_size)
+        self._subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        self._subscribers.discard(subscription)
+
+    def publish(self, events: Iterable[dict]) -> None:
+        batch = {event["material_id"]: event for event in events}
+        if not batch:
+            return
+        self.published += len(batch)
+        for subscription in self._subscribers:
+            if not subscription.overflowed and not subscription.offer(batch):
+                self.overflows += 1
+
+    def snapshot(self) -> dict:
+        return {
+            "subscribers": len(self._subscribers),
+            "max_subscribers": self.max_subscribers,
+            "buffer_size": self.buffer_size,
+            "published": self.published,
+            "overflows": self.overflows,
+        }
+
+
+balance_broker = BalanceBroker(settings.STREAM_MAX_SUBSCRIBERS, settings.STREAM_SUBSCRIBER_BUFFER)
@@ -0,0 +1,97 @@
+import json
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Any
+
+from app.core.config import settings
+
+
+# 缓存后端接口：进程内实现与共享 (Redis) 实现可互换，值需可被 JSON 序列化
+class CacheBackend(ABC):
+    name: str = "abstract"
+
+    @abstractmethod
+    async def get(self, key: str) -> Any | None: ...
+
+    @abstractmethod
+    async def set(self, key: str, value: Any, ttl: float) -> None: ...
+
+    @abstractmethod
+    async def delete(self, key: str) -> None: ...
+
+
+# 进程内 TTL 缓存 (每个 worker 进程各自一份)
+class InMemoryTTLCache(CacheBackend):
+    name = "memory"
+
+    def __init__(self) -> None:
+        self._items: dict[str, tuple[float, Any]] = {}
+        self._lock = threading.Lock()
+
+    async def get(self, key: str) -> Any | None:
+        with self._lock:
+            item = self._items.get(key)
+            if item is None:
+                return None
+            expires_at, value = item
+            if expires_at <= time.monotonic():
+                del self._items[key]
+                return None
+            return value
+
+    async def set(self, key: str, value: Any, ttl: float) -> None:
+        with self._lock:
+            self._items[key] = (time.monotonic() + ttl, value)
+
+    async def delete(self, key: str) -> None:
+        with self._lock:
+            self._items.pop(key, None)
+
+
+# Redis 缓存：多个 worker / 多台服务器共享同一份缓存，任一进程的写操作都能让其他进程的缓存失效
+class RedisCache(CacheBackend):
+    name = "redis"
+
+    def __init__(self, url: str) -> None:
+        import redis.asyncio as redis # 可选依赖，仅在启用 Redis 缓存时需要安装
+
+        self._client = redis.from_url(url)
+
+    async def get(self, key: str) -> Any | None:
+        raw = await self._client.get(key)
+        return json.loads(raw) if raw is not None else None
+
+    async def set(self, key: str, value: Any, ttl: float) -> None:
+        await self._client.set(key, json.dumps(value), px=int(ttl * 1000))
+
+    async def delete(self, key: str) -> None:
+        await self._client.delete(key)
+
+
+# 缓存命中统计 (当前进程)
+class CacheStats:
+    def __init__(self) -> None:
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def snapshot(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "invalidations": self.invalidations,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+def create_cache_backend() -> CacheBackend:
+    if settings.CACHE_BACKEND == "redis":
+        return RedisCache(settings.CACHE_REDIS_URL)
+    if settings.CACHE_BACKEND == "memory":
+        return InMemoryTTLCache()
+    raise ValueError(f"不支持的缓存后端: {settings.CACHE_BACKEND}")
+
+
+cache = create_cache_backend()
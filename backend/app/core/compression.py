@@ -0,0 +1,89 @@
+import gzip
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli # 可选依赖：安装后对 Accept-Encoding 包含 br 的客户端使用 Brotli，否则只使用 gzip
+except ImportError:
+    brotli = None
+
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 4 # 动态响应在压缩率和 CPU 之间取折中，11 (最高) 比 gzip 慢一个数量级以上
+
+# 不压缩的响应类型：SSE 推送必须逐条立即送达，已压缩的导出文件再压缩没有收益
+EXCLUDED_MEDIA_TYPES = ("text/event-stream", "application/gzip")
+
+
+# 解析 Accept-Encoding，忽略 q=0 (明确拒绝) 的编码
+def _accepted_encodings(accept_encoding: str) -> set[str]:
+    encodings = set()
+    for part in accept_encoding.split(","):
+        name, _, params = part.partition(";")
+        params = params.replace(" ", "")
+        if params.startswith("q="):
+            try:
+                if float(params[2:]) == 0:
+                    continue
+            except ValueError:
+                continue
+        encodings.add(name.strip().lower())
+    return encodings
+
+
+# 响应压缩中间件 (纯 ASGI 实现)：只压缩一次性发送完整响应体、且超过 minimum_size 字节的响应
+# 流式响应 (SSE 推送、CSV/NDJSON 导出) 原样透传，不会被缓冲；已带 Content-Encoding 的响应也不处理
+class CompressionMiddleware:
+    def __init__(self, app: ASGIApp, minimum_size: int = 1024) -> None:
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        accepted = _accepted_encodings(Headers(scope=scope).get("accept-encoding", ""))
+        if brotli is not None and "br" in accepted:
+            encoding = "br"
+        elif "gzip" in accepted:
+            encoding = "gzip"
+        else:
+            await self.app(scope, receive, send)
+            return
+
+        start_message: Message | None = None
+        passthrough = False
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal start_message, passthrough
+            if passthrough:
+                await send(message)
+                return
+            if message["type"] == "http.response.start":
+                headers = Headers(raw=message["headers"])
+                if "content-encoding" in headers or headers.get("content-type", "").startswith(EXCLUDED_MEDIA_TYPES):
+                    passthrough = True
+                    await send(message)
+                else:
+                    start_message = message # 看到第一段响应体后才能决定是否压缩
+                return
+            if message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            passthrough = True # 只处理第一段响应体，之后的消息 (流式响应的后续分段) 原样透传
+            if message.get("more_body", False) or len(body) < self.minimum_size:
+                await send(start_message)
+                await send(message)
+                return
+
+            body = brotli.compress(body, quality=BROTLI_QUALITY) if encoding == "br" else gzip.compress(body, compresslevel=GZIP_LEVEL)
+            headers = MutableHeaders(raw=start_message["headers"])
+            headers["Content-Encoding"] = encoding
+            headers["Content-Length"] = str(len(body))
+            headers.add_vary_header("Accept-Encoding")
+            await send(start_message)
+            await send({"type": "http.response.body", "body": body, "more_body": False})
+
+        await self.app(scope, receive, send_wrapper)
@@ -0,0 +1,34 @@
+from fastapi import Request, Response
+
+
+# 条件 GET (If-None-Match / 304)：ETag 由行版本号或集合版本号生成，不需要读取完整数据、也不需要序列化响应体就能判断是否变化
+# 使用弱 ETag (W/"...")：标识的是数据版本而不是响应体的字节，响应压缩或序列化方式不同不影响比较
+def make_etag(*parts) -> str:
+    return 'W/"' + "-".join(str(part) for part in parts) + '"'
+
+
+# 请求是否带有 If-None-Match：没有时不必先查询版本号
+def has_if_none_match(request: Request) -> bool:
+    return bool(request.headers.get("if-none-match"))
+
+
+# 按弱比较规则判断 If-None-Match 是否包含 etag (忽略 W/ 前缀，* 匹配任意版本)
+def etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    opaque = etag.removeprefix("W/")
+    return any(
+        candidate == "*" or candidate.removeprefix("W/") == opaque
+        for candidate in (part.strip() for part in header.split(","))
+    )
+
+
+# no-cache：浏览器可以缓存响应，但每次使用前都要带上 If-None-Match 重新验证
+def set_etag(response: Response, etag: str) -> None:
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = "no-cache"
+
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=304, headers={"ETag": etag, "Cache-Control": "no-cache"})
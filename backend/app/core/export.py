@@ -0,0 +1,83 @@
+import csv
+import io
+import json
+import zlib
+from datetime import date, datetime
+from decimal import Decimal
+from typing import AsyncIterator, Awaitable, Callable, Literal
+
+from fastapi.responses import StreamingResponse
+from sqlalchemy import Select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.database import SessionLocal
+
+ExportFormat = Literal["csv", "ndjson"]
+
+EXPORT_BATCH_SIZE = 1000 # 每次从数据库游标取出并写出的行数
+
+# 导出的数据来源：单条查询，或在导出会话中构造一组依次输出的查询 (例如归档表 + 流水表)
+ExportSource = Select | Callable[[AsyncSession], Awaitable[list[Select]]]
+
+_MEDIA_TYPES = {"csv": "text/csv; charset=utf-8", "ndjson": "application/x-ndjson"}
+
+
+def _json_default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return int(value) if value == value.to_integral_value() else float(value)
+    raise TypeError(f"无法序列化的类型: {type(value).__name__}")
+
+
+def _format_partition(rows, columns: list[str], fmt: ExportFormat) -> str:
+    if fmt == "ndjson":
+        return "".join(json.dumps(dict(zip(columns, row)), ensure_ascii=False, default=_json_default) + "\n" for row in rows)
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerows(
+        [value.isoformat() if isinstance(value, (datetime, date)) else value for value in row]
+        for row in rows
+    )
+    return buffer.getvalue()
+
+
+# 通过服务端游标 (yield_per) 分批读取查询结果并逐批编码输出，内存占用与结果集大小无关
+# 响应在路由函数返回后才开始发送，因此这里自行打开数据库会话，而不依赖请求级的 get_db
+# 多条查询依次输出，列以第一条查询为准
+async def _iter_export(source: ExportSource, fmt: ExportFormat, compress: bool) -> AsyncIterator[bytes]:
+    compressor = zlib.compressobj(wbits=31) if compress else None # wbits=31 生成 gzip 格式
+
+    def encode(text: str) -> bytes:
+        data = text.encode("utf-8")
+        return compressor.compress(data) if compressor else data
+
+    async with SessionLocal() as db:
+        queries = [source] if isinstance(source, Select) else await source(db)
+        columns = [column.name for column in queries[0].selected_columns]
+
+        if fmt == "csv":
+            # 带 BOM 的表头，Excel 打开时能正确识别 UTF-8 中文
+            header = io.StringIO()
+            csv.writer(header).writerow(columns)
+            yield encode("\ufeff" + header.getvalue())
+
+        for query in queries:
+            result = await db.stream(query.execution_options(yield_per=EXPORT_BATCH_SIZE))
+            async for partition in result.partitions():
+                chunk = encode(_format_partition(partition, columns, fmt))
+                if chunk:
+                    yield chunk
+
+    if compressor:
+        yield compressor.flush()
+
+
+# 构造流式导出响应；compress=True 时输出 .gz 文件
+def export_response(source: ExportSource, fmt: ExportFormat, filename: str, compress: bool = False) -> StreamingResponse:
+    filename = f"{filename}.{fmt}" + (".gz" if compress else "")
+    return StreamingResponse(
+        _iter_export(source, fmt, compress),
+        media_type="application/gzip" if compress else _MEDIA_TYPES[fmt],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
@@ -0,0 +1,39 @@
+import json
+from datetime import date, datetime
+from typing import Any
+
+from fastapi import Response
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson # 可选依赖：未安装时退回标准库 json，输出相同，只是更慢
+except ImportError:
+    orjson = None
+
+
+# 与 Pydantic 的 JSON 输出保持一致：UTC 时间以 Z 结尾
+def _json_default(value):
+    if isinstance(value, datetime):
+        text = value.isoformat()
+        return text[:-6] + "Z" if text.endswith("+00:00") else text
+    if isinstance(value, date):
+        return value.isoformat()
+    raise TypeError(f"无法序列化的类型: {type(value).__name__}")
+
+
+def dumps(content: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(content, option=orjson.OPT_UTC_Z)
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":"), default=_json_default).encode("utf-8")
+
+
+# 快速 JSON 响应：内容已是由字典、列表和基本类型组成的数据 (例如直接由查询行转换而来)，
+# 不经过 response_model 的逐行校验和 jsonable_encoder，直接编码 (安装了 orjson 时使用 orjson)
+class FastJSONResponse(JSONResponse):
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+# 路由直接返回 Response 对象时，FastAPI 不会合并注入的 response 参数上设置的响应头 (如 X-Next-Cursor)，这里一并带上
+def fast_json_response(content: Any, response: Response) -> FastJSONResponse:
+    return FastJSONResponse(content, headers=dict(response.headers))
@@ -0,0 +1,10 @@
+import logging
+
+LOG_FORMAT = "%(asctime)s %(levelname)s [%(name)s] %(message)s"
+
+
+# 配置应用日志 (app.* 的记录器)：未配置根日志时输出到标准错误；
+# 在 uvicorn 下运行时 uvicorn 只配置自己的记录器，app.* 的日志同样经根日志输出
+def setup_logging(level: str) -> None:
+    logging.basicConfig(format=LOG_FORMAT)
+    logging.getLogger("app").setLevel(level.upper())
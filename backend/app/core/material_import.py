@@ -0,0 +1,109 @@
+import csv
+from pathlib import PurePath
+from typing import BinaryIO, Iterator
+
+# 导入文件的表头：支持字段名和常用中文列名
+HEADER_ALIASES = {
+    "code": "code", "编码": "code", "物资编码": "code",
+    "name": "name", "名称": "name", "物资名称": "name",
+    "model": "model", "型号": "model",
+    "unit": "unit", "单位": "unit",
+    "supplier": "supplier", "供应商": "supplier",
+    "remarks": "remarks", "备注": "remarks",
+    "is_active": "is_active", "是否启用": "is_active",
+}
+
+_BOOLEAN_ALIASES = {"是": True, "启用": True, "否": False, "停用": False}
+
+
+def _map_header(header: list) -> list[str | None]:
+    fields = [HEADER_ALIASES.get(str(cell).strip()) if cell is not None else None for cell in header]
+    if "code" not in fields or "name" not in fields:
+        raise ValueError("导入文件的表头必须包含物资编码 (code) 和物资名称 (name) 两列。")
+    return fields
+
+
+def _row_to_dict(fields: list[str | None], values) -> dict | None:
+    data = {}
+    for field, value in zip(fields, values):
+        if field is None:
+            continue
+        if isinstance(value, str):
+            value = value.strip()
+            if value == "":
+                value = None
+        if field == "is_active" and value in _BOOLEAN_ALIASES:
+            value = _BOOLEAN_ALIASES[value]
+        elif field != "is_active" and value is not None and not isinstance(value, str):
+            value = str(value) # Excel 中纯数字的编码等会被读成数字
+        data[field] = value
+    if all(value is None for value in data.values()):
+        return None # 跳过空行
+    if data.get("is_active") is None:
+        data.pop("is_active", None) # 未填写时使用默认值 (启用)
+    return data
+
+
+# 逐行解码 (而不是 TextIOWrapper 按块解码)，编码错误时能准确报告行号；csv.reader 会自行拼接引号内跨行的字段
+def _decode_lines(file: BinaryIO) -> Iterator[str]:
+    for line_no, line in enumerate(file, start=1):
+        yield line.decode("utf-8-sig" if line_no == 1 else "utf-8")
+
+
+def _iter_csv(file: BinaryIO) -> Iterator[tuple[int, dict]]:
+    reader = csv.reader(_decode_lines(file))
+    try:
+        header = next(reader, None)
+        if header is None:
+            return
+        fields = _map_header(header)
+        for values in reader:
+            data = _row_to_dict(fields, values)
+            if data is not None:
+                yield reader.line_num, data
+    except UnicodeDecodeError:
+        raise ValueError(f"导入文件第 {reader.line_num + 1} 行无法按 UTF-8 解码，请将文件另存为 UTF-8 编码的 CSV。")
+    except csv.Error as e: # 字段超过长度上限等
+        raise ValueError(f"导入文件第 {reader.line_num} 行格式错误: {e}")
+
+
+def _iter_excel(file: BinaryIO) -> Iterator[tuple[int, dict]]:
+    try:
+        from openpyxl import load_workbook # 可选依赖，仅导入 Excel 文件时需要
+    except ImportError:
+        raise ValueError("导入 Excel 文件需要安装 openpyxl。")
+    try:
+        workbook = load_workbook(file, read_only=True, data_only=True) # 只读模式逐行读取，不把整个工作表载入内存
+    except Exception as e: # 文件损坏或不是 Excel 文件 (zipfile.BadZipFile、InvalidFileException 等)
+        raise ValueError(f"无法读取 Excel 文件: {e}")
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        fields = _map_header(list(header))
+        for row_no, values in enumerate(rows, start=2):
+            data = _row_to_dict(fields, values)
+            if data is not None:
+                yield row_no, data
+    finally:
+        workbook.close()
+
+
+# 逐行解析物资导入文件 (CSV 或 Excel)，生成 (文件中的行号, 字段字典)
+# 行号从表头所在的第 1 行算起，便于用户在原文件中定位错误
+def iter_material_rows(file: BinaryIO, filename: str) -> Iterator[tuple[int, dict]]:
+    suffix = PurePath(filename or "").suffix.lower()
+    if suffix in (".xlsx", ".xlsm"):
+        return _iter_excel(file)
+    if suffix in (".csv", ".txt", ""):
+        return _iter_csv(file)
+    raise ValueError(f"不支持的导入文件类型: {suffix}，请上传 CSV 或 Excel (.xlsx) 文件。")
+
+
+# 完整解析一遍导入文件 (不校验字段内容)，检查文件类型、表头、编码和格式，然后把文件指针移回开头
+# 导入按块提交，这类错误如果到文件中途才发现，前面的块已经写入；预先检查保证文件本身有问题时一行都不导入
+def check_material_file(file: BinaryIO, filename: str) -> None:
+    for _ in iter_material_rows(file, filename):
+        pass
+    file.seek(0)
@@ -0,0 +1,159 @@
+import math
+import threading
+from typing import Callable, Iterable
+
+# Prometheus 文本格式 (GET /metrics)
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# 外部指标采集函数：返回 (指标名, 类型 counter/gauge, 说明, 值) 的列表，在每次抓取时调用；值为 None 的项不输出
+Collector = Callable[[], Iterable[tuple[str, str, str, float]]]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: tuple[str, ...], values: tuple, extra: str = "") -> str:
+    parts = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _number(value: float) -> str:
+    if isinstance(value, float) and math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+# 带标签的累计计数器；每组标签值各自累计
+class Counter:
+    type = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: tuple[str, ...] = ()) -> None:
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+        self._values: dict[tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, labelvalues: tuple = (), amount: float = 1) -> None:
+        with self._lock:
+            self._values[labelvalues] = self._values.get(labelvalues, 0) + amount
+
+    def collect(self) -> list[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{_labels(self.labelnames, labels)} {_number(value)}" for labels, value in items]
+
+
+# 带标签的直方图：桶计数在输出时转换为 Prometheus 要求的累计形式 (le="x" 表示小于等于 x 的样本数)
+class Histogram:
+    type = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: tuple[str, ...], buckets: tuple[float, ...]) -> None:
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+        self.buckets = tuple(sorted(buckets))
+        self._values: dict[tuple, list] = {} # 标签值 -> [各桶计数 (最后一个为 +Inf), 样本和]
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, labelvalues: tuple = ()) -> None:
+        index = next((i for i, bound in enumerate(self.buckets) if value <= bound), len(self.buckets))
+        with self._lock:
+            entry = self._values.get(labelvalues)
+            if entry is None:
+                entry = self._values[labelvalues] = [[0] * (len(self.buckets) + 1), 0.0]
+            entry[0][index] += 1
+            entry[1] += value
+
+    def collect(self) -> list[str]:
+        with self._lock:
+            items = sorted((labels, (list(counts), total)) for labels, (counts, total) in self._values.items())
+        lines = []
+        for labels, (counts, total) in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), counts):
+                cumulative += count
+                le = 'le="' + _number(float(bound)) + '"'
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, labels, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, labels)} {_number(total)}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, labels)} {cumulative}")
+        return lines
+
+
+# 进程内的指标注册表 (每个 worker 进程一份，由 Prometheus 分别抓取各进程或经汇总后抓取)
+class MetricsRegistry:
+    def __init__(self) -> None:
+        self._metrics: list[Counter | Histogram] = []
+        self._collectors: list[Collector] = []
+
+    def counter(self, name: str, help: str, labelnames: tuple[str, ...] = ()) -> Counter:
+        metric = Counter(name, help, labelnames)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name: str, help: str, labelnames: tuple[str, ...], buckets: tuple[float, ...]) -> Histogram:
+        metric = Histogram(name, help, labelnames, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def register_collector(self, collector: Collector) -> None:
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines += [f"# HELP {metric.name} {metric.help}", f"# TYPE {metric.name} {metric.type}", *metric.collect()]
+        for collector in self._collectors:
+            for name, metric_type, help, value in collector():
+                if value is None: # 例如当前连接池实现不提供该项
+                    continue
+                lines += [f"# HELP {name} {help}", f"# TYPE {name} {metric_type}", f"{name} {_number(value)}"]
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0) # 秒
+
+# ---- 每个路由的请求指标 ----
+# route 标签取路由模板 (例如 /api/v1/materials/{material_id})，而不是实际路径，标签组合数不随 ID 增长；未匹配任何路由的请求记为 unmatched
+http_requests = registry.counter("http_requests_total", "请求数", ("method", "route", "status"))
+http_request_duration = registry.histogram(
+    "http_request_duration_seconds", "请求耗时 (到返回响应头为止，流式响应不含发送响应体的时间)", ("method", "route"), LATENCY_BUCKETS
+)
+http_request_db_statements = registry.counter("http_request_db_statements_total", "请求中执行的 SQL 语句数", ("method", "route"))
+http_request_db_seconds = registry.counter("http_request_db_seconds_total", "请求中执行 SQL 的累计耗时", ("method", "route"))
+http_request_db_rows = registry.counter("http_request_db_rows_total", "请求中 SQL 返回的行数 (服务端游标流式读取的行不计)", ("method", "route"))
+
+# ---- SQL 语句指标 (包括请求之外的后台任务) ----
+db_statement_duration = registry.histogram("db_statement_duration_seconds", "单条 SQL 语句的执行耗时", (), LATENCY_BUCKETS)
+db_slow_statements = registry.counter("db_slow_statements_total", "超过 SLOW_QUERY_THRESHOLD_MS 的 SQL 语句数")
+
+
+# 请求对应的路由模板 (route 标签)。子路由器中的路由只记录相对模板 (例如 /{material_id})，
+# 用实际路径去掉该路由生成的部分得到挂载前缀 (本项目的前缀都不含路径参数)，再拼上相对模板
+def route_label(scope: dict) -> str:
+    route = scope.get("route")
+    template = getattr(route, "path", None)
+    if template is None:
+        return "unmatched"
+    path = scope["path"]
+    try:
+        relative = route.url_path_for(route.name, **scope.get("path_params", {}))
+    except Exception: # 无法反向生成路径时只记录相对模板
+        return template
+    if not path.endswith(relative):
+        return template
+    return path[:len(path) - len(relative)] + template
+
+
+def record_request(method: str, route: str, status: int, seconds: float, statements: int, db_seconds: float, rows: int) -> None:
+    labels = (method, route)
+    http_requests.inc((method, route, status))
+    http_request_duration.observe(seconds, labels)
+    http_request_db_statements.inc(labels, statements)
+    http_request_db_seconds.inc(labels, db_seconds)
+    http_request_db_rows.inc(labels, rows)
@@ -0,0 +1,20 @@
+import base64
+import json
+from datetime import datetime
+
+
+# 键集 (游标) 分页：游标是上一页最后一行的 (时间, id)，对客户端不透明 (base64 编码的 JSON)
+# 下一页只需 WHERE (time, id) < (游标时间, 游标id)，借助 (time, id) 复合索引定位，页深不影响耗时
+def encode_cursor(time_value: datetime, record_id: int) -> str:
+    payload = json.dumps({"t": time_value.isoformat(), "id": record_id}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+# 解析游标，格式不正确时抛出 ValueError，由路由转换为 400 错误
+def decode_cursor(cursor: str) -> tuple[datetime, int]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.fromisoformat(payload["t"]), int(payload["id"])
+    except (ValueError, KeyError, TypeError) as e:
+        raise ValueError(f"无效的分页游标: {cursor}") from e
@@ -0,0 +1,69 @@
+import asyncio
+import json
+from typing import AsyncIterator, Callable
+
+from fastapi.responses import StreamingResponse
+from sqlalchemy import Select
+
+from app.core.broadcast import balance_broker
+from app.core.config import settings
+from app.db.database import SessionLocal
+
+SNAPSHOT_BATCH_SIZE = 1000 # 初始快照每个事件包含的物资数
+
+
+def _sse(event: str, data) -> bytes:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False, separators=(',', ':'))}\n\n".encode("utf-8")
+
+
+# Server-Sent Events 推送：
+#   retry         浏览器 EventSource 断线重连前的等待毫秒数
+#   snapshot      初始快照，分批发送全部物资的当前库存 (每批一个事件，data 为数组)
+#   ready         快照发送完毕，之后只推送变化
+#   balance       库存变化 (data 为数组，同一物资在两次发送之间的多次变化只保留最新一次)
+#   resync        待发送缓冲溢出，变化已被丢弃：服务端随即结束连接，客户端重连后重新获得完整快照
+#   ": keepalive" 注释行，没有变化时定期发送，防止代理断开空闲连接，也用于及时发现已断开的客户端
+# 先订阅再读取快照：读取快照期间发生的变化会在快照之后补发，事件携带绝对值，重复应用不影响结果
+# 快照自行打开数据库会话 (响应在路由函数返回后才开始发送)，发送完即释放连接，空闲连接不占用数据库连接
+# 订阅在生成器开始执行时才登记：客户端在响应开始发送前就断开时生成器不会被执行，finally 也不会运行，提前登记会泄漏订阅
+async def _iter_balance_stream(snapshot_query: Select, to_event: Callable) -> AsyncIterator[bytes]:
+    yield f"retry: {settings.STREAM_RETRY_MS}\n\n".encode("utf-8")
+    subscription = balance_broker.subscribe()
+    if subscription is None: # 路由检查之后订阅数恰好达到上限，让客户端稍后重连
+        yield _sse("resync", {"reason": "busy"})
+        return
+    try:
+        material_count = 0
+        async with SessionLocal() as db:
+            result = await db.stream(snapshot_query.execution_options(yield_per=SNAPSHOT_BATCH_SIZE))
+            async for partition in result.partitions():
+                material_count += len(partition)
+                yield _sse("snapshot", [to_event(*row) for row in partition])
+        yield _sse("ready", {"materials": material_count})
+
+        while True:
+            if subscription.overflowed:
+                yield _sse("resync", {"reason": "overflow"})
+                return
+            try:
+                await asyncio.wait_for(subscription.ready.wait(), settings.STREAM_KEEPALIVE_SECONDS)
+            except asyncio.TimeoutError:
+                yield b": keepalive\n\n"
+                continue
+            events = subscription.drain()
+            if events:
+                yield _sse("balance", events)
+    finally:
+        balance_broker.unsubscribe(subscription)
+
+
+# 构造推送响应；订阅者已满时返回 None，由调用方返回 503
+# snapshot_query 按行返回 (物资ID, 当前数量, 最低库存阈值)，to_event 把一行转换为与变化事件相同格式的字典
+def balance_stream_response(snapshot_query: Select, to_event: Callable) -> StreamingResponse | None:
+    if balance_broker.full():
+        return None
+    return StreamingResponse(
+        _iter_balance_stream(snapshot_query, to_event),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}, # 禁止 nginx 等代理缓冲
+    )
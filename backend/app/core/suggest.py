@@ -0,0 +1,69 @@
+import bisect
+from typing import Iterable
+
+
+# 物资编码/名称的前缀自动补全索引 (进程内)
+# 编码和名称 (转小写) 各自维护一个有序列表，前缀查询用二分查找定位，不访问数据库；
+# 应用启动时从 materials 表构建，物资的创建、修改、删除提交后同步更新。
+# 只收录启用的物资。多 worker 部署时每个进程各有一份，其他进程的修改要等 SUGGEST_INDEX_REFRESH_SECONDS 定期重建后才可见
+class MaterialSuggestIndex:
+    def __init__(self) -> None:
+        self._materials: dict[int, tuple[str, str]] = {} # 物资ID -> (编码, 名称)
+        self._code_keys: list[tuple[str, int]] = [] # (小写编码, 物资ID)，有序
+        self._name_keys: list[tuple[str, int]] = [] # (小写名称, 物资ID)，有序
+
+    def __len__(self) -> int:
+        return len(self._materials)
+
+    def rebuild(self, materials: Iterable[tuple[int, str, str]]) -> None:
+        self._materials = {material_id: (code, name) for material_id, code, name in materials}
+        self._code_keys = sorted((code.lower(), material_id) for material_id, (code, _) in self._materials.items())
+        self._name_keys = sorted((name.lower(), material_id) for material_id, (_, name) in self._materials.items())
+
+    def add(self, material_id: int, code: str, name: str) -> None:
+        self.remove(material_id)
+        self._materials[material_id] = (code, name)
+        bisect.insort(self._code_keys, (code.lower(), material_id))
+        bisect.insort(self._name_keys, (name.lower(), material_id))
+
+    def remove(self, material_id: int) -> None:
+        entry = self._materials.pop(material_id, None)
+        if entry is None:
+            return
+        code, name = entry
+        for keys, key in ((self._code_keys, (code.lower(), material_id)), (self._name_keys, (name.lower(), material_id))):
+            position = bisect.bisect_left(keys, key)
+            if position < len(keys) and keys[position] == key:
+                del keys[position]
+
+    # 物资创建、修改后调用：停用的物资从索引中移除
+    def upsert(self, material_id: int, code: str, name: str, is_active: bool | None = True) -> None:
+        if is_active is False:
+            self.remove(material_id)
+        else:
+            self.add(material_id, code, name)
+
+    @staticmethod
+    def _prefix_matches(keys: list[tuple[str, int]], prefix: str):
+        position = bisect.bisect_left(keys, (prefix,))
+        while position < len(keys) and keys[position][0].startswith(prefix):
+            yield keys[position][1]
+            position += 1
+
+    # 返回前缀匹配的前 limit 个物资 (ID, 编码, 名称)：编码匹配优先，其次名称匹配，各自按字典序
+    def suggest(self, prefix: str, limit: int = 10) -> list[tuple[int, str, str]]:
+        prefix = prefix.lower()
+        results: list[tuple[int, str, str]] = []
+        seen: set[int] = set()
+        for keys in (self._code_keys, self._name_keys):
+            for material_id in self._prefix_matches(keys, prefix):
+                if material_id in seen:
+                    continue
+                seen.add(material_id)
+                results.append((material_id, *self._materials[material_id]))
+                if len(results) >= limit:
+                    return results
+        return results
+
+
+material_suggest_index = MaterialSuggestIndex()
@@ -2,4 +2,10 @@ from . import crud_material
 from . import crud_inventory_balance 
 from . import crud_inbound_record   
 from . import crud_outbound_record
-from . import crud_statistics
\ No newline at end of file
+from . import crud_statistics
+from . import crud_inventory_summary
+from . import crud_daily_movement
+from . import crud_material_search
+from . import crud_inventory_snapshot
+from . import crud_ledger_archive
+from . import crud_stock_alert
@@ -0,0 +1,92 @@
+from datetime import date, datetime
+from typing import Iterable, Literal
+
+from sqlalchemy import func, select, update, delete, insert
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.daily_movement import DailyMovement as DailyMovementModel
+from app.crud.crud_ledger_archive import ledger_sources, ledger_time_column
+
+MovementDirection = Literal["inbound", "outbound"]
+
+# 累加到每日汇总的数据：按 (物资ID, 日期) 汇总数量和条数
+def _aggregate(movements: Iterable[tuple[int, datetime, int]]) -> dict[tuple[int, date], list[int]]:
+    totals: dict[tuple[int, date], list[int]] = {}
+    for material_id, moved_at, quantity in movements:
+        key = (material_id, moved_at.date())
+        total = totals.setdefault(key, [0, 0])
+        total[0] += quantity
+        total[1] += 1
+    return totals
+
+# 在调用方的事务中把一批出入库记录累加到每日汇总表，不提交事务
+# movements: (物资ID, 出入库时间, 数量)；同一 (物资, 日期) 只写一行，整批用一条 executemany 的 upsert 完成
+async def record_daily_movements(db: AsyncSession, direction: MovementDirection, movements: Iterable[tuple[int, datetime, int]]) -> None:
+    totals = _aggregate(movements)
+    if not totals:
+        return
+    quantity_column, count_column = f"{direction}_quantity", f"{direction}_count"
+    table = DailyMovementModel.__table__
+    rows = [
+        {"material_id": material_id, "day": day, quantity_column: quantity, count_column: count}
+        for (material_id, day), (quantity, count) in sorted(totals.items()) # 固定顺序写入，减少并发事务间的死锁
+    ]
+
+    dialect = db.get_bind().dialect.name
+    if dialect == "mysql":
+        stmt = mysql_insert(table)
+        stmt = stmt.on_duplicate_key_update({
+            quantity_column: table.c[quantity_column] + stmt.inserted[quantity_column],
+            count_column: table.c[count_column] + stmt.inserted[count_column],
+        })
+    elif dialect in ("sqlite", "postgresql"):
+        stmt = (sqlite_insert if dialect == "sqlite" else postgresql_insert)(table)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[table.c.material_id, table.c.day],
+            set_={
+                quantity_column: table.c[quantity_column] + stmt.excluded[quantity_column],
+                count_column: table.c[count_column] + stmt.excluded[count_column],
+            }
+        )
+    else: # 不支持 upsert 的数据库：逐行先 UPDATE，不存在再 INSERT
+        for row in rows:
+            result = await db.execute(
+                update(table)
+                .where(table.c.material_id == row["material_id"], table.c.day == row["day"])
+                .values({
+                    quantity_column: table.c[quantity_column] + row[quantity_column],
+                    count_column: table.c[count_column] + row[count_column],
+                })
+            )
+            if result.rowcount == 0:
+                await db.execute(insert(table).values(**row))
+        return
+    await db.execute(stmt, rows)
+
+# 根据出入库流水 (含按月归档表) 从头重建每日汇总表并提交，用于历史数据回填或修复 (python -m app.cli rebuild-daily-movements)
+async def rebuild_daily_movements(db: AsyncSession) -> int:
+    totals: dict[tuple[int, date], dict] = {}
+    for direction in ("inbound", "outbound"):
+        for source in await ledger_sources(db, direction):
+            day_column = func.date(ledger_time_column(direction, source))
+            result = await db.execute(
+                select(source.c.material_id, day_column, func.sum(source.c.quantity), func.count(source.c.id))
+                .group_by(source.c.material_id, day_column)
+            )
+            for material_id, day, quantity, count in result:
+                if isinstance(day, str): # SQLite 的 DATE() 返回字符串
+                    day = date.fromisoformat(day)
+                row = totals.setdefault((material_id, day), {
+                    "material_id": material_id, "day": day,
+                    "inbound_quantity": 0, "inbound_count": 0, "outbound_quantity": 0, "outbound_count": 0,
+                })
+                row[f"{direction}_quantity"] += quantity # 归档进行中同一天的流水可能分布在归档表和流水表中
+                row[f"{direction}_count"] += count
+
+    await db.execute(delete(DailyMovementModel))
+    if totals:
+        await db.execute(insert(DailyMovementModel), list(totals.values()))
+    await db.commit()
+    return len(totals)
@@ -1,14 +1,27 @@
-from sqlalchemy.orm import Session
+import logging
+
+from sqlalchemy import Select, Table, bindparam, func, insert, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload
 from sqlalchemy.exc import SQLAlchemyError
 from fastapi import HTTPException, status
+from app.crud.loaders import material_loader, response_row_dicts, select_response_rows
 from app.models.inbound_record import InboundRecord as InboundRecordModel
-from app.schemas.inbound_record import InboundRecordCreate
-from app.crud.crud_inventory_balance import update_inventory_balance_quantity, get_inventory_balance_by_material_id, create_inventory_balance
+from app.models.inventory_balance import InventoryBalance as InventoryBalanceModel
+from app.models.material import Material as MaterialModel
+from app.schemas.inbound_record import InboundRecord as InboundRecordSchema, InboundRecordCreate, InboundRecordBatchResult, InboundBatchMaterialResult
+from app.crud.crud_inventory_balance import update_inventory_balance_quantity, get_inventory_balance_by_material_id, create_inventory_balance, notify_balance_changes
 from app.schemas.inventory_balance import InventoryBalanceCreate
+from app.crud.crud_inventory_summary import apply_inventory_summary_delta, is_stock_alert, stock_alert_delta
+from app.crud.crud_stock_alert import sync_stock_alerts
+from app.crud.crud_daily_movement import record_daily_movements
+from app.crud.crud_ledger_archive import ledger_sources, read_archived_records
 from datetime import datetime
 
+logger = logging.getLogger(__name__)
+
 # 创建入库记录，并更新库存余額
-def create_inbound_record(db: Session, inbound_record_data: InboundRecordCreate) -> InboundRecordModel:
+async def create_inbound_record(db: AsyncSession, inbound_record_data: InboundRecordCreate) -> InboundRecordModel:
     try:
         # 步骤 1: 创建入库记录对象并添加到会话
         db_inbound_record = InboundRecordModel(**inbound_record_data.model_dump())
@@ -18,68 +31,243 @@ def create_inbound_record(db: Session, inbound_record_data: InboundRecordCreate)
         quantity_change = inbound_record_data.quantity
 
         # 步骤 2: 更新或初始化库存余額 (这些函数现在不应自行 commit)
-        inventory_balance = get_inventory_balance_by_material_id(db, material_id=material_id)
+        inventory_balance = await get_inventory_balance_by_material_id(db, material_id=material_id)
         if not inventory_balance:
             initial_balance_data = InventoryBalanceCreate(
                 material_id=material_id,
                 current_quantity=0 
             )
             # create_inventory_balance 现在不 commit，只 add
-            created_balance = create_inventory_balance(db=db, inventory_balance=initial_balance_data) 
+            created_balance = await create_inventory_balance(db=db, inventory_balance=initial_balance_data) 
             if not created_balance: # 假设 create_inventory_balance 在错误时返回 None 或抛错
                 raise Exception("Failed to initialize inventory balance.")
 
 
         # update_inventory_balance_quantity 现在不 commit，只 add (或修改对象)
-        updated_inv = update_inventory_balance_quantity(db=db, material_id=material_id, quantity_change=quantity_change)
+        updated_inv = await update_inventory_balance_quantity(db=db, material_id=material_id, quantity_change=quantity_change)
         if not updated_inv: # 假设 update_inventory_balance_quantity 在错误时返回 None 或抛错
             raise Exception("Failed to update inventory quantity.")
 
+        # 累加到每日出入库汇总 (flush 后才能取得数据库生成的入库时间)
+        await db.flush()
+        await record_daily_movements(db, "inbound", [(material_id, db_inbound_record.inbound_time, quantity_change)])
 
-        # 步骤 3: 所有操作成功后，统一提交事务
-        db.commit()
-        db.refresh(db_inbound_record) # 刷新以获取数据库生成的值
-        # 如果需要，也可以刷新 inventory_balance
-        # db.refresh(updated_inv if updated_inv else created_balance)
-
-        return db_inbound_record
-
+        # 步骤 3: 所有操作成功后，统一提交事务 (整个入库操作只有这一次 commit)
+        # inbound_time 等数据库生成的值由 eager_defaults 在 flush 时取回，无需再 refresh
+        await db.commit()
     except HTTPException: # 直接重新抛出已知的业务逻辑异常
-        db.rollback()
+        await db.rollback()
         raise
     except SQLAlchemyError as e_sql: # 捕获所有 SQLAlchemy 错误
-        db.rollback()
-        print(f"Database error during inbound record creation: {e_sql}")
+        await db.rollback()
+        logger.exception("创建入库记录时数据库操作失败 (物资ID %s)", material_id)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Database operation failed: {e_sql}"
         )
     except Exception as e_global: # 捕获其他所有意外错误
-        db.rollback()
-        print(f"Unexpected error during inbound record creation: {e_global}")
+        await db.rollback()
+        logger.exception("创建入库记录时发生意外错误 (物资ID %s)", material_id)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"An unexpected error occurred: {e_global}"
         )
 
-# 根据ID获取入库记录
-def get_inbound_record_by_id(db: Session, record_id: int) -> InboundRecordModel | None:
-    return db.query(InboundRecordModel).filter(InboundRecordModel.id == record_id).first()
+    # 以下在提交之后执行，不在上面的回滚/500 处理范围内：入库已经生效，不能让客户端误以为失败而重试
+    await notify_balance_changes([(material_id, updated_inv.current_quantity, updated_inv.min_stock_level)])
+    await db_inbound_record.awaitable_attrs.material # 加载响应中的关联物资 (通常已在会话中，不会再查询)
+    return db_inbound_record
+
+# 批量创建入库记录 (一张到货单的多行)，整批在一个事务中完成：
+# 1. 一次 IN 查询校验所有物资ID
+# 2. 为缺少库存记录的物资批量补建余額行
+# 3. executemany 批量插入入库记录
+# 4. 按物资汇总增量，用一条 executemany 的 UPDATE 累加库存
+# 5. 统一提交一次
+async def create_inbound_records_batch(db: AsyncSession, inbound_records_data: list[InboundRecordCreate]) -> InboundRecordBatchResult:
+    totals: dict[int, int] = {}
+    for item in inbound_records_data:
+        totals[item.material_id] = totals.get(item.material_id, 0) + item.quantity
+    material_ids = sorted(totals)
+
+    existing_ids = set((await db.scalars(select(MaterialModel.id).where(MaterialModel.id.in_(material_ids)))).all())
+    missing_ids = [material_id for material_id in material_ids if material_id not in existing_ids]
+    if missing_ids:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"无法创建入库记录：物资ID {missing_ids} 不存在。"
+        )
+
+    try:
+        balance_ids = set((await db.scalars(
+            select(InventoryBalanceModel.material_id).where(InventoryBalanceModel.material_id.in_(material_ids))
+        )).all())
+        missing_balance_ids = [material_id for material_id in material_ids if material_id not in balance_ids]
+        if missing_balance_ids:
+            await db.execute(
+                insert(InventoryBalanceModel),
+                [{"material_id": material_id, "current_quantity": 0} for material_id in missing_balance_ids]
+            )
+
+        # 整批使用同一个数据库时间作为入库时间，同时用于累加每日出入库汇总
+        inbound_time = await db.scalar(select(func.now()))
+        await db.execute(insert(InboundRecordModel), [{**item.model_dump(), "inbound_time": inbound_time} for item in inbound_records_data])
+        await record_daily_movements(db, "inbound", [(item.material_id, inbound_time, item.quantity) for item in inbound_records_data])
+
+        balance_table = InventoryBalanceModel.__table__
+        await db.execute(
+            update(balance_table)
+            .where(balance_table.c.material_id == bindparam("b_material_id"))
+            .values(current_quantity=balance_table.c.current_quantity + bindparam("b_quantity")),
+            [{"b_material_id": material_id, "b_quantity": totals[material_id]} for material_id in material_ids]
+        )
+
+        rows = (await db.execute(
+            select(InventoryBalanceModel.material_id, InventoryBalanceModel.current_quantity, InventoryBalanceModel.min_stock_level)
+            .where(InventoryBalanceModel.material_id.in_(material_ids))
+        )).all()
+        current_quantities = {row.material_id: row.current_quantity for row in rows}
+
+        # 预警集合和库存汇总：整批只更新一次汇总行
+        await sync_stock_alerts(db, [
+            (row.material_id, row.current_quantity, row.min_stock_level, is_stock_alert(row.current_quantity - totals[row.material_id], row.min_stock_level))
+            for row in rows
+        ])
+        await apply_inventory_summary_delta(
+            db,
+            balances_changed=True,
+            stock_quantity=sum(totals.values()),
+            stock_alerts=sum(
+                stock_alert_delta(row.current_quantity - totals[row.material_id], row.min_stock_level, row.current_quantity, row.min_stock_level)
+                for row in rows
+            )
+        )
+
+        await db.commit()
+    except SQLAlchemyError as e_sql:
+        await db.rollback()
+        logger.exception("批量创建入库记录时数据库操作失败")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Database operation failed: {e_sql}"
+        )
+
+    await notify_balance_changes([(row.material_id, row.current_quantity, row.min_stock_level) for row in rows])
+    return InboundRecordBatchResult(
+        created_count=len(inbound_records_data),
+        total_quantity=sum(totals.values()),
+        materials=[
+            InboundBatchMaterialResult(
+                material_id=material_id,
+                quantity_added=totals[material_id],
+                current_quantity=current_quantities[material_id]
+            )
+            for material_id in material_ids
+        ]
+    )
+
+# 根据ID获取入库记录 (连同关联物资一起加载)
+async def get_inbound_record_by_id(db: AsyncSession, record_id: int) -> InboundRecordModel | None:
+    return await db.scalar(
+        select(InboundRecordModel)
+        .options(joinedload(InboundRecordModel.material))
+        .where(InboundRecordModel.id == record_id)
+    )
+
+# 列表和导出共用的过滤条件；source 为流水表或结构相同的按月归档表
+def _filter_inbound_records(query: Select, material_id: int | None, start_time: datetime | None, end_time: datetime | None, source: Table = InboundRecordModel.__table__) -> Select:
+    if material_id is not None:
+        query = query.where(source.c.material_id == material_id)
+    if start_time:
+        query = query.where(source.c.inbound_time >= start_time)
+    if end_time:
+        query = query.where(source.c.inbound_time <= end_time)
+    return query
 
 # 获取入库记录列表 (可分页、可按物资ID、时间范围等过滤)
-def get_inbound_records(
-    db: Session, 
+# include_material=True 时用 JOIN 一次性加载关联物资，避免序列化时逐行懒加载 (N+1 查询)
+# 按 (inbound_time, id) 倒序；传入 cursor (上一页最后一行的时间和 id) 时使用键集分页并忽略 skip
+# 已归档的记录 (见 crud_ledger_archive) 接在流水表记录之后返回，与未归档时的分页结果一致
+async def get_inbound_records(
+    db: AsyncSession, 
     skip: int = 0, 
     limit: int = 100, 
     material_id: int | None = None,
     start_time: datetime | None = None,
+    end_time: datetime | None = None,
+    cursor: tuple[datetime, int] | None = None,
+    include_material: bool = True,
+    as_rows: bool = False
+) -> list[InboundRecordModel] | list[dict]:
+    if as_rows: # 快速序列化路径：只查询响应需要的列，返回字典
+        query = select_response_rows(InboundRecordModel.__table__, InboundRecordSchema, include_material)
+    else:
+        query = select(InboundRecordModel).options(material_loader(include_material, InboundRecordModel.material))
+    query = _filter_inbound_records(query, material_id, start_time, end_time)
+    query = query.order_by(InboundRecordModel.inbound_time.desc(), InboundRecordModel.id.desc())
+    if cursor is not None:
+        cursor_time, cursor_id = cursor
+        # 等价于 (inbound_time, id) < (cursor_time, cursor_id)；外层的 <= 条件可直接用于索引范围扫描
+        query = query.where(
+            InboundRecordModel.inbound_time <= cursor_time,
+            or_(InboundRecordModel.inbound_time < cursor_time, InboundRecordModel.id < cursor_id)
+        )
+    else:
+        query = query.offset(skip)
+    if as_rows:
+        records = response_row_dicts((await db.execute(query.limit(limit))).mappings(), InboundRecordSchema, include_material)
+    else:
+        records = list((await db.scalars(query.limit(limit))).all())
+
+    # 流水表中的记录不足一页：翻到了流水表末尾，继续从按月归档表中读取 (只在需要时才查询归档登记表)
+    if len(records) < limit:
+        archive_skip = 0
+        if records: # 归档行都早于流水表中的行，从本页最后一行之后接着读
+            last = records[-1]
+            cursor = (last["inbound_time"], last["id"]) if as_rows else (last.inbound_time, last.id)
+        elif cursor is None and skip:
+            live_count = await db.scalar(select(func.count()).select_from(
+                _filter_inbound_records(select(InboundRecordModel.id), material_id, start_time, end_time).subquery()
+            ))
+            archive_skip = skip - live_count
+        records += await read_archived_records(
+            db, "inbound",
+            lambda archive_query, source: _filter_inbound_records(archive_query, material_id, start_time, end_time, source),
+            start_time, end_time,
+            limit=limit - len(records), skip=archive_skip, cursor=cursor, include_material=include_material,
+            row_schema=InboundRecordSchema if as_rows else None
+        )
+    return records
+
+# 导出入库流水的查询：只选取导出需要的列 (含物资编码和名称)，按 (inbound_time, id) 正序
+# 返回查询语句而不执行，由调用方通过服务端游标流式读取；source 为流水表或结构相同的按月归档表
+def build_inbound_records_export_query(
+    material_id: int | None = None,
+    start_time: datetime | None = None,
+    end_time: datetime | None = None,
+    source: Table = InboundRecordModel.__table__
+) -> Select:
+    query = select(
+        source.c.id,
+        source.c.inbound_order_number,
+        source.c.material_id,
+        MaterialModel.code.label("material_code"),
+        MaterialModel.name.label("material_name"),
+        source.c.quantity,
+        source.c.inbound_time,
+        source.c.remarks,
+    ).join(MaterialModel, MaterialModel.id == source.c.material_id)
+    query = _filter_inbound_records(query, material_id, start_time, end_time, source)
+    return query.order_by(source.c.inbound_time, source.c.id)
+
+# 完整导出所需的全部查询：与时间范围有交集的归档表 (按月份升序) 在前，流水表在后，依次输出即为整体按时间正序
+async def build_inbound_records_export_queries(
+    db: AsyncSession,
+    material_id: int | None = None,
+    start_time: datetime | None = None,
     end_time: datetime | None = None
-) -> list[InboundRecordModel]:
-    query = db.query(InboundRecordModel)
-    if material_id is not None:
-        query = query.filter(InboundRecordModel.material_id == material_id)
-    if start_time:
-        query = query.filter(InboundRecordModel.inbound_time >= start_time)
-    if end_time:
-        query = query.filter(InboundRecordModel.inbound_time <= end_time)
-    return query.order_by(InboundRecordModel.inbound_time.desc()).offset(skip).limit(limit).all()
\ No newline at end of file
+) -> list[Select]:
+    return [
+        build_inbound_records_export_query(material_id, start_time, end_time, source)
+        for source in await ledger_sources(db, "inbound", start_time, end_time)
+    ]
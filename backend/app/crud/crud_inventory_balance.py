@@ -1,18 +1,71 @@
-from sqlalchemy.orm import Session
+import logging
+
+from sqlalchemy import Select, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload
 from sqlalchemy.exc import IntegrityError
 from fastapi import HTTPException, status
 
+from app.crud.loaders import material_loader
+from app.core.broadcast import balance_broker
+
 from app.models.inventory_balance import InventoryBalance as InventoryBalanceModel
+from app.models.material import Material as MaterialModel
 from app.schemas.inventory_balance import InventoryBalanceCreate, InventoryBalanceUpdate
+from app.crud.crud_statistics import invalidate_dashboard_summary
+from app.crud.crud_inventory_summary import apply_inventory_summary_delta, is_stock_alert, stock_alert_delta
+from app.crud.crud_stock_alert import sync_stock_alerts
+
+logger = logging.getLogger(__name__)
 
-# 根据物资ID获取库存余額
-def get_inventory_balance_by_material_id(db: Session, material_id: int) -> InventoryBalanceModel | None:
-    return db.query(InventoryBalanceModel).filter(InventoryBalanceModel.material_id == material_id).first()
+# 库存变化事件 (推送给 GET /inventory-balances/stream 的订阅者)，携带变化后的数量和预警状态；current_quantity 为 None 表示物资已删除
+def balance_event(material_id: int, current_quantity: int | None, min_stock_level: int | None) -> dict:
+    return {
+        "material_id": material_id,
+        "current_quantity": current_quantity,
+        "min_stock_level": min_stock_level,
+        "is_alert": current_quantity is not None and is_stock_alert(current_quantity, min_stock_level),
+        "deleted": current_quantity is None,
+    }
+
+# 事务提交后推送库存变化：changes 为 (物资ID, 变化后数量, 最低库存阈值)
+def publish_balance_changes(changes) -> None:
+    balance_broker.publish(balance_event(*change) for change in changes)
+
+# 写操作提交后的通知：推送库存变化，并使仪表盘缓存失效
+# 此时数据已经提交，通知失败 (例如 Redis 不可用) 只记录日志，不能让请求返回错误 (客户端重试会重复记账)，仪表盘缓存由 TTL 兜底
+async def notify_balance_changes(changes) -> None:
+    try:
+        publish_balance_changes(changes)
+    except Exception:
+        logger.exception("推送库存变化失败")
+    try:
+        await invalidate_dashboard_summary()
+    except Exception:
+        logger.exception("使仪表盘缓存失效失败")
+
+# 根据物资ID获取库存余額 (连同关联物资一起加载，供响应直接序列化)
+async def get_inventory_balance_by_material_id(db: AsyncSession, material_id: int) -> InventoryBalanceModel | None:
+    return await db.scalar(
+        select(InventoryBalanceModel)
+        .options(joinedload(InventoryBalanceModel.material))
+        .where(InventoryBalanceModel.material_id == material_id)
+    )
+
+# 只查询 (库存余額版本号, 物资版本号) (条件 GET 用，响应中嵌套了物资信息)，记录不存在时返回 None
+async def get_inventory_balance_versions(db: AsyncSession, material_id: int) -> tuple[int, int] | None:
+    row = (await db.execute(
+        select(InventoryBalanceModel.version, MaterialModel.version)
+        .join(MaterialModel, MaterialModel.id == InventoryBalanceModel.material_id)
+        .where(InventoryBalanceModel.material_id == material_id)
+    )).first()
+    return tuple(row) if row else None
 
 # 创建库存余額 (通常在创建物资时调用)
-def create_inventory_balance(db: Session, inventory_balance: InventoryBalanceCreate) -> InventoryBalanceModel:
+# 只加入会话并 flush，不提交事务：由调用方在整个业务操作结束时统一 commit
+async def create_inventory_balance(db: AsyncSession, inventory_balance: InventoryBalanceCreate) -> InventoryBalanceModel:
     # 检查该物资是否已存在库存记录
-    existing_balance = get_inventory_balance_by_material_id(db, material_id=inventory_balance.material_id)
+    existing_balance = await get_inventory_balance_by_material_id(db, material_id=inventory_balance.material_id)
     if existing_balance:
         raise HTTPException(
             status_code=status.HTTP_409_CONFLICT,
@@ -22,66 +75,133 @@ def create_inventory_balance(db: Session, inventory_balance: InventoryBalanceCre
     db_inventory_balance = InventoryBalanceModel(**inventory_balance.model_dump())
     db.add(db_inventory_balance)
     try:
-        db.commit()
-        db.refresh(db_inventory_balance)
+        await db.flush()
     except IntegrityError: # 捕获可能的数据库层面完整性错误 (例如外键约束失败)
-        db.rollback()
+        await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=f"无法为物资ID {inventory_balance.material_id} 创建库存记录，请检查物资是否存在。"
         )
+    await sync_stock_alerts(db, [(db_inventory_balance.material_id, db_inventory_balance.current_quantity, db_inventory_balance.min_stock_level, False)])
+    await apply_inventory_summary_delta(
+        db,
+        balances_changed=True,
+        stock_quantity=db_inventory_balance.current_quantity,
+        stock_alerts=int(is_stock_alert(db_inventory_balance.current_quantity, db_inventory_balance.min_stock_level))
+    )
     return db_inventory_balance
 
 # 更新库存余額 (核心操作，由入库/出库逻辑调用，或手动调整)
-def update_inventory_balance_quantity(
-    db: Session,
+# 使用单条条件 UPDATE 原子地完成 "检查 + 扣减"，避免先读后写在并发出库时超卖：
+#   UPDATE inventory_balance SET current_quantity = current_quantity + :d
+#   WHERE material_id = :m AND current_quantity + :d >= 0
+# 通过 rowcount 判断是否成功，失败时再查询一次以区分 "记录不存在" 和 "库存不足"
+# 本函数不提交事务，由入库/出库等调用方统一 commit
+async def update_inventory_balance_quantity(
+    db: AsyncSession,
     material_id: int,
     quantity_change: int, # 正数表示增加 (入库)，负数表示减少 (出库)
     is_adjustment: bool = False # 标记是否为手动调整，手动调整时不检查出库库存
 ) -> InventoryBalanceModel:
-    db_inventory_balance = get_inventory_balance_by_material_id(db, material_id=material_id)
-    if not db_inventory_balance:
-        # 如果物资没有库存记录 (理论上不应发生，因为创建物资时应初始化库存)
-        # 可以选择在这里自动创建一条，或者抛出错误
-        # 为了简化，这里假设物资创建时已确保有库存记录
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"物资ID {material_id} 的库存记录未找到，无法更新数量。"
-        )
+    stmt = (
+        update(InventoryBalanceModel)
+        .where(InventoryBalanceModel.material_id == material_id)
+        .values(current_quantity=InventoryBalanceModel.current_quantity + quantity_change)
+        .execution_options(synchronize_session=False)
+    )
+    if not is_adjustment and quantity_change < 0: # 如果是出库操作，库存检查放进 WHERE 条件
+        stmt = stmt.where(InventoryBalanceModel.current_quantity + quantity_change >= 0)
 
-    if not is_adjustment and quantity_change < 0: # 如果是出库操作
-        if db_inventory_balance.current_quantity + quantity_change < 0:
+    result = await db.execute(stmt)
+    if result.rowcount == 0:
+        db_inventory_balance = await get_inventory_balance_by_material_id(db, material_id=material_id)
+        if not db_inventory_balance:
+            # 如果物资没有库存记录 (理论上不应发生，因为创建物资时应初始化库存)
             raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"物资ID {material_id} 库存不足。当前库存: {db_inventory_balance.current_quantity}, 需出库: {-quantity_change}"
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"物资ID {material_id} 的库存记录未找到，无法更新数量。"
             )
-    
-    db_inventory_balance.current_quantity += quantity_change
-    db.add(db_inventory_balance) # SQLAlchemy 会识别为更新
-    db.commit()
-    db.refresh(db_inventory_balance)
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"物资ID {material_id} 库存不足。当前库存: {db_inventory_balance.current_quantity}, 需出库: {-quantity_change}"
+        )
+
+    # UPDATE 没有同步会话中的对象，重新加载以返回最新数值
+    db_inventory_balance = (await db.execute(
+        select(InventoryBalanceModel)
+        .where(InventoryBalanceModel.material_id == material_id)
+        .execution_options(populate_existing=True)
+    )).scalar_one()
+
+    # 在同一事务中更新预警集合和库存汇总：变更前的数量 = 变更后的数量 - 本次变化量
+    after_quantity = db_inventory_balance.current_quantity
+    await sync_stock_alerts(db, [(
+        material_id, after_quantity, db_inventory_balance.min_stock_level,
+        is_stock_alert(after_quantity - quantity_change, db_inventory_balance.min_stock_level)
+    )])
+    await apply_inventory_summary_delta(
+        db,
+        balances_changed=True,
+        stock_quantity=quantity_change,
+        stock_alerts=stock_alert_delta(
+            after_quantity - quantity_change, db_inventory_balance.min_stock_level,
+            after_quantity, db_inventory_balance.min_stock_level
+        )
+    )
     return db_inventory_balance
 
 # 管理员手动更新库存余額的详细信息 (不仅仅是数量)
-def update_inventory_balance_details(db: Session, material_id: int, inventory_update: InventoryBalanceUpdate) -> InventoryBalanceModel | None:
-    db_inventory_balance = get_inventory_balance_by_material_id(db, material_id=material_id)
+async def update_inventory_balance_details(db: AsyncSession, material_id: int, inventory_update: InventoryBalanceUpdate) -> InventoryBalanceModel | None:
+    db_inventory_balance = await get_inventory_balance_by_material_id(db, material_id=material_id)
     if not db_inventory_balance:
         return None
 
+    before_quantity, before_min = db_inventory_balance.current_quantity, db_inventory_balance.min_stock_level
     update_data = inventory_update.model_dump(exclude_unset=True)
     for key, value in update_data.items():
         setattr(db_inventory_balance, key, value)
     
     db.add(db_inventory_balance)
-    db.commit()
-    db.refresh(db_inventory_balance)
+    await db.flush()
+    await sync_stock_alerts(db, [(
+        material_id, db_inventory_balance.current_quantity, db_inventory_balance.min_stock_level,
+        is_stock_alert(before_quantity, before_min)
+    )])
+    await apply_inventory_summary_delta(
+        db,
+        balances_changed=True,
+        stock_quantity=db_inventory_balance.current_quantity - before_quantity,
+        stock_alerts=stock_alert_delta(
+            before_quantity, before_min,
+            db_inventory_balance.current_quantity, db_inventory_balance.min_stock_level
+        )
+    )
+    await db.commit() # eager_defaults 会在 flush 时取回 last_updated_at，无需再 refresh
+    await notify_balance_changes([(material_id, db_inventory_balance.current_quantity, db_inventory_balance.min_stock_level)]) # 数量或最低库存变化会影响库存总量和预警数量
     return db_inventory_balance
 
 
+# 库存变化推送的初始快照：全部物资的 (物资ID, 当前数量, 最低库存阈值)，按物资ID排序
+# 返回查询语句而不执行，由调用方通过服务端游标流式读取
+def build_balance_stream_snapshot_query() -> Select:
+    return select(
+        InventoryBalanceModel.material_id,
+        InventoryBalanceModel.current_quantity,
+        InventoryBalanceModel.min_stock_level,
+    ).order_by(InventoryBalanceModel.material_id)
+
 # 获取库存余額列表 (可分页)
-def get_inventory_balances(db: Session, skip: int = 0, limit: int = 100) -> list[InventoryBalanceModel]:
-    return db.query(InventoryBalanceModel).offset(skip).limit(limit).all()
+# include_material=True 时用 JOIN 一次性加载关联物资，避免序列化时逐行懒加载 (N+1 查询)
+async def get_inventory_balances(db: AsyncSession, skip: int = 0, limit: int = 100, include_material: bool = True) -> list[InventoryBalanceModel]:
+    result = await db.scalars(
+        select(InventoryBalanceModel)
+        .options(material_loader(include_material, InventoryBalanceModel.material))
+        .order_by(InventoryBalanceModel.id)
+        .offset(skip)
+        .limit(limit)
+    )
+    return result.all()
 
 # (可选) 根据ID获取库存余額记录 (虽然通常按 material_id 查询)
-def get_inventory_balance_by_id(db: Session, balance_id: int) -> InventoryBalanceModel | None:
-    return db.query(InventoryBalanceModel).filter(InventoryBalanceModel.id == balance_id).first()
\ No newline at end of file
+async def get_inventory_balance_by_id(db: AsyncSession, balance_id: int) -> InventoryBalanceModel | None:
+    return await db.scalar(select(InventoryBalanceModel).where(InventoryBalanceModel.id == balance_id))
\ No newline at end of file
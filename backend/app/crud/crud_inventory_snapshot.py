@@ -0,0 +1,116 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy import DateTime, Select, Table, func, insert, literal, select, union_all
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.inventory_balance import InventoryBalance as InventoryBalanceModel
+from app.models.inventory_snapshot import InventorySnapshot as InventorySnapshotModel
+from app.crud.crud_ledger_archive import LEDGERS, get_archive_months, ledger_archive_table, ledger_time_column
+
+# 快照时间点取 "当前时间 - 该秒数"：出入库时间在事务开始时确定、提交稍晚，
+# 早于快照时间点的流水在取快照时必须都已提交，快照才能与流水对齐
+SNAPSHOT_GRACE_SECONDS = 60
+
+# 某段时间内各物资的出入库流水净变化量 (入库 - 出库) 的查询，时间范围为 (since, until]，since 为 None 表示从头开始
+# sources: 每类流水需要合并的表 (按月归档表 + 流水表)，默认只查流水表；每张表一条按物资分组的查询
+def _ledger_delta_queries(material_ids, since: datetime | None, until: datetime | None, sources: dict[str, list[Table]] | None = None) -> list[Select]:
+    queries = []
+    for ledger, sign in (("inbound", 1), ("outbound", -1)):
+        for source in (sources or {}).get(ledger) or [LEDGERS[ledger][0].__table__]:
+            time_column = ledger_time_column(ledger, source)
+            query = select(source.c.material_id, (sign * func.sum(source.c.quantity)).label("delta")).group_by(source.c.material_id)
+            if material_ids is not None:
+                query = query.where(source.c.material_id.in_(material_ids))
+            if since is not None:
+                query = query.where(time_column > since)
+            if until is not None:
+                query = query.where(time_column <= until)
+            queries.append(query)
+    return queries
+
+# 时间范围早于归档线时一并合并与之有交集的按月归档表
+async def _ledger_delta(db: AsyncSession, material_ids: list[int], since: datetime | None, until: datetime) -> dict[int, int]:
+    sources = {
+        ledger: [ledger_archive_table(ledger, month) for month in months] + [LEDGERS[ledger][0].__table__]
+        for ledger, months in (await get_archive_months(db, since, until)).items()
+    }
+    totals: dict[int, int] = {}
+    for material_id, delta in (await db.execute(union_all(*_ledger_delta_queries(material_ids, since, until, sources)))).all(): # 合并为一次查询
+        totals[material_id] = totals.get(material_id, 0) + int(delta)
+    return totals
+
+# 取一次库存快照并提交，返回 (快照时间点, 物资数)
+# 快照数量 = 当前库存 - 快照时间点之后的流水净变化量，用一条 INSERT ... SELECT 完成，库存与流水读取的是同一时刻的数据
+# min_interval: 最近一次快照距今不足该秒数时跳过并返回 None (多 worker 同时运行定时任务时只有一个进程真正写入)
+async def take_inventory_snapshot(db: AsyncSession, min_interval: float | None = None) -> tuple[datetime, int] | None:
+    now = await db.scalar(select(func.now()))
+    snapshot_time = now - timedelta(seconds=SNAPSHOT_GRACE_SECONDS)
+    if min_interval:
+        latest = await db.scalar(select(func.max(InventorySnapshotModel.snapshot_time)))
+        if latest is not None and latest > snapshot_time - timedelta(seconds=min_interval):
+            return None
+
+    # 快照时间点只比当前时间早几十秒，之后的流水都还在流水表中，无需合并归档表
+    inbound_after, outbound_after = (query.subquery() for query in _ledger_delta_queries(None, snapshot_time, None))
+    source = (
+        select(
+            literal(snapshot_time, DateTime(timezone=True)),
+            InventoryBalanceModel.material_id,
+            InventoryBalanceModel.current_quantity - func.coalesce(inbound_after.c.delta, 0) - func.coalesce(outbound_after.c.delta, 0)
+        )
+        .outerjoin(inbound_after, inbound_after.c.material_id == InventoryBalanceModel.material_id)
+        .outerjoin(outbound_after, outbound_after.c.material_id == InventoryBalanceModel.material_id)
+    )
+    try:
+        result = await db.execute(
+            insert(InventorySnapshotModel).from_select(["snapshot_time", "material_id", "quantity"], source)
+        )
+        await db.commit()
+    except IntegrityError: # 其他进程在同一时刻取了快照
+        await db.rollback()
+        return None
+    return snapshot_time, result.rowcount
+
+# 不晚于 ts 的最近一次快照时间点，没有快照时返回 None
+async def _nearest_snapshot_time(db: AsyncSession, ts: datetime) -> datetime | None:
+    return await db.scalar(
+        select(func.max(InventorySnapshotModel.snapshot_time)).where(InventorySnapshotModel.snapshot_time <= ts)
+    )
+
+# 批量计算一组物资在 ts 时点的库存：最近一次快照的数量 + 快照之后到 ts 的流水净变化量
+# 没有快照时从零开始累加全部流水；快照之后新建的物资在快照中没有记录，同样从零开始
+# 注意：管理员直接修改库存数量不产生流水，这类调整要到下一次快照才会反映在历史时点库存中
+async def _stocks_as_of(db: AsyncSession, material_ids: list[int], ts: datetime) -> list[dict]:
+    if not material_ids:
+        return []
+    snapshot_time = await _nearest_snapshot_time(db, ts)
+    baseline: dict[int, int] = {}
+    if snapshot_time is not None:
+        baseline = dict((await db.execute(
+            select(InventorySnapshotModel.material_id, InventorySnapshotModel.quantity)
+            .where(InventorySnapshotModel.snapshot_time == snapshot_time, InventorySnapshotModel.material_id.in_(material_ids))
+        )).all())
+    delta = await _ledger_delta(db, material_ids, snapshot_time, ts)
+    return [
+        {
+            "material_id": material_id,
+            "as_of": ts,
+            "quantity": baseline.get(material_id, 0) + delta.get(material_id, 0),
+            "snapshot_time": snapshot_time,
+        }
+        for material_id in material_ids
+    ]
+
+# 指定物资在 ts 时点的库存，物资没有库存记录时返回 None
+async def get_stock_as_of(db: AsyncSession, material_id: int, ts: datetime) -> dict | None:
+    exists = await db.scalar(select(InventoryBalanceModel.id).where(InventoryBalanceModel.material_id == material_id))
+    if exists is None:
+        return None
+    return (await _stocks_as_of(db, [material_id], ts))[0]
+
+# 全部物资在 ts 时点的库存 (按物资ID分页)
+async def get_stocks_as_of(db: AsyncSession, ts: datetime, skip: int = 0, limit: int = 100) -> list[dict]:
+    material_ids = (await db.scalars(
+        select(InventoryBalanceModel.material_id).order_by(InventoryBalanceModel.material_id).offset(skip).limit(limit)
+    )).all()
+    return await _stocks_as_of(db, list(material_ids), ts)
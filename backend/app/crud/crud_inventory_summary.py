@@ -0,0 +1,104 @@
+from sqlalchemy import func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.material import Material as MaterialModel
+from app.models.inventory_balance import InventoryBalance as InventoryBalanceModel
+from app.models.inventory_summary import InventorySummary as InventorySummaryModel
+
+SUMMARY_ID = 1 # 汇总表只有这一行
+
+# 判断一条库存余額是否处于预警状态 (与 SQL 中 current_quantity < min_stock_level AND min_stock_level > 0 一致)
+def is_stock_alert(quantity: int, min_stock_level: int | None) -> bool:
+    return min_stock_level is not None and min_stock_level > 0 and quantity < min_stock_level
+
+# 库存余額从 (before_quantity, before_min) 变为 (after_quantity, after_min) 时预警数量的变化: -1 / 0 / +1
+def stock_alert_delta(before_quantity: int, before_min: int | None, after_quantity: int, after_min: int | None) -> int:
+    return int(is_stock_alert(after_quantity, after_min)) - int(is_stock_alert(before_quantity, before_min))
+
+# 全表扫描计算汇总数据 (仅用于重建或汇总行缺失时)
+async def compute_inventory_summary(db: AsyncSession) -> dict:
+    material_types_count = await db.scalar(select(func.count(MaterialModel.id))) or 0
+    total_stock_quantity = await db.scalar(select(func.sum(InventoryBalanceModel.current_quantity))) or 0
+    stock_alert_count = await db.scalar(select(func.count()).select_from(InventoryBalanceModel).where(
+        InventoryBalanceModel.current_quantity < InventoryBalanceModel.min_stock_level,
+        InventoryBalanceModel.min_stock_level > 0
+    )) or 0
+    return {
+        "material_types_count": material_types_count,
+        "total_stock_quantity": total_stock_quantity,
+        "stock_alert_count": stock_alert_count,
+    }
+
+# 按全表数据写入汇总行 (不存在则插入)，不提交事务
+async def _write_inventory_summary(db: AsyncSession) -> InventorySummaryModel:
+    # 先锁住汇总行：正在进行的写操作在更新汇总行时会等待本事务提交，之后再在重建结果上累加自己的增量
+    db_summary = await db.scalar(
+        select(InventorySummaryModel)
+        .where(InventorySummaryModel.id == SUMMARY_ID)
+        .with_for_update()
+        .execution_options(populate_existing=True)
+    )
+    await db.flush()
+    data = await compute_inventory_summary(db)
+    if db_summary is None:
+        db_summary = InventorySummaryModel(id=SUMMARY_ID, materials_version=1, balances_version=1, **data)
+        db.add(db_summary)
+    else:
+        for key, value in data.items():
+            setattr(db_summary, key, value)
+        # 重建通常是因为数据被绕过 API 修改过，同时让列表接口的 ETag 失效
+        db_summary.materials_version += 1
+        db_summary.balances_version += 1
+    await db.flush()
+    return db_summary
+
+# 在调用方的事务中累加汇总数据的增量，不提交事务
+# 各写操作先更新库存余額行、最后更新汇总行，加锁顺序一致
+# materials_changed / balances_changed：本次操作修改了物资 / 库存余額，将对应的集合版本号加 1 (列表接口的 ETag)
+async def apply_inventory_summary_delta(
+    db: AsyncSession,
+    material_types: int = 0,
+    stock_quantity: int = 0,
+    stock_alerts: int = 0,
+    materials_changed: bool = False,
+    balances_changed: bool = False
+) -> None:
+    if not (material_types or stock_quantity or stock_alerts or materials_changed or balances_changed):
+        return
+    result = await db.execute(
+        update(InventorySummaryModel)
+        .where(InventorySummaryModel.id == SUMMARY_ID)
+        .values(
+            material_types_count=InventorySummaryModel.material_types_count + material_types,
+            total_stock_quantity=InventorySummaryModel.total_stock_quantity + stock_quantity,
+            stock_alert_count=InventorySummaryModel.stock_alert_count + stock_alerts,
+            materials_version=InventorySummaryModel.materials_version + int(materials_changed),
+            balances_version=InventorySummaryModel.balances_version + int(balances_changed),
+        )
+        .execution_options(synchronize_session=False)
+    )
+    if result.rowcount == 0: # 汇总行尚不存在：按当前事务中的数据 (已包含本次变更) 完整计算一次
+        await _write_inventory_summary(db)
+
+# 读取汇总行 (按主键)
+async def get_inventory_summary(db: AsyncSession) -> InventorySummaryModel | None:
+    return await db.get(InventorySummaryModel, SUMMARY_ID, populate_existing=True)
+
+# 读取集合版本号 (物资版本, 库存余額版本)，只查询两列；汇总行不存在时返回 None
+# 写操作在同一事务中更新数据和版本号，读取列表前先读版本号，生成的 ETag 不会比响应内容更新
+async def get_collection_versions(db: AsyncSession) -> tuple[int, int] | None:
+    row = (await db.execute(
+        select(InventorySummaryModel.materials_version, InventorySummaryModel.balances_version)
+        .where(InventorySummaryModel.id == SUMMARY_ID)
+    )).first()
+    return (row.materials_version, row.balances_version) if row else None
+
+# 从头重新计算汇总数据并提交，用于数据修复 (python -m app.cli rebuild-inventory-summary)
+async def rebuild_inventory_summary(db: AsyncSession) -> InventorySummaryModel:
+    db_summary = await _write_inventory_summary(db)
+    await db.commit()
+    return db_summary
+
+# 应用启动时调用：汇总行不存在 (新库或从旧版本升级) 时补建
+async def ensure_inventory_summary(db: AsyncSession) -> None:
+    if await get_inventory_summary(db) is None:
+        await rebuild_inventory_summary(db)
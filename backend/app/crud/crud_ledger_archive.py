@@ -0,0 +1,155 @@
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from typing import Callable, Literal
+
+from pydantic import BaseModel
+from sqlalchemy import Select, Table, delete, func, insert, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm.attributes import set_committed_value
+from app.models.ledger_archive import LedgerArchive as LedgerArchiveModel, archive_table
+from app.models.inbound_record import InboundRecord as InboundRecordModel
+from app.models.outbound_record import OutboundRecord as OutboundRecordModel
+from app.models.material import Material as MaterialModel
+from app.crud.loaders import response_row_dicts, select_response_rows
+
+Ledger = Literal["inbound", "outbound"]
+
+# 流水类型 -> (模型, 时间列名)
+LEDGERS = {
+    "inbound": (InboundRecordModel, "inbound_time"),
+    "outbound": (OutboundRecordModel, "outbound_time"),
+}
+
+ARCHIVE_CHUNK_SIZE = 5000 # 每个事务搬移的行数
+
+# 对流水表或归档表 source 追加过滤条件，(query, source) -> query
+LedgerFilter = Callable[[Select, Table], Select]
+
+def month_start(value: datetime | date) -> date:
+    return date(value.year, value.month, 1)
+
+# 某类流水在 source 表 (流水表本身或归档表) 上的时间列
+def ledger_time_column(ledger: Ledger, source: Table | None = None):
+    model, time_name = LEDGERS[ledger]
+    return (source if source is not None else model.__table__).c[time_name]
+
+def ledger_archive_table(ledger: Ledger, month: date) -> Table:
+    model, time_name = LEDGERS[ledger]
+    return archive_table(model.__table__, time_name, month)
+
+# 与时间范围 [start_time, end_time] 有交集的归档月份 (按流水类型分组，按月份升序)
+# 归档只搬移整月且总是从最早的流水开始，归档表中的每一行都早于流水表中剩余的任何一行
+async def get_archive_months(db: AsyncSession, start_time: datetime | None = None, end_time: datetime | None = None) -> dict[str, list[date]]:
+    query = select(LedgerArchiveModel.ledger, LedgerArchiveModel.month).order_by(LedgerArchiveModel.month)
+    if start_time is not None:
+        query = query.where(LedgerArchiveModel.month >= month_start(start_time))
+    if end_time is not None:
+        query = query.where(LedgerArchiveModel.month <= end_time.date())
+    months: dict[str, list[date]] = defaultdict(list)
+    for ledger, month in (await db.execute(query)).all():
+        months[ledger].append(month)
+    return months
+
+# 建归档表并登记，单独提交：查询方看到登记后才会开始搬移这个月的数据，因此不会漏掉已搬走的行
+async def _ensure_archive_month(db: AsyncSession, ledger: Ledger, month: date) -> None:
+    table = ledger_archive_table(ledger, month)
+    await db.run_sync(lambda session: table.create(session.connection(), checkfirst=True))
+    if await db.get(LedgerArchiveModel, (ledger, month)) is None:
+        db.add(LedgerArchiveModel(ledger=ledger, month=month, table_name=table.name, row_count=0))
+    await db.commit()
+
+# 把 before 之前的流水按 (时间, id) 升序分批搬移到按月归档表，每批一个事务 (写入归档表 + 从流水表删除)，返回搬移的行数
+async def archive_ledger(db: AsyncSession, ledger: Ledger, before: datetime, chunk_size: int = ARCHIVE_CHUNK_SIZE) -> int:
+    model, time_name = LEDGERS[ledger]
+    live = model.__table__
+    time_column = live.c[time_name]
+    registered = set((await get_archive_months(db)).get(ledger, []))
+    moved = 0
+    while True:
+        rows = (await db.execute(
+            select(live).where(time_column < before).order_by(time_column, live.c.id).limit(chunk_size)
+        )).mappings().all()
+        if not rows:
+            break
+        by_month: dict[date, list[dict]] = defaultdict(list)
+        for row in rows:
+            by_month[month_start(row[time_name])].append(dict(row))
+        for month in sorted(by_month.keys() - registered):
+            await _ensure_archive_month(db, ledger, month)
+            registered.add(month)
+
+        for month, month_rows in sorted(by_month.items()):
+            await db.execute(insert(ledger_archive_table(ledger, month)), month_rows)
+            await db.execute(
+                update(LedgerArchiveModel)
+                .where(LedgerArchiveModel.ledger == ledger, LedgerArchiveModel.month == month)
+                .values(row_count=LedgerArchiveModel.row_count + len(month_rows))
+            )
+        await db.execute(delete(live).where(live.c.id.in_([row["id"] for row in rows])))
+        await db.commit()
+        moved += len(rows)
+    return moved
+
+# 归档早于 after_days 天前所在月份的全部出入库流水 (python -m app.cli archive-ledger)，返回每类流水搬移的行数
+async def archive_ledgers(db: AsyncSession, after_days: int, chunk_size: int = ARCHIVE_CHUNK_SIZE) -> dict[str, int]:
+    now = await db.scalar(select(func.now()))
+    cutoff = month_start(now - timedelta(days=after_days))
+    before = datetime(cutoff.year, cutoff.month, 1)
+    return {ledger: await archive_ledger(db, ledger, before, chunk_size) for ledger in LEDGERS}
+
+# 列表分页：流水表中的记录不足一页时，按时间倒序继续从归档表读取
+# 归档行都早于流水表中的行，因此结果等同于在 "流水表 + 归档表" 上按 (时间, id) 倒序分页
+# skip: 还需在归档部分跳过的行数；cursor: 只取 (时间, id) 小于该值的行 (键集分页游标，或流水表部分返回的最后一行)
+# 返回与流水表相同模型的临时对象 (不加入会话)，响应序列化方式与流水表记录一致；传入 row_schema 时按快速序列化路径返回字典
+async def read_archived_records(
+    db: AsyncSession,
+    ledger: Ledger,
+    filter_query: LedgerFilter,
+    start_time: datetime | None,
+    end_time: datetime | None,
+    limit: int,
+    skip: int = 0,
+    cursor: tuple[datetime, int] | None = None,
+    include_material: bool = True,
+    row_schema: type[BaseModel] | None = None
+) -> list:
+    model, _ = LEDGERS[ledger]
+    months = (await get_archive_months(db, start_time, end_time)).get(ledger, [])
+    rows = []
+    for month in reversed(months):
+        source = ledger_archive_table(ledger, month)
+        time_column = ledger_time_column(ledger, source)
+        query = filter_query(select_response_rows(source, row_schema, include_material) if row_schema else select(source), source)
+        if cursor is not None:
+            cursor_time, cursor_id = cursor
+            query = query.where(time_column <= cursor_time, or_(time_column < cursor_time, source.c.id < cursor_id))
+        batch = (await db.execute(
+            query.order_by(time_column.desc(), source.c.id.desc()).offset(skip).limit(limit - len(rows))
+        )).mappings().all()
+        if skip and not batch: # 本月符合条件的行数不足 skip，整月跳过
+            skip -= await db.scalar(select(func.count()).select_from(query.subquery()))
+            continue
+        skip = 0
+        rows.extend(batch)
+        if len(rows) >= limit:
+            break
+
+    if row_schema is not None: # 快速序列化路径：直接返回字典
+        return response_row_dicts(rows, row_schema, include_material)
+
+    records = [model(**row) for row in rows]
+    materials = {}
+    if include_material and records:
+        materials = {
+            material.id: material
+            for material in await db.scalars(select(MaterialModel).where(MaterialModel.id.in_({record.material_id for record in records})))
+        }
+    for record in records:
+        set_committed_value(record, "material", materials.get(record.material_id))
+    return records
+
+# 导出/统计等需要完整流水的查询：与时间范围有交集的归档表 (按月份升序) 加上流水表本身
+async def ledger_sources(db: AsyncSession, ledger: Ledger, start_time: datetime | None = None, end_time: datetime | None = None) -> list[Table]:
+    model, _ = LEDGERS[ledger]
+    months = (await get_archive_months(db, start_time, end_time)).get(ledger, [])
+    return [ledger_archive_table(ledger, month) for month in months] + [model.__table__]
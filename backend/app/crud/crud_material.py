@@ -1,60 +1,103 @@
-from sqlalchemy.orm import Session # 导入 SQLAlchemy 的会话类型
+from itertools import islice
+from typing import Iterable
+
+from pydantic import ValidationError
+from sqlalchemy import func, insert, select
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession # 导入 SQLAlchemy 的异步会话类型
 from app.models.material import Material as MaterialModel # 导入 SQLAlchemy 模型，并重命名以区分 Schema
-from app.schemas.material import MaterialCreate, MaterialUpdate # 导入 Pydantic Schema
+from app.models.inventory_balance import InventoryBalance as InventoryBalanceModel
+from app.schemas.material import MaterialCreate, MaterialUpdate, MaterialImportResult, MaterialImportRowError # 导入 Pydantic Schema
+from app.crud.crud_inventory_summary import apply_inventory_summary_delta, get_inventory_summary, is_stock_alert
+from app.crud.crud_stock_alert import delete_stock_alert
+from app.crud.crud_inventory_balance import notify_balance_changes
+from app.crud.crud_material_search import index_materials, reindex_material, unindex_material
+from app.core.suggest import material_suggest_index
 
 # 根据 ID 查询单个物资
-def get_material_by_id(db: Session, material_id: int) -> MaterialModel | None:
-    return db.query(MaterialModel).filter(MaterialModel.id == material_id).first()
+async def get_material_by_id(db: AsyncSession, material_id: int) -> MaterialModel | None:
+    return await db.scalar(select(MaterialModel).where(MaterialModel.id == material_id))
+
+# 只查询物资的行版本号 (条件 GET 用)，物资不存在时返回 None
+async def get_material_version(db: AsyncSession, material_id: int) -> int | None:
+    return await db.scalar(select(MaterialModel.version).where(MaterialModel.id == material_id))
 
 # 根据物资编码查询单个物资
-def get_material_by_code(db: Session, code: str) -> MaterialModel | None:
-    return db.query(MaterialModel).filter(MaterialModel.code == code).first()
+async def get_material_by_code(db: AsyncSession, code: str) -> MaterialModel | None:
+    return await db.scalar(select(MaterialModel).where(MaterialModel.code == code))
 
 # 查询物资列表 (支持分页)
-def get_materials(db: Session, skip: int = 0, limit: int = 100) -> list[MaterialModel]:
-    return db.query(MaterialModel).offset(skip).limit(limit).all()
+async def get_materials(db: AsyncSession, skip: int = 0, limit: int = 100) -> list[MaterialModel]:
+    return (await db.scalars(select(MaterialModel).offset(skip).limit(limit))).all()
+
+# 从 materials 表 (重新) 构建自动补全索引：应用启动时调用，多 worker 部署时也会定期调用
+async def load_material_suggest_index(db: AsyncSession) -> int:
+    result = await db.stream(
+        select(MaterialModel.id, MaterialModel.code, MaterialModel.name)
+        .where(MaterialModel.is_active.is_not(False))
+        .execution_options(yield_per=10000)
+    )
+    material_suggest_index.rebuild([tuple(row) async for row in result])
+    return len(material_suggest_index)
+
+# 物资总数：直接读取增量维护的库存汇总行 (按主键读一行)，不做 COUNT(*) 全表统计
+async def get_material_total(db: AsyncSession) -> int:
+    db_summary = await get_inventory_summary(db)
+    if db_summary is None:
+        return await count_materials(db)
+    return db_summary.material_types_count
 
 # 获取物资总数 (用于分页)
-def count_materials(db: Session) -> int:
-    return db.query(MaterialModel).count()
+async def count_materials(db: AsyncSession) -> int:
+    return await db.scalar(select(func.count(MaterialModel.id)))
 
 # 创建新物资
-def create_material(db: Session, material: MaterialCreate) -> MaterialModel:
+async def create_material(db: AsyncSession, material: MaterialCreate) -> MaterialModel:
     # 使用 Pydantic 模型的 model_dump() (V2) 或 dict() (V1) 方法将 Schema 对象转换为字典
     # 然后使用 ** 操作符解包字典，将其作为参数传递给 SQLAlchemy 模型构造函数
     db_material = MaterialModel(**material.model_dump())
-    db.add(db_material) # 将新创建的物资对象添加到会话中
-    db.commit() # 提交事务，将更改保存到数据库
-    db.refresh(db_material) #刷新会话中的 db_material 对象，以获取数据库生成的值 (如 ID, created_at)
-
-    # ---- 重要：创建物资后，初始化其库存余額记录 ----
-    from . import crud_inventory_balance # 导入库存余額的 CRUD 操作
-    from app.schemas.inventory_balance import InventoryBalanceCreate # 导入库存余額创建 Schema
-    initial_balance = InventoryBalanceCreate(material_id=db_material.id, current_quantity=0)
-    crud_inventory_balance.create_inventory_balance(db=db, inventory_balance=initial_balance)
+
+    # ---- 重要：创建物资的同时初始化其库存余額记录 ----
+    # 通过关系挂在物资对象上，一次 flush 按顺序插入物资和库存余額，整个操作只提交一次
+    db_material.inventory_balance = InventoryBalanceModel(current_quantity=0)
     # ---- End ----
+
+    db.add(db_material) # 将新创建的物资对象添加到会话中
+    await db.flush()
+    await index_materials(db, [(db_material.id, db_material.code, db_material.name)]) # 写入搜索索引
+    # 新物资的库存为 0、未设置最低库存，不影响库存总量和预警数量
+    await apply_inventory_summary_delta(db, material_types=1, materials_changed=True, balances_changed=True)
+    await db.commit() # 提交事务；ID、created_at 等数据库生成的值由 eager_defaults 在 flush 时取回
+    material_suggest_index.upsert(db_material.id, db_material.code, db_material.name, db_material.is_active) # 提交后更新自动补全索引
+    await notify_balance_changes([(db_material.id, 0, db_material.inventory_balance.min_stock_level)]) # 物资种类数发生变化
     return db_material
 
 # 更新现有物资信息
-def update_material(db: Session, material_id: int, material_update: MaterialUpdate) -> MaterialModel | None:
-    db_material = get_material_by_id(db, material_id) # 先根据 ID 查找物资
+async def update_material(db: AsyncSession, material_id: int, material_update: MaterialUpdate) -> MaterialModel | None:
+    db_material = await get_material_by_id(db, material_id) # 先根据 ID 查找物资
     if not db_material:
         return None # 如果物资不存在，返回 None
 
     # exclude_unset=True 表示只获取在 material_update 对象中被显式设置了值的字段
     # 这样可以避免将未提供的字段更新为 None
     update_data = material_update.model_dump(exclude_unset=True)
+    search_text_changed = any(key in update_data and update_data[key] != getattr(db_material, key) for key in ("code", "name"))
     for key, value in update_data.items():
         setattr(db_material, key, value) # 动态设置查找到的物资对象的属性值
+    if search_text_changed: # 编码或名称变化时重建该物资的搜索索引
+        await reindex_material(db, db_material.id, db_material.code, db_material.name)
 
     db.add(db_material) # 再次添加到会话 (如果对象已存在，SQLAlchemy 会识别为更新)
-    db.commit() # 提交事务
-    db.refresh(db_material) # 刷新对象
+    if update_data: # 物资列表的集合版本号加 1 (先 flush 物资行，汇总行仍最后更新)
+        await db.flush()
+        await apply_inventory_summary_delta(db, materials_changed=True)
+    await db.commit() # 提交事务
+    material_suggest_index.upsert(db_material.id, db_material.code, db_material.name, db_material.is_active)
     return db_material
 
 # 删除物资
-def delete_material(db: Session, material_id: int) -> MaterialModel | None:
-    db_material = get_material_by_id(db, material_id) # 先根据 ID 查找物资
+async def delete_material(db: AsyncSession, material_id: int) -> MaterialModel | None:
+    db_material = await get_material_by_id(db, material_id) # 先根据 ID 查找物资
     if not db_material:
         return None # 如果物资不存在，返回 None
 
@@ -67,6 +110,94 @@ def delete_material(db: Session, material_id: int) -> MaterialModel | None:
     #     raise ValueError("Cannot delete material with existing stock.") # 或者返回特定错误码
     # ---- End ----
 
-    db.delete(db_material) # 从会话中删除对象
-    db.commit() # 提交事务
-    return db_material # 返回被删除的物资对象 (此时它已不在数据库中)
\ No newline at end of file
+    db_balance = await db_material.awaitable_attrs.inventory_balance
+    await unindex_material(db, db_material.id) # 删除搜索索引
+    await db.delete(db_material) # 从会话中删除对象，库存余額记录通过 cascade 在同一事务中一并删除
+    await db.flush()
+    if db_balance and is_stock_alert(db_balance.current_quantity, db_balance.min_stock_level):
+        await delete_stock_alert(db, db_material.id) # 外键的 ON DELETE CASCADE 在 SQLite 上默认不生效，显式删除预警行
+    await apply_inventory_summary_delta(
+        db,
+        material_types=-1,
+        materials_changed=True,
+        balances_changed=True,
+        stock_quantity=-db_balance.current_quantity if db_balance else 0,
+        stock_alerts=-int(is_stock_alert(db_balance.current_quantity, db_balance.min_stock_level)) if db_balance else 0
+    )
+    await db.commit() # 提交事务
+    await notify_balance_changes([(db_material.id, None, None)]) # 物资种类数和库存总量可能发生变化
+    material_suggest_index.remove(db_material.id)
+    return db_material # 返回被删除的物资对象 (此时它已不在数据库中)
+
+IMPORT_CHUNK_SIZE = 1000 # 批量导入时每个事务写入的行数
+
+def _validation_message(e: ValidationError) -> str:
+    return "; ".join(f"{'.'.join(str(part) for part in error['loc'])}: {error['msg']}" for error in e.errors())
+
+# 批量导入物资 (CSV/Excel 导入、初始化新仓库时使用)
+# rows 为逐行解析出的 (行号, 字段字典)，按 chunk_size 分块处理，每块：
+# 1. 逐行校验字段，并检查文件内的编码重复
+# 2. 一次 IN 查询 (走 code 唯一索引) 找出数据库中已存在的编码
+# 3. executemany 批量插入物资，再按编码取回 ID，executemany 批量插入库存余額行和搜索索引
+# 4. 更新库存汇总后提交；某一块写入失败只回滚这一块，其余块不受影响
+async def import_materials(db: AsyncSession, rows: Iterable[tuple[int, dict]], chunk_size: int = IMPORT_CHUNK_SIZE) -> MaterialImportResult:
+    errors: list[MaterialImportRowError] = []
+    first_row_by_code: dict[str, int] = {} # 文件内已出现过的编码 -> 首次出现的行号
+    total_rows = created_count = 0
+
+    rows = iter(rows)
+    while chunk := list(islice(rows, chunk_size)):
+        total_rows += len(chunk)
+        valid: list[tuple[int, MaterialCreate]] = []
+        for row_no, data in chunk:
+            try:
+                material = MaterialCreate(**data)
+            except ValidationError as e:
+                errors.append(MaterialImportRowError(row=row_no, code=data.get("code"), message=_validation_message(e)))
+                continue
+            if material.code in first_row_by_code:
+                errors.append(MaterialImportRowError(row=row_no, code=material.code, message=f"文件中物资编码重复 (首次出现在第 {first_row_by_code[material.code]} 行)"))
+                continue
+            first_row_by_code[material.code] = row_no
+            valid.append((row_no, material))
+        if not valid:
+            continue
+
+        to_create = valid
+        try:
+            existing_codes = set((await db.scalars(
+                select(MaterialModel.code).where(MaterialModel.code.in_([material.code for _, material in valid]))
+            )).all())
+            to_create = []
+            for row_no, material in valid:
+                if material.code in existing_codes:
+                    errors.append(MaterialImportRowError(row=row_no, code=material.code, message=f"物资编码 '{material.code}' 已存在"))
+                else:
+                    to_create.append((row_no, material))
+            if not to_create:
+                continue
+
+            codes = [material.code for _, material in to_create]
+            await db.execute(insert(MaterialModel), [material.model_dump() for _, material in to_create])
+            material_ids = dict((await db.execute(select(MaterialModel.code, MaterialModel.id).where(MaterialModel.code.in_(codes)))).all())
+            await db.execute(
+                insert(InventoryBalanceModel),
+                [{"material_id": material_id, "current_quantity": 0, "min_stock_level": 0, "max_stock_level": 0} for material_id in material_ids.values()]
+            )
+            await index_materials(db, [(material_ids[material.code], material.code, material.name) for _, material in to_create])
+            await apply_inventory_summary_delta(db, material_types=len(to_create), materials_changed=True, balances_changed=True)
+            await db.commit()
+        except SQLAlchemyError as e_sql: # 例如导入期间其他请求创建了相同编码的物资
+            await db.rollback()
+            errors.extend(
+                MaterialImportRowError(row=row_no, code=material.code, message=f"写入数据库失败，本块未导入: {e_sql.__class__.__name__}")
+                for row_no, material in to_create
+            )
+            continue
+
+        created_count += len(to_create)
+        for _, material in to_create:
+            material_suggest_index.upsert(material_ids[material.code], material.code, material.name, material.is_active)
+        await notify_balance_changes((material_id, 0, 0) for material_id in material_ids.values())
+    errors.sort(key=lambda error: error.row)
+    return MaterialImportResult(total_rows=total_rows, created_count=created_count, error_count=len(errors), errors=errors)
@@ -0,0 +1,123 @@
+from typing import Iterable, Literal
+
+from sqlalchemy import ColumnElement, and_, case, delete, func, insert, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.material import Material as MaterialModel
+from app.models.material_search_gram import MaterialSearchGram as MaterialSearchGramModel
+
+GRAM_SIZE = 4 # 四字符片段：编码、规格中大量数字组合时，三字符片段对应的物资仍然太多，四字符片段的倒排列表短得多
+MAX_QUERY_GRAMS = 3 # 查询时最多使用的片段数，剩余部分由 LIKE 核对保证准确
+END_MARK = "\x03" # 文本末尾补 GRAM_SIZE - 1 个结束符，使文本中每个更短的子串都是某个片段的前缀，1~3 个字符的查询也能走索引
+
+SearchField = Literal["code", "name"]
+_FIELD_KEYS: dict[SearchField, str] = {"code": "c", "name": "n"}
+
+
+def _normalize(text: str) -> str:
+    return text.lower()
+
+
+def text_grams(text: str | None) -> set[str]:
+    text = _normalize(text or "") + END_MARK * (GRAM_SIZE - 1)
+    return {text[i:i + GRAM_SIZE] for i in range(len(text) - GRAM_SIZE + 1)}
+
+
+# 查询词使用的片段：均匀选取最多 MAX_QUERY_GRAMS 个 (包含首尾)
+def _query_grams(term: str) -> list[str]:
+    term = _normalize(term)
+    grams = list(dict.fromkeys(term[i:i + GRAM_SIZE] for i in range(len(term) - GRAM_SIZE + 1)))
+    if len(grams) <= MAX_QUERY_GRAMS:
+        return grams
+    step = (len(grams) - 1) / (MAX_QUERY_GRAMS - 1)
+    return list(dict.fromkeys(grams[round(i * step)] for i in range(MAX_QUERY_GRAMS)))
+
+
+# 一种物资的全部搜索片段行 (迁移脚本回填时也使用)
+def gram_rows(material_id: int, code: str | None, name: str | None) -> list[dict]:
+    return [
+        {"field": field_key, "gram": gram, "material_id": material_id}
+        for field_key, text in (("c", code), ("n", name))
+        for gram in text_grams(text)
+    ]
+
+
+# 为一批物资写入搜索片段 (创建、导入时调用)，不提交事务
+# 每种物资有几十行片段，批量导入时行数是物资数的几十倍：直接对表执行 Core INSERT (executemany)，
+# 不经过 ORM 批量插入逐行整理参数的开销 (10 万种物资的导入中约占一半时间)
+async def index_materials(db: AsyncSession, materials: Iterable[tuple[int, str, str]]) -> None:
+    rows = [row for material_id, code, name in materials for row in gram_rows(material_id, code, name)]
+    if rows:
+        await db.execute(insert(MaterialSearchGramModel.__table__), rows)
+
+
+# 删除物资的搜索片段 (删除、修改编码或名称时调用)，不提交事务
+async def unindex_material(db: AsyncSession, material_id: int) -> None:
+    await db.execute(delete(MaterialSearchGramModel).where(MaterialSearchGramModel.material_id == material_id))
+
+
+# 物资编码或名称修改后重建它的搜索片段，不提交事务
+async def reindex_material(db: AsyncSession, material_id: int, code: str, name: str) -> None:
+    await unindex_material(db, material_id)
+    await index_materials(db, [(material_id, code, name)])
+
+
+# 子串搜索条件：在指定字段中包含 term (不区分大小写)
+# 先用倒排索引筛出候选物资，再用 LIKE 核对 (候选集很小，LIKE 不再是全表扫描)：
+# - 四个字符以上：候选物资须在同一字段中包含查询词的全部所选片段
+# - 一到三个字符：以查询词开头的片段，在主键上做范围扫描 (末尾补了结束符，文本中每个字符都是某个片段的开头)
+def material_search_condition(term: str, fields: Iterable[SearchField] = ("code", "name")) -> ColumnElement[bool]:
+    fields = list(fields)
+    columns = [getattr(MaterialModel, field) for field in fields]
+    field_condition = MaterialSearchGramModel.field.in_([_FIELD_KEYS[field] for field in fields])
+    if len(term) < GRAM_SIZE:
+        prefix = _normalize(term)
+        candidates = select(MaterialSearchGramModel.material_id).where(
+            field_condition,
+            MaterialSearchGramModel.gram >= prefix,
+            MaterialSearchGramModel.gram < prefix[:-1] + chr(ord(prefix[-1]) + 1)
+        )
+    else:
+        grams = _query_grams(term)
+        candidates = (
+            select(MaterialSearchGramModel.material_id)
+            .where(field_condition, MaterialSearchGramModel.gram.in_(grams))
+            .group_by(MaterialSearchGramModel.material_id, MaterialSearchGramModel.field)
+            .having(func.count() == len(grams))
+        )
+    return and_(
+        MaterialModel.id.in_(candidates),
+        or_(*(column.icontains(term, autoescape=True) for column in columns))
+    )
+
+
+# 相关度排序：编码完全匹配 > 编码前缀 > 名称完全匹配 > 名称前缀 > 编码包含 > 名称包含，同级按名称长度、ID 排序
+def material_search_order_by(term: str) -> list[ColumnElement]:
+    lowered = _normalize(term)
+    rank = case(
+        (func.lower(MaterialModel.code) == lowered, 0),
+        (MaterialModel.code.istartswith(term, autoescape=True), 1),
+        (func.lower(MaterialModel.name) == lowered, 2),
+        (MaterialModel.name.istartswith(term, autoescape=True), 3),
+        (MaterialModel.code.icontains(term, autoescape=True), 4),
+        else_=5
+    )
+    return [rank, func.length(MaterialModel.name), MaterialModel.id]
+
+
+# 从头重建搜索索引 (升级后回填，或数据被绕过 API 修改后修复)，按 ID 分块提交
+async def rebuild_material_search_index(db: AsyncSession, chunk_size: int = 5000) -> int:
+    await db.execute(delete(MaterialSearchGramModel))
+    await db.commit()
+    last_id, indexed = 0, 0
+    while True:
+        chunk = (await db.execute(
+            select(MaterialModel.id, MaterialModel.code, MaterialModel.name)
+            .where(MaterialModel.id > last_id)
+            .order_by(MaterialModel.id)
+            .limit(chunk_size)
+        )).all()
+        if not chunk:
+            return indexed
+        await index_materials(db, chunk)
+        await db.commit()
+        last_id, indexed = chunk[-1].id, indexed + len(chunk)
@@ -1,12 +1,25 @@
-from sqlalchemy.orm import Session
+import logging
+
+from sqlalchemy import Select, Table, func, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload
 from fastapi import HTTPException, status
+from app.crud.loaders import material_loader, response_row_dicts, select_response_rows
 from app.models.outbound_record import OutboundRecord as OutboundRecordModel
-from app.schemas.outbound_record import OutboundRecordCreate
-from app.crud.crud_inventory_balance import update_inventory_balance_quantity, get_inventory_balance_by_material_id
+from app.models.inventory_balance import InventoryBalance as InventoryBalanceModel
+from app.models.material import Material as MaterialModel
+from app.schemas.outbound_record import OutboundRecord as OutboundRecordSchema, OutboundRecordCreate, OutboundOrderCreate, OutboundOrderLineResult, OutboundOrderResult
+from app.crud.crud_inventory_balance import update_inventory_balance_quantity, get_inventory_balance_by_material_id, notify_balance_changes
+from app.crud.crud_inventory_summary import apply_inventory_summary_delta, is_stock_alert, stock_alert_delta
+from app.crud.crud_stock_alert import sync_stock_alerts
+from app.crud.crud_daily_movement import record_daily_movements
+from app.crud.crud_ledger_archive import ledger_sources, read_archived_records
 from datetime import datetime
 
+logger = logging.getLogger(__name__)
+
 # 创建出库记录，并更新库存余額 (先检查库存)
-def create_outbound_record(db: Session, outbound_record_data: OutboundRecordCreate) -> OutboundRecordModel:
+async def create_outbound_record(db: AsyncSession, outbound_record_data: OutboundRecordCreate) -> OutboundRecordModel:
     material_id = outbound_record_data.material_id
     quantity_to_outbound = outbound_record_data.quantity
 
@@ -26,38 +39,248 @@ def create_outbound_record(db: Session, outbound_record_data: OutboundRecordCrea
     # 3. 更新库存余額 (负数表示减少)
     # update_inventory_balance_quantity 内部会检查库存并抛出异常如果不足
     try:
-        update_inventory_balance_quantity(db=db, material_id=material_id, quantity_change=-quantity_to_outbound)
+        updated_inv = await update_inventory_balance_quantity(db=db, material_id=material_id, quantity_change=-quantity_to_outbound)
+
+        # 累加到每日出入库汇总 (flush 后才能取得数据库生成的出库时间)
+        await db.flush()
+        await record_daily_movements(db, "outbound", [(material_id, db_outbound_record.outbound_time, quantity_to_outbound)])
         
-        # 同样，这里的事务管理需要注意
-        db.commit() # 提交出库记录
-        db.refresh(db_outbound_record)
+        # 出库记录与库存扣减在同一事务中一次性提交
+        await db.commit()
     except HTTPException as e:
-        db.rollback() # 如果库存更新失败 (例如库存不足的异常)，回滚
+        await db.rollback() # 如果库存更新失败 (例如库存不足的异常)，回滚
         raise e
     except Exception as e_gen:
-        db.rollback()
+        await db.rollback()
+        logger.exception("创建出库记录时发生意外错误 (物资ID %s)", material_id)
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"创建出库记录时发生未知错误: {str(e_gen)}")
 
+    # 以下在提交之后执行，不在上面的回滚/500 处理范围内：出库已经生效，不能让客户端误以为失败而重试
+    await notify_balance_changes([(material_id, updated_inv.current_quantity, updated_inv.min_stock_level)])
+    await db_outbound_record.awaitable_attrs.material # 加载响应中的关联物资 (通常已在会话中，不会再查询)
     return db_outbound_record
 
-# 根据ID获取出库记录
-def get_outbound_record_by_id(db: Session, record_id: int) -> OutboundRecordModel | None:
-    return db.query(OutboundRecordModel).filter(OutboundRecordModel.id == record_id).first()
+# 多行出库单：所有明细在同一事务中完成，要么全部出库，要么全部不出库
+# 1. 按 material_id 升序对涉及的库存余額行加锁 (SELECT ... FOR UPDATE)，
+#    所有出库单都以相同顺序加锁，避免相互重叠的出库单产生死锁
+# 2. 按物资汇总出库量后检查库存是否充足，任一行不足或物资不存在则回滚并返回每行的结果
+# 3. 按相同顺序扣减库存 (仍带 current_quantity >= :q 条件，不支持行锁的数据库上也不会超卖)，批量写入出库记录，提交一次
+async def create_outbound_order(db: AsyncSession, order_data: OutboundOrderCreate) -> OutboundOrderResult:
+    totals: dict[int, int] = {}
+    for line in order_data.lines:
+        totals[line.material_id] = totals.get(line.material_id, 0) + line.quantity
+    material_ids = sorted(totals)
+
+    try:
+        balances = {
+            balance.material_id: balance
+            for balance in await db.scalars(
+                select(InventoryBalanceModel)
+                .where(InventoryBalanceModel.material_id.in_(material_ids))
+                .order_by(InventoryBalanceModel.material_id)
+                .with_for_update()
+                .execution_options(populate_existing=True)
+            )
+        }
+        available = {material_id: balance.current_quantity for material_id, balance in balances.items()}
+
+        failed = any(m not in available or available[m] < totals[m] for m in material_ids)
+        if not failed:
+            for material_id in material_ids:
+                result = await db.execute(
+                    update(InventoryBalanceModel)
+                    .where(
+                        InventoryBalanceModel.material_id == material_id,
+                        InventoryBalanceModel.current_quantity >= totals[material_id]
+                    )
+                    .values(current_quantity=InventoryBalanceModel.current_quantity - totals[material_id])
+                    .execution_options(synchronize_session=False)
+                )
+                if result.rowcount == 0: # 库存已被其他事务扣减 (数据库不支持行锁时可能发生)，按最新库存报告
+                    available[material_id] = await db.scalar(
+                        select(InventoryBalanceModel.current_quantity)
+                        .where(InventoryBalanceModel.material_id == material_id)
+                    )
+                    failed = True
+                    break
+
+        if failed:
+            await db.rollback()
+            lines = []
+            for line_no, line in enumerate(order_data.lines, start=1):
+                if line.material_id not in available:
+                    line_status = "not_found"
+                elif available[line.material_id] < totals[line.material_id]:
+                    line_status = "insufficient"
+                else:
+                    line_status = "ok"
+                lines.append(OutboundOrderLineResult(
+                    line_no=line_no,
+                    material_id=line.material_id,
+                    requested_quantity=line.quantity,
+                    available_quantity=available.get(line.material_id),
+                    status=line_status
+                ))
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=OutboundOrderResult(success=False, lines=lines).model_dump()
+            )
+
+        # 预警集合和库存汇总：整张出库单只更新一次汇总行 (变更前的数量即加锁时读到的数量)
+        await sync_stock_alerts(db, [
+            (
+                material_id, available[material_id] - totals[material_id], balances[material_id].min_stock_level,
+                is_stock_alert(available[material_id], balances[material_id].min_stock_level)
+            )
+            for material_id in material_ids
+        ])
+        await apply_inventory_summary_delta(
+            db,
+            balances_changed=True,
+            stock_quantity=-sum(totals.values()),
+            stock_alerts=sum(
+                stock_alert_delta(
+                    available[material_id], balances[material_id].min_stock_level,
+                    available[material_id] - totals[material_id], balances[material_id].min_stock_level
+                )
+                for material_id in material_ids
+            )
+        )
+
+        db_records = [OutboundRecordModel(**line.model_dump()) for line in order_data.lines]
+        db.add_all(db_records)
+        await db.flush()
+        await record_daily_movements(db, "outbound", [(record.material_id, record.outbound_time, record.quantity) for record in db_records])
+        await db.commit()
+    except HTTPException:
+        raise
+    except Exception as e_gen:
+        await db.rollback()
+        logger.exception("创建出库单时发生意外错误")
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"创建出库单时发生未知错误: {str(e_gen)}")
+
+    await notify_balance_changes([
+        (material_id, available[material_id] - totals[material_id], balances[material_id].min_stock_level)
+        for material_id in material_ids
+    ])
+    return OutboundOrderResult(
+        success=True,
+        lines=[
+            OutboundOrderLineResult(
+                line_no=line_no,
+                material_id=line.material_id,
+                requested_quantity=line.quantity,
+                available_quantity=available[line.material_id],
+                status="ok",
+                record_id=record.id
+            )
+            for line_no, (line, record) in enumerate(zip(order_data.lines, db_records), start=1)
+        ]
+    )
+
+# 根据ID获取出库记录 (连同关联物资一起加载)
+async def get_outbound_record_by_id(db: AsyncSession, record_id: int) -> OutboundRecordModel | None:
+    return await db.scalar(
+        select(OutboundRecordModel)
+        .options(joinedload(OutboundRecordModel.material))
+        .where(OutboundRecordModel.id == record_id)
+    )
+
+# 列表和导出共用的过滤条件；source 为流水表或结构相同的按月归档表
+def _filter_outbound_records(query: Select, material_id: int | None, start_time: datetime | None, end_time: datetime | None, source: Table = OutboundRecordModel.__table__) -> Select:
+    if material_id is not None:
+        query = query.where(source.c.material_id == material_id)
+    if start_time:
+        query = query.where(source.c.outbound_time >= start_time)
+    if end_time:
+        query = query.where(source.c.outbound_time <= end_time)
+    return query
 
 # 获取出库记录列表 (可分页、可按物资ID、时间范围等过滤)
-def get_outbound_records(
-    db: Session, 
+# include_material=True 时用 JOIN 一次性加载关联物资，避免序列化时逐行懒加载 (N+1 查询)
+# 按 (outbound_time, id) 倒序；传入 cursor (上一页最后一行的时间和 id) 时使用键集分页并忽略 skip
+# 已归档的记录 (见 crud_ledger_archive) 接在流水表记录之后返回，与未归档时的分页结果一致
+async def get_outbound_records(
+    db: AsyncSession, 
     skip: int = 0, 
     limit: int = 100, 
     material_id: int | None = None,
     start_time: datetime | None = None,
+    end_time: datetime | None = None,
+    cursor: tuple[datetime, int] | None = None,
+    include_material: bool = True,
+    as_rows: bool = False
+) -> list[OutboundRecordModel] | list[dict]:
+    if as_rows: # 快速序列化路径：只查询响应需要的列，返回字典
+        query = select_response_rows(OutboundRecordModel.__table__, OutboundRecordSchema, include_material)
+    else:
+        query = select(OutboundRecordModel).options(material_loader(include_material, OutboundRecordModel.material))
+    query = _filter_outbound_records(query, material_id, start_time, end_time)
+    query = query.order_by(OutboundRecordModel.outbound_time.desc(), OutboundRecordModel.id.desc())
+    if cursor is not None:
+        cursor_time, cursor_id = cursor
+        # 等价于 (outbound_time, id) < (cursor_time, cursor_id)；外层的 <= 条件可直接用于索引范围扫描
+        query = query.where(
+            OutboundRecordModel.outbound_time <= cursor_time,
+            or_(OutboundRecordModel.outbound_time < cursor_time, OutboundRecordModel.id < cursor_id)
+        )
+    else:
+        query = query.offset(skip)
+    if as_rows:
+        records = response_row_dicts((await db.execute(query.limit(limit))).mappings(), OutboundRecordSchema, include_material)
+    else:
+        records = list((await db.scalars(query.limit(limit))).all())
+
+    # 流水表中的记录不足一页：翻到了流水表末尾，继续从按月归档表中读取 (只在需要时才查询归档登记表)
+    if len(records) < limit:
+        archive_skip = 0
+        if records: # 归档行都早于流水表中的行，从本页最后一行之后接着读
+            last = records[-1]
+            cursor = (last["outbound_time"], last["id"]) if as_rows else (last.outbound_time, last.id)
+        elif cursor is None and skip:
+            live_count = await db.scalar(select(func.count()).select_from(
+                _filter_outbound_records(select(OutboundRecordModel.id), material_id, start_time, end_time).subquery()
+            ))
+            archive_skip = skip - live_count
+        records += await read_archived_records(
+            db, "outbound",
+            lambda archive_query, source: _filter_outbound_records(archive_query, material_id, start_time, end_time, source),
+            start_time, end_time,
+            limit=limit - len(records), skip=archive_skip, cursor=cursor, include_material=include_material,
+            row_schema=OutboundRecordSchema if as_rows else None
+        )
+    return records
+
+# 导出出库流水的查询：只选取导出需要的列 (含物资编码和名称)，按 (outbound_time, id) 正序
+# 返回查询语句而不执行，由调用方通过服务端游标流式读取；source 为流水表或结构相同的按月归档表
+def build_outbound_records_export_query(
+    material_id: int | None = None,
+    start_time: datetime | None = None,
+    end_time: datetime | None = None,
+    source: Table = OutboundRecordModel.__table__
+) -> Select:
+    query = select(
+        source.c.id,
+        source.c.outbound_order_number,
+        source.c.material_id,
+        MaterialModel.code.label("material_code"),
+        MaterialModel.name.label("material_name"),
+        source.c.quantity,
+        source.c.recipient,
+        source.c.outbound_time,
+        source.c.remarks,
+    ).join(MaterialModel, MaterialModel.id == source.c.material_id)
+    query = _filter_outbound_records(query, material_id, start_time, end_time, source)
+    return query.order_by(source.c.outbound_time, source.c.id)
+
+# 完整导出所需的全部查询：与时间范围有交集的归档表 (按月份升序) 在前，流水表在后，依次输出即为整体按时间正序
+async def build_outbound_records_export_queries(
+    db: AsyncSession,
+    material_id: int | None = None,
+    start_time: datetime | None = None,
     end_time: datetime | None = None
-) -> list[OutboundRecordModel]:
-    query = db.query(OutboundRecordModel)
-    if material_id is not None:
-        query = query.filter(OutboundRecordModel.material_id == material_id)
-    if start_time:
-        query = query.filter(OutboundRecordModel.outbound_time >= start_time)
-    if end_time:
-        query = query.filter(OutboundRecordModel.outbound_time <= end_time)
-    return query.order_by(OutboundRecordModel.outbound_time.desc()).offset(skip).limit(limit).all()
\ No newline at end of file
+) -> list[Select]:
+    return [
+        build_outbound_records_export_query(material_id, start_time, end_time, source)
+        for source in await ledger_sources(db, "outbound", start_time, end_time)
+    ]
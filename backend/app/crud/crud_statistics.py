@@ -1,27 +1,124 @@
 # app/crud/crud_statistics.py
-from sqlalchemy.orm import Session
-from sqlalchemy import func # 用于聚合函数如 count, sum
-from app.models.material import Material as MaterialModel # 导入物资模型
-from app.models.inventory_balance import InventoryBalance as InventoryBalanceModel # 导入库存余額模型
+from datetime import date, timedelta
+from typing import Literal
 
-def get_dashboard_summary_data(db: Session) -> dict:
-    # 1. 物资种类总数
-    material_types_count = db.query(func.count(MaterialModel.id)).scalar() or 0
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.daily_movement import DailyMovement as DailyMovementModel
+from app.crud.crud_inventory_summary import compute_inventory_summary, get_inventory_summary
+from app.core.cache import CacheStats, cache
+from app.core.config import settings
+from app.db.database import SessionLocal
+from app.db.pool_metrics import acquire_connection
 
-    # 2. 当前库存总量
-    total_stock_quantity_query = db.query(func.sum(InventoryBalanceModel.current_quantity)).scalar()
-    total_stock_quantity = total_stock_quantity_query if total_stock_quantity_query is not None else 0
+DASHBOARD_SUMMARY_CACHE_KEY = "statistics:dashboard-summary"
+dashboard_cache_stats = CacheStats() # 仪表盘缓存的命中/未命中/失效次数 (当前进程)
 
+# 仪表盘概要数据直接读取增量维护的汇总行 (按主键读一行)，不再扫描库存余額表
+async def get_dashboard_summary_data(db: AsyncSession) -> dict:
+    db_summary = await get_inventory_summary(db)
+    if db_summary is None: # 汇总行尚未建立 (正常情况下应用启动时会补建)，退回全表统计
+        return await compute_inventory_summary(db)
+    return {
+        "material_types_count": db_summary.material_types_count,
+        "total_stock_quantity": db_summary.total_stock_quantity,
+        "stock_alert_count": db_summary.stock_alert_count,
+    }
 
-    # 3. 库存预警数量
-    # (当 current_quantity < min_stock_level 且 min_stock_level > 0 时视为预警)
-    stock_alert_count = db.query(func.count(InventoryBalanceModel.id)).filter(
-        InventoryBalanceModel.current_quantity < InventoryBalanceModel.min_stock_level,
-        InventoryBalanceModel.min_stock_level > 0 # 确保最低库存设置了才有意义
-    ).scalar() or 0
 
-    return {
-        "material_types_count": material_types_count,
-        "total_stock_quantity": total_stock_quantity,
-        "stock_alert_count": stock_alert_count,
-    }
\ No newline at end of file
+# 带缓存的仪表盘概要数据：命中时不访问数据库
+async def get_cached_dashboard_summary() -> dict:
+    cached = await cache.get(DASHBOARD_SUMMARY_CACHE_KEY)
+    if cached is not None:
+        dashboard_cache_stats.hits += 1
+        return cached
+    dashboard_cache_stats.misses += 1
+    async with SessionLocal() as db: # 缓存未命中时才打开会话，命中时不占用连接池中的连接
+        await acquire_connection(db)
+        summary = await get_dashboard_summary_data(db)
+    await cache.set(DASHBOARD_SUMMARY_CACHE_KEY, summary, settings.DASHBOARD_CACHE_TTL)
+    return summary
+
+
+# 物资、入库、出库、库存余额的写操作提交后调用，使仪表盘缓存失效
+# 与写操作并发的读请求仍可能把提交前算出的旧值写回缓存，这种情况由 TTL 兜底
+async def invalidate_dashboard_summary() -> None:
+    dashboard_cache_stats.invalidations += 1
+    await cache.delete(DASHBOARD_SUMMARY_CACHE_KEY)
+
+
+MovementGranularity = Literal["day", "week", "month"]
+MAX_MOVEMENT_BUCKETS = 1000 # 一次统计最多返回的周期数 (按日约 2.7 年)，防止超长区间在请求中生成大量空周期
+
+# 日期所在统计周期的第一天：按周统计时以周一为一周的开始
+def movement_period_start(day: date, granularity: MovementGranularity) -> date:
+    if granularity == "week":
+        return day - timedelta(days=day.weekday())
+    if granularity == "month":
+        return day.replace(day=1)
+    return day
+
+def _next_period_start(period_start: date, granularity: MovementGranularity) -> date:
+    if granularity == "week":
+        return period_start + timedelta(days=7)
+    if granularity == "month":
+        return (period_start.replace(day=28) + timedelta(days=4)).replace(day=1)
+    return period_start + timedelta(days=1)
+
+# start 到 end (含) 之间的统计周期数，不逐个生成周期
+def count_movement_buckets(start: date, end: date, granularity: MovementGranularity) -> int:
+    first, last = movement_period_start(start, granularity), movement_period_start(end, granularity)
+    if granularity == "month":
+        return (last.year - first.year) * 12 + last.month - first.month + 1
+    return (last - first).days // (7 if granularity == "week" else 1) + 1
+
+# 按日/周/月汇总出入库数量，数据来自每日汇总表 (daily_movements)，不扫描出入库流水
+# 同时给定 start 和 end 时，区间内没有出入库的周期也会以 0 返回，便于前端直接绘制趋势图
+async def get_movement_statistics(
+    db: AsyncSession,
+    granularity: MovementGranularity = "day",
+    material_id: int | None = None,
+    start: date | None = None,
+    end: date | None = None
+) -> list[dict]:
+    query = (
+        select(
+            DailyMovementModel.day,
+            func.sum(DailyMovementModel.inbound_quantity),
+            func.sum(DailyMovementModel.inbound_count),
+            func.sum(DailyMovementModel.outbound_quantity),
+            func.sum(DailyMovementModel.outbound_count),
+        )
+        .group_by(DailyMovementModel.day)
+        .order_by(DailyMovementModel.day)
+    )
+    if material_id is not None:
+        query = query.where(DailyMovementModel.material_id == material_id)
+    if start is not None:
+        query = query.where(DailyMovementModel.day >= start)
+    if end is not None:
+        query = query.where(DailyMovementModel.day <= end)
+
+    def empty_bucket(period_start: date) -> dict:
+        return {"period_start": period_start, "inbound_quantity": 0, "inbound_count": 0, "outbound_quantity": 0, "outbound_count": 0}
+
+    buckets: dict[date, dict] = {}
+    if start is not None and end is not None:
+        # 按周期数循环，不在最后一个周期之后再求下一周期 (end 接近 9999-12-31 时会溢出)
+        period_start = movement_period_start(start, granularity)
+        for index in range(count_movement_buckets(start, end, granularity)):
+            if index:
+                period_start = _next_period_start(period_start, granularity)
+            buckets[period_start] = empty_bucket(period_start)
+
+    for day, inbound_quantity, inbound_count, outbound_quantity, outbound_count in await db.execute(query):
+        period_start = movement_period_start(day, granularity)
+        bucket = buckets.setdefault(period_start, empty_bucket(period_start))
+        bucket["inbound_quantity"] += inbound_quantity or 0
+        bucket["inbound_count"] += inbound_count or 0
+        bucket["outbound_quantity"] += outbound_quantity or 0
+        bucket["outbound_count"] += outbound_count or 0
+
+    for bucket in buckets.values():
+        bucket["net_quantity"] = bucket["inbound_quantity"] - bucket["outbound_quantity"]
+    return [buckets[key] for key in sorted(buckets)]
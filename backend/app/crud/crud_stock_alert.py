@@ -0,0 +1,94 @@
+from typing import Iterable, Literal
+
+from sqlalchemy import delete, insert, select
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.crud.loaders import material_loader
+from app.crud.crud_inventory_summary import is_stock_alert
+from app.models.inventory_balance import InventoryBalance as InventoryBalanceModel
+from app.models.stock_alert import StockAlert as StockAlertModel
+
+# 在调用方的事务中同步库存预警集合，不提交事务
+# changes: (物资ID, 变更后数量, 变更后最低库存阈值, 变更前是否处于预警)；变更后处于预警的写入 (缺口可能变化)，
+# 变更前处于预警、变更后不再预警的删除。锁顺序：库存余額行 -> 预警行 -> 汇总行，调用方在更新汇总行之前调用
+async def sync_stock_alerts(db: AsyncSession, changes: Iterable[tuple[int, int, int | None, bool]]) -> None:
+    alerts, cleared = [], []
+    for material_id, quantity, min_stock_level, was_alert in sorted(changes): # 固定顺序写入，减少并发事务间的死锁
+        if is_stock_alert(quantity, min_stock_level):
+            alerts.append({
+                "material_id": material_id,
+                "current_quantity": quantity,
+                "min_stock_level": min_stock_level,
+                "shortage": min_stock_level - quantity,
+            })
+        elif was_alert:
+            cleared.append(material_id)
+
+    if cleared:
+        await db.execute(delete(StockAlertModel).where(StockAlertModel.material_id.in_(cleared)))
+    if alerts:
+        await _upsert_stock_alerts(db, alerts)
+
+# 删除物资时一并删除其预警行，不提交事务
+async def delete_stock_alert(db: AsyncSession, material_id: int) -> None:
+    await db.execute(delete(StockAlertModel).where(StockAlertModel.material_id == material_id))
+
+async def _upsert_stock_alerts(db: AsyncSession, alerts: list[dict]) -> None:
+    table = StockAlertModel.__table__
+    dialect = db.get_bind().dialect.name
+    if dialect == "mysql":
+        stmt = mysql_insert(table)
+        stmt = stmt.on_duplicate_key_update({
+            column: stmt.inserted[column] for column in ("current_quantity", "min_stock_level", "shortage")
+        })
+    elif dialect in ("sqlite", "postgresql"):
+        stmt = (sqlite_insert if dialect == "sqlite" else postgresql_insert)(table)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[table.c.material_id],
+            set_={column: stmt.excluded[column] for column in ("current_quantity", "min_stock_level", "shortage")}
+        )
+    else: # 不支持 upsert 的数据库：先删除再插入
+        await db.execute(delete(table).where(table.c.material_id.in_([alert["material_id"] for alert in alerts])))
+        stmt = insert(table)
+    await db.execute(stmt, alerts)
+
+# 按缺口大小排序的预警列表 (缺口相同时按物资ID)，order="desc" 时缺口最大的在前
+async def get_stock_alerts(
+    db: AsyncSession,
+    skip: int = 0,
+    limit: int = 100,
+    order: Literal["desc", "asc"] = "desc",
+    include_material: bool = True
+) -> list[StockAlertModel]:
+    if order == "desc":
+        order_by = (StockAlertModel.shortage.desc(), StockAlertModel.material_id.desc())
+    else:
+        order_by = (StockAlertModel.shortage, StockAlertModel.material_id)
+    result = await db.scalars(
+        select(StockAlertModel)
+        .options(material_loader(include_material, StockAlertModel.material))
+        .order_by(*order_by)
+        .offset(skip)
+        .limit(limit)
+    )
+    return result.all()
+
+# 根据库存余額表从头重建预警集合，不提交事务 (python -m app.cli rebuild-inventory-summary 时一并执行)
+async def rebuild_stock_alerts(db: AsyncSession) -> None:
+    await db.execute(delete(StockAlertModel))
+    await db.execute(
+        insert(StockAlertModel).from_select(
+            ["material_id", "current_quantity", "min_stock_level", "shortage"],
+            select(
+                InventoryBalanceModel.material_id,
+                InventoryBalanceModel.current_quantity,
+                InventoryBalanceModel.min_stock_level,
+                InventoryBalanceModel.min_stock_level - InventoryBalanceModel.current_quantity
+            ).where(
+                InventoryBalanceModel.current_quantity < InventoryBalanceModel.min_stock_level,
+                InventoryBalanceModel.min_stock_level > 0
+            )
+        )
+    )
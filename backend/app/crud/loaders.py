@@ -0,0 +1,40 @@
+from pydantic import BaseModel
+from sqlalchemy import Select, Table, select
+from sqlalchemy.orm import joinedload, noload
+
+from app.models.material import Material as MaterialModel
+from app.schemas.material import Material as MaterialSchema
+
+
+# 列表查询中关联物资 (多对一) 的加载策略：
+# 需要时用 JOIN 随列表一起查出；不需要时完全不加载，响应中的 material 为 null
+def material_loader(include_material: bool, relationship_attr):
+    return joinedload(relationship_attr) if include_material else noload(relationship_attr)
+
+
+MATERIAL_PREFIX = "material__" # 快速序列化路径中关联物资列的标签前缀
+
+# 快速序列化路径 (列表接口 fast=true)：只查询响应模型 schema 中的列，结果行直接转换为字典，
+# 不构建 ORM 对象，也不经过 Pydantic 逐行校验。关联物资的列加上前缀随记录一起 JOIN 查出，再组装为嵌套的 material 字典
+# source 为流水表或结构相同的按月归档表
+def select_response_rows(source: Table, schema: type[BaseModel], include_material: bool) -> Select:
+    columns = [source.c[name] for name in schema.model_fields if name in source.c]
+    if not include_material:
+        return select(*columns)
+    material_table = MaterialModel.__table__
+    return select(
+        *columns,
+        *(material_table.c[name].label(MATERIAL_PREFIX + name) for name in MaterialSchema.model_fields)
+    ).join(material_table, material_table.c.id == source.c.material_id)
+
+# 把 select_response_rows 的结果行 (RowMapping) 转换为字典，字段及顺序与响应模型一致，编码后的 JSON 与默认路径相同
+def response_row_dicts(rows, schema: type[BaseModel], include_material: bool) -> list[dict]:
+    fields = list(schema.model_fields)
+    material_fields = [(name, MATERIAL_PREFIX + name) for name in MaterialSchema.model_fields]
+    return [
+        {
+            name: (({key: row[label] for key, label in material_fields} if include_material else None) if name == "material" else row[name])
+            for name in fields
+        }
+        for row in rows
+    ]
@@ -1,22 +1,43 @@
-from sqlalchemy import create_engine # SQLAlchemy 的核心组件，用于连接数据库
+from sqlalchemy.ext.asyncio import AsyncAttrs, AsyncSession, async_sessionmaker, create_async_engine # SQLAlchemy 异步引擎与会话
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql import functions
 from sqlalchemy.ext.declarative import declarative_base # 用于定义数据模型的基类
-from sqlalchemy.orm import sessionmaker # 用于创建数据库会話
 from app.core.config import settings # 导入应用配置
+from app.db.query_stats import install_query_stats
+from app.db.pool_metrics import acquire_connection, install_pool_metrics
 
-# 创建数据库引擎
-engine = create_engine(settings.SQLALCHEMY_DATABASE_URL) 
+# SQLite 把时间存成字符串并按字符串比较：CURRENT_TIMESTAMP 生成的 "YYYY-MM-DD HH:MM:SS"
+# 与 SQLAlchemy 绑定参数的 "YYYY-MM-DD HH:MM:SS.ffffff" 格式不一致，会让时间范围过滤和游标分页出错。
+# 在 SQLite 上让 func.now() 生成与绑定参数相同的格式
+@compiles(functions.now, "sqlite")
+def _sqlite_now(element, compiler, **kw):
+    return "strftime('%Y-%m-%d %H:%M:%f000', 'now')"
+
+# 创建异步数据库引擎
+# 连接串需使用异步驱动：MySQL 用 mysql+aiomysql://，本地开发/压测的替身数据库用 sqlite+aiosqlite://
+# 等待数据库时不再占用线程池中的线程，单个 uvicorn worker 可以同时处理更多请求
+# 连接池参数见 Settings 中的 DB_POOL_*；内存 SQLite 使用单连接的 StaticPool，不接受这些参数
+pool_options = {} if settings.SQLALCHEMY_DATABASE_URL.rstrip("/").endswith((":memory:", "sqlite+aiosqlite:")) else {
+    "pool_size": settings.DB_POOL_SIZE,
+    "max_overflow": settings.DB_MAX_OVERFLOW,
+    "pool_timeout": settings.DB_POOL_TIMEOUT,
+    "pool_recycle": settings.DB_POOL_RECYCLE,
+    "pool_pre_ping": settings.DB_POOL_PRE_PING,
+}
+engine = create_async_engine(settings.SQLALCHEMY_DATABASE_URL, **pool_options)
 # 创建数据库会话
-# autocommit=False: 事务自动提交关闭，需要手动 commit
-# autoflush=False: 在查询前自动将当前会话中的所有挂起更改刷新到数据库关闭，通常与 autocommit=False 一起使用
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# autoflush=False: 在查询前自动将当前会话中的所有挂起更改刷新到数据库关闭
+# expire_on_commit=False: 提交后不让对象过期，返回响应时不会再为每个对象重新 SELECT 一次 (异步会话中也不允许隐式加载)
+SessionLocal = async_sessionmaker(bind=engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+install_query_stats(engine.sync_engine) # 统计每个请求执行的 SQL 语句数、耗时、返回行数和提交次数，并记录慢查询
+install_pool_metrics(engine.sync_engine) # 统计连接的创建/失效次数
 
 # 创建数据模型基类
 # 所有的数据模型类都将继承自这个 Base 类
-Base = declarative_base()
+# AsyncAttrs 提供 obj.awaitable_attrs.xxx，用于在异步代码中显式加载尚未加载的关系
+Base = declarative_base(cls=AsyncAttrs)
 
-def get_db():
-    db = SessionLocal() # 创建一个新的数据库会话
-    try:
+async def get_db():
+    async with SessionLocal() as db: # 创建一个新的数据库会话，请求处理完毕后自动关闭，释放连接
+        await acquire_connection(db) # 从连接池取出连接，并记录等待时间
         yield db # 将会话提供给请求处理函数
-    finally:
-        db.close() # 请求处理完毕后，关闭会话，释放资源
@@ -0,0 +1,21 @@
+from pathlib import Path
+
+from alembic import command
+from alembic.config import Config
+from sqlalchemy.engine import Connection
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+ALEMBIC_INI = Path(__file__).resolve().parents[2] / "alembic.ini" # backend/alembic.ini
+
+
+def _upgrade_to_head(connection: Connection) -> None:
+    config = Config(str(ALEMBIC_INI))
+    config.attributes["connection"] = connection # migrations/env.py 直接在这个连接上执行迁移
+    config.attributes["configure_logger"] = False # 不覆盖应用自身的日志配置
+    command.upgrade(config, "head")
+
+
+# 把数据库结构升级到最新版本 (等同于 alembic upgrade head)
+async def run_migrations(engine: AsyncEngine) -> None:
+    async with engine.begin() as conn:
+        await conn.run_sync(_upgrade_to_head)
@@ -0,0 +1,77 @@
+import threading
+import time
+
+from sqlalchemy import event, exc
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+
+
+# 连接池运行指标：连接的创建/失效次数，以及请求获取连接的等待时间和超时次数
+class PoolMetrics:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.connections_opened = 0
+        self.connections_invalidated = 0
+        self.acquisitions = 0
+        self.acquire_timeouts = 0
+        self.acquire_wait_total = 0.0
+        self.acquire_wait_max = 0.0
+
+    def record_acquire(self, seconds: float, timed_out: bool = False) -> None:
+        with self._lock:
+            if timed_out:
+                self.acquire_timeouts += 1
+                return
+            self.acquisitions += 1
+            self.acquire_wait_total += seconds
+            self.acquire_wait_max = max(self.acquire_wait_max, seconds)
+
+    # 汇总当前连接池状态 (已借出、空闲、溢出连接数) 与累计指标
+    def snapshot(self, engine: Engine) -> dict:
+        pool = engine.pool
+        size = pool.size() if hasattr(pool, "size") else None
+        overflow = pool.overflow() if hasattr(pool, "overflow") else None
+        with self._lock:
+            return {
+                "pool_class": type(pool).__name__,
+                "pool_size": size,
+                "max_overflow": settings.DB_MAX_OVERFLOW if size is not None else None,
+                "checked_out": pool.checkedout() if hasattr(pool, "checkedout") else None,
+                "idle": pool.checkedin() if hasattr(pool, "checkedin") else None,
+                "overflow": max(overflow, 0) if overflow is not None else None, # 未用满常驻连接时 QueuePool 返回负数
+                "connections_opened": self.connections_opened,
+                "connections_invalidated": self.connections_invalidated,
+                "acquisitions": self.acquisitions,
+                "acquire_timeouts": self.acquire_timeouts,
+                "acquire_wait_avg_ms": round(self.acquire_wait_total / self.acquisitions * 1000, 3) if self.acquisitions else 0.0,
+                "acquire_wait_max_ms": round(self.acquire_wait_max * 1000, 3),
+            }
+
+
+pool_metrics = PoolMetrics()
+
+
+# 在引擎上注册连接创建/失效事件
+def install_pool_metrics(engine: Engine) -> None:
+    @event.listens_for(engine, "connect")
+    def _on_connect(dbapi_connection, connection_record):
+        with pool_metrics._lock:
+            pool_metrics.connections_opened += 1
+
+    @event.listens_for(engine, "invalidate")
+    def _on_invalidate(dbapi_connection, connection_record, exception):
+        with pool_metrics._lock:
+            pool_metrics.connections_invalidated += 1
+
+
+# 为会话获取连接并记录等待时间；超时 (连接池耗尽) 时记录后原样抛出
+async def acquire_connection(db: AsyncSession) -> None:
+    started = time.perf_counter()
+    try:
+        await db.connection()
+    except exc.TimeoutError:
+        pool_metrics.record_acquire(time.perf_counter() - started, timed_out=True)
+        raise
+    pool_metrics.record_acquire(time.perf_counter() - started)
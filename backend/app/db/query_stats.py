@@ -0,0 +1,88 @@
+import logging
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.core.config import settings
+from app.core.metrics import db_slow_statements, db_statement_duration
+
+slow_query_logger = logging.getLogger("app.db.slow_query")
+
+SLOW_QUERY_STATEMENT_MAX_LENGTH = 2000 # 慢查询日志中 SQL 文本的最大长度
+
+
+# 单个请求内的数据库访问统计
+@dataclass
+class QueryStats:
+    queries: int = 0 # 执行的 SQL 语句数 (executemany 计为一次)
+    commits: int = 0 # 实际提交到数据库的事务数
+    db_time: float = 0.0 # 执行 SQL 的累计耗时 (秒)
+    rows: int = 0 # SQL 返回的行数 (服务端游标流式读取的行不计)
+    label: str = "" # 请求标识 (方法和路径)，用于慢查询日志
+
+
+# 当前请求的统计对象；不在请求上下文中 (例如脚本、基准测试) 时为 None，不做统计
+_current_stats: ContextVar[QueryStats | None] = ContextVar("db_query_stats", default=None)
+
+
+# 在请求开始时调用，之后同一上下文 (包括线程池中执行的同步路由) 内的 SQL 都会计入返回的对象
+def start_request_stats(label: str = "") -> QueryStats:
+    stats = QueryStats(label=label)
+    _current_stats.set(stats)
+    return stats
+
+
+def get_request_stats() -> QueryStats | None:
+    return _current_stats.get()
+
+
+# 语句返回的行数：异步驱动的适配层在执行时已取回全部结果行 (_rows)；
+# 服务端游标 (yield_per 流式读取) 此时还没有取回数据，不计
+def _returned_rows(cursor, context) -> int:
+    if cursor.description is None or context.execution_options.get("stream_results"):
+        return 0
+    buffered = getattr(cursor, "_rows", None)
+    return len(buffered) if buffered is not None else max(cursor.rowcount, 0)
+
+
+def _log_slow_query(elapsed: float, statement: str, parameters, executemany: bool, stats: QueryStats | None) -> None:
+    db_slow_statements.inc()
+    text = " ".join(statement.split())
+    if len(text) > SLOW_QUERY_STATEMENT_MAX_LENGTH:
+        text = text[:SLOW_QUERY_STATEMENT_MAX_LENGTH] + "..."
+    # executemany 只记录参数组数，避免批量写入时把全部参数写进日志
+    params = f"{len(parameters)} 组参数" if executemany else repr(parameters)[:500]
+    slow_query_logger.warning(
+        "慢查询 %.1f ms [%s]: %s | %s",
+        elapsed * 1000, stats.label if stats is not None and stats.label else "后台任务", text, params
+    )
+
+
+# 在引擎上注册事件钩子
+def install_query_stats(engine: Engine) -> None:
+    @event.listens_for(engine, "before_cursor_execute")
+    def _count_query(conn, cursor, statement, parameters, context, executemany):
+        context._query_started = time.perf_counter()
+        stats = _current_stats.get()
+        if stats is not None:
+            stats.queries += 1
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _time_query(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - context._query_started
+        db_statement_duration.observe(elapsed)
+        stats = _current_stats.get()
+        if stats is not None:
+            stats.db_time += elapsed
+            stats.rows += _returned_rows(cursor, context)
+        if settings.SLOW_QUERY_THRESHOLD_MS > 0 and elapsed * 1000 >= settings.SLOW_QUERY_THRESHOLD_MS:
+            _log_slow_query(elapsed, statement, parameters, executemany, stats)
+
+    @event.listens_for(engine, "commit")
+    def _count_commit(conn):
+        stats = _current_stats.get()
+        if stats is not None:
+            stats.commits += 1
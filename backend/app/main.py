@@ -1,18 +1,71 @@
-from fastapi import FastAPI
+import asyncio
+import logging
+import time
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware # 导入 CORS 中间件，用于处理跨域请求
 
 from app.routers.api_v1 import api_router # 导入聚合后的 API 路由器
 from app.core.config import settings # 导入应用配置
-from app.db.database import engine, Base # 导入数据库引擎和模型基类
+from app.db.database import engine, SessionLocal # 导入数据库引擎和会话
+from app.db.migrations import run_migrations # Alembic 迁移
+from app.crud import crud_inventory_snapshot, crud_inventory_summary, crud_material
+from app.db.query_stats import start_request_stats # 每个请求的 SQL 语句数/提交次数统计
+from app.core.compression import CompressionMiddleware # 响应压缩
+from app.core.log import setup_logging
+from app.core.metrics import record_request, route_label # 每个路由的请求指标 (GET /metrics)
+from app.routers.monitoring import metrics_router
+
+setup_logging(settings.LOG_LEVEL)
+logger = logging.getLogger(__name__)
+
+# ---- 应用生命周期 ----
+# 定期从数据库重建物资自动补全索引 (多 worker 部署时同步其他进程的修改)
+async def refresh_suggest_index_periodically(interval: float):
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            async with SessionLocal() as db:
+                await crud_material.load_material_suggest_index(db)
+        except Exception as e: # 重建失败时保留旧索引，下个周期重试
+            logger.warning("重建物资自动补全索引失败，保留旧索引: %s", e)
+
+# 定时取库存快照 (历史时点库存查询的起点)；启动时若最近一次快照已过期会立即补取一次
+# 最近一次快照距今不足半个周期时跳过，多个 worker 同时运行本任务时每个周期只会写入一次
+async def snapshot_inventory_periodically(interval: float):
+    while True:
+        try:
+            async with SessionLocal() as db:
+                await crud_inventory_snapshot.take_inventory_snapshot(db, min_interval=interval / 2)
+        except Exception: # 失败时下个周期重试
+            logger.exception("定时库存快照失败")
+        await asyncio.sleep(interval)
 
-# ---- 数据库表创建 ----
-# 在应用启动时创建所有在 Base 中定义的表 (如果它们尚不存在)
-# 注意：对于生产环境，强烈建议使用数据库迁移工具如 Alembic 来管理数据库表结构的变更。
-Base.metadata.create_all(bind=engine)
-# 你可以在项目根目录下运行 `alembic init alembic` 初始化 Alembic，然后配置并使用它。
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # ---- 数据库结构迁移 ----
+    # 表结构由 Alembic 迁移脚本 (backend/migrations) 管理，启动时升级到最新版本 (等同于 alembic upgrade head)
+    # 多 worker 部署时建议设置 DB_AUTO_MIGRATE=false，在部署流程中单独执行一次 alembic upgrade head
+    if settings.DB_AUTO_MIGRATE:
+        await run_migrations(engine)
+    # ----
+    async with SessionLocal() as db:
+        await crud_inventory_summary.ensure_inventory_summary(db) # 新库或从旧版本升级时补建库存汇总行
+        await crud_material.load_material_suggest_index(db) # 构建物资自动补全索引
+    background_tasks = []
+    if settings.SUGGEST_INDEX_REFRESH_SECONDS > 0:
+        background_tasks.append(asyncio.create_task(refresh_suggest_index_periodically(settings.SUGGEST_INDEX_REFRESH_SECONDS)))
+    if settings.INVENTORY_SNAPSHOT_INTERVAL_SECONDS > 0:
+        background_tasks.append(asyncio.create_task(snapshot_inventory_periodically(settings.INVENTORY_SNAPSHOT_INTERVAL_SECONDS)))
+    yield
+    for task in background_tasks:
+        task.cancel()
+    await engine.dispose() # 应用关闭时释放连接池中的连接
 # ----
 
 app = FastAPI(
+    lifespan=lifespan,
     title=settings.PROJECT_NAME, # API 文档的标题
     openapi_url=f"{settings.API_V1_STR}/openapi.json", # OpenAPI schema 的路径
     docs_url=f"{settings.API_V1_STR}/docs", # Swagger UI 文档路径
@@ -36,11 +89,43 @@ app.add_middleware(
     allow_credentials=True, # 是否允许携带 cookies
     allow_methods=["*"], # 允许所有 HTTP 方法 (GET, POST, PUT, DELETE 等)
     allow_headers=["*"], # 允许所有 HTTP 请求头
+    expose_headers=["X-DB-Queries", "X-DB-Commits", "X-Next-Cursor", "ETag"], # 允许前端读取的自定义响应头
 )
 # ----
 
+# ---- 响应压缩 ----
+# 只压缩一次性发送完整响应体的普通响应，SSE 推送和流式导出原样透传，不会被缓冲。
+# 需要位于下面的 @app.middleware("http") 之内 (先添加)：该中间件会把响应体改为分段转发，在它外层就无法区分普通响应和流式响应
+if settings.RESPONSE_COMPRESSION:
+    app.add_middleware(CompressionMiddleware, minimum_size=settings.RESPONSE_COMPRESSION_MIN_SIZE)
+# ----
+
+# ---- 请求指标与数据库访问统计 ----
+# 按路由记录请求耗时、SQL 语句数、SQL 耗时和返回行数 (GET /metrics)；
+# 并在响应头中返回本次请求执行的 SQL 语句数和事务提交次数，便于确认每个业务操作只提交一次
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    stats = start_request_stats(f"{request.method} {request.url.path}")
+    started = time.perf_counter()
+    status_code = 500 # 未处理的异常由外层的 ServerErrorMiddleware 返回 500
+    try:
+        response = await call_next(request)
+        status_code = response.status_code
+    finally:
+        # 路由在匹配后才写入 scope；未匹配到路由 (404) 的请求统一记为 unmatched，避免任意路径产生新的标签
+        record_request(
+            request.method, route_label(request.scope), status_code, time.perf_counter() - started,
+            stats.queries, stats.db_time, stats.rows
+        )
+    response.headers["X-DB-Queries"] = str(stats.queries)
+    response.headers["X-DB-Commits"] = str(stats.commits)
+    return response
+# ----
+
 # 将聚合后的 API 路由器包含到主应用中，并设置统一的 API 版本前缀
 app.include_router(api_router, prefix=settings.API_V1_STR)
+# Prometheus 抓取地址固定为 /metrics，不加 API 版本前缀
+app.include_router(metrics_router)
 
 # 一个简单的根路径端点，用于测试 API 是否正常运行
 @app.get("/", tags=["Root"])
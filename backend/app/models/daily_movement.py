@@ -0,0 +1,17 @@
+from sqlalchemy import Column, Integer, BigInteger, Date, ForeignKey, Index
+from app.db.database import Base
+
+class DailyMovement(Base):
+    # 每日出入库汇总 (按物资、按天)
+    # 由入库/出库记录的创建操作在同一事务中累加，趋势统计直接按天读取，无需扫描出入库流水
+    __tablename__ = "daily_movements"
+    __table_args__ = (
+        Index("ix_daily_movements_day", "day"), # 不限定物资时按日期范围汇总
+    )
+
+    material_id = Column(Integer, ForeignKey("materials.id"), primary_key=True) # 物资 ID
+    day = Column(Date, primary_key=True) # 日期 (与出入库时间使用相同的数据库时区)
+    inbound_quantity = Column(BigInteger, nullable=False, default=0) # 当日入库数量
+    inbound_count = Column(Integer, nullable=False, default=0) # 当日入库记录条数
+    outbound_quantity = Column(BigInteger, nullable=False, default=0) # 当日出库数量
+    outbound_count = Column(Integer, nullable=False, default=0) # 当日出库记录条数
@@ -1,10 +1,21 @@
-from sqlalchemy import Column, Integer, ForeignKey, DateTime, func 
+from sqlalchemy import Column, Index, Integer, ForeignKey, DateTime, func, text
 from app.db.database import Base
 from sqlalchemy.orm import relationship 
 
 class InventoryBalance(Base):
     # 库存余额
     __tablename__ = "inventory_balance"
+    # flush 时一并取回数据库生成的时间戳等默认值 (支持 RETURNING 时随 INSERT/UPDATE 返回)，提交后无需 refresh
+    __mapper_args__ = {"eager_defaults": True}
+    # 低于最低库存的余額行的部分索引 (只收录预警行，体积很小)，统计预警数量时无需扫描整表
+    # 只有 SQLite 和 PostgreSQL 支持部分索引，MySQL 上不创建
+    __table_args__ = (
+        Index(
+            "ix_inventory_balance_below_min", "material_id",
+            sqlite_where=text("current_quantity < min_stock_level AND min_stock_level > 0"),
+            postgresql_where=text("current_quantity < min_stock_level AND min_stock_level > 0"),
+        ).ddl_if(dialect=("sqlite", "postgresql")),
+    )
 
     id = Column(Integer, primary_key=True, index=True, autoincrement=True) # 库存余額记录 ID，主键，自增
     material_id = Column(Integer, ForeignKey("materials.id"), unique=True, nullable=False, index=True) # 关联的物资 ID，外键，唯一，不能为空，建立索引
@@ -12,6 +23,8 @@ class InventoryBalance(Base):
     min_stock_level = Column(Integer, nullable=True, default=0) # 最低库存阈值 (预警用)，可为空，默认为 0
     max_stock_level = Column(Integer, nullable=True, default=0) # 最高库存阈值 (预警用)，可为空，默认为 0
     last_updated_at = Column(DateTime(timezone=True), default=func.now(), onupdate=func.now()) # 最后更新时间
+    # 行版本号 (用于 ETag)：每次 UPDATE (包括入库/出库的原子累加语句) 由数据库加 1
+    version = Column(Integer, nullable=False, default=1, server_default=text("1"), onupdate=text("version + 1"))
 
     # 定义与 Material 模型的关系 (一对一)
     # `back_populates` 用于双向关系，在 Material 模型中也需要定义对应的 relationship
@@ -0,0 +1,12 @@
+from sqlalchemy import Column, Integer, BigInteger, DateTime, ForeignKey
+from app.db.database import Base
+
+class InventorySnapshot(Base):
+    # 库存快照：定期记录每种物资在快照时间点的库存数量
+    # 查询历史时点库存时从不晚于该时点的最近一次快照出发，只累加快照之后的出入库流水
+    __tablename__ = "inventory_snapshots"
+
+    # 主键以快照时间开头：查找最近一次快照 (MAX(snapshot_time) WHERE snapshot_time <= :ts) 和读取整次快照都是索引范围扫描
+    snapshot_time = Column(DateTime(timezone=True), primary_key=True) # 快照时间点 (与出入库时间使用相同的数据库时区)
+    material_id = Column(Integer, ForeignKey("materials.id", ondelete="CASCADE"), primary_key=True) # 物资 ID
+    quantity = Column(BigInteger, nullable=False) # 快照时间点的库存数量
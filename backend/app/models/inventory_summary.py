@@ -0,0 +1,17 @@
+from sqlalchemy import Column, Integer, BigInteger, DateTime, func, text
+from app.db.database import Base
+
+class InventorySummary(Base):
+    # 库存汇总 (只有一行，id 固定为 1)
+    # 由物资、入库、出库、库存余额的写操作在同一事务中增量维护，仪表盘只需按主键读取这一行
+    __tablename__ = "inventory_summary"
+    __mapper_args__ = {"eager_defaults": True}
+
+    id = Column(Integer, primary_key=True, autoincrement=False) # 固定为 1
+    material_types_count = Column(Integer, nullable=False, default=0) # 物资种类总数
+    total_stock_quantity = Column(BigInteger, nullable=False, default=0) # 当前库存总量
+    stock_alert_count = Column(Integer, nullable=False, default=0) # 库存低于最低库存阈值的物资数量
+    # 集合版本号 (列表接口的 ETag)：物资或库存余額有任何变化时在同一事务中加 1
+    materials_version = Column(BigInteger, nullable=False, default=0, server_default=text("0")) # 物资表的版本
+    balances_version = Column(BigInteger, nullable=False, default=0, server_default=text("0")) # 库存余額表的版本
+    updated_at = Column(DateTime(timezone=True), default=func.now(), onupdate=func.now()) # 最后更新时间
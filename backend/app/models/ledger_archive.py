@@ -0,0 +1,39 @@
+import re
+from datetime import date
+
+from sqlalchemy import BigInteger, Column, Date, Index, MetaData, String, Table
+from app.db.database import Base
+
+class LedgerArchive(Base):
+    # 出入库流水归档登记表：每行对应一张按月归档表
+    # 归档任务先登记 (并建表) 再搬移数据，查询时据此判断时间范围是否涉及归档表、需要合并哪几张
+    __tablename__ = "ledger_archives"
+
+    ledger = Column(String(16), primary_key=True) # 流水类型: inbound / outbound
+    month = Column(Date, primary_key=True) # 归档月份 (当月第一天)
+    table_name = Column(String(64), nullable=False) # 归档表名，如 inbound_records_archive_202401
+    row_count = Column(BigInteger, nullable=False, default=0) # 已归档的行数
+
+# 按月归档表在归档时动态创建，不属于 Base.metadata，也不由迁移脚本管理 (见 migrations/env.py 的 include_name)
+archive_metadata = MetaData()
+
+ARCHIVE_TABLE_NAME = re.compile(r"^(inbound|outbound)_records_archive_\d{6}$")
+
+def is_archive_table_name(name: str) -> bool:
+    return bool(ARCHIVE_TABLE_NAME.match(name))
+
+# 与流水表 source 结构相同的某月归档表 (id 保留原值，不再自增；不建外键)
+# time_column: 流水时间列名，归档表同样按 (时间, id) 和 (物资, 时间, id) 建索引，列表/导出/时点库存查询的访问方式不变
+def archive_table(source: Table, time_column: str, month: date) -> Table:
+    name = f"{source.name}_archive_{month:%Y%m}"
+    if name in archive_metadata.tables:
+        return archive_metadata.tables[name]
+    columns = [
+        Column(column.name, column.type, primary_key=column.primary_key, nullable=column.nullable, autoincrement=False, comment=column.comment)
+        for column in source.columns
+    ]
+    return Table(
+        name, archive_metadata, *columns,
+        Index(f"ix_{name}_time_id", time_column, "id"),
+        Index(f"ix_{name}_material_id_time", "material_id", time_column, "id"),
+    )
@@ -1,9 +1,11 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, func, Boolean 
+from sqlalchemy import Column, Integer, String, Text, DateTime, func, Boolean, text
 from app.db.database import Base
 from sqlalchemy.orm import relationship
 
 class Material(Base):
     __tablename__ = "materials" # 定义数据库中的表名
+    # flush 时一并取回数据库生成的时间戳等默认值 (支持 RETURNING 时随 INSERT/UPDATE 返回)，提交后无需 refresh
+    __mapper_args__ = {"eager_defaults": True}
 
     # 定义表的列 (字段)
     id = Column(Integer, primary_key=True, index=True, autoincrement=True) # 物资 ID，主键，自增，建立索引
@@ -21,6 +23,8 @@ class Material(Base):
     # onupdate=func.now() 表示记录更新时自动更新时间
     created_at = Column(DateTime(timezone=True), server_default=func.now()) # 创建时间
     updated_at = Column(DateTime(timezone=True), default=func.now(), onupdate=func.now()) # 更新时间
+    # 行版本号 (用于 ETag)：每次 UPDATE 由数据库加 1。updated_at 只精确到秒，同一秒内的两次修改无法区分
+    version = Column(Integer, nullable=False, default=1, server_default=text("1"), onupdate=text("version + 1"))
 
     inventory_balance = relationship(
         "InventoryBalance",
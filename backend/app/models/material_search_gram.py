@@ -0,0 +1,16 @@
+from sqlalchemy import Column, Integer, String, ForeignKey
+from app.db.database import Base
+
+class MaterialSearchGram(Base):
+    # 物资编码/名称的 n-gram 倒排索引，用于任意子串搜索
+    # 每个物资的编码和名称 (转小写、末尾补结束符后) 拆成相邻四个字符的片段 (见 crud_material_search.GRAM_SIZE)，每个不同片段一行；
+    # 查询时先用主键 (field, gram, material_id) 找出包含查询词全部片段的物资，再用 LIKE 精确核对
+    __tablename__ = "material_search_grams"
+    # SQLite 上按主键聚簇存储 (与 InnoDB 相同)，查询直接在主键 B-tree 上做范围扫描，也省去一份 rowid 表的写入
+    __table_args__ = {"sqlite_with_rowid": False}
+
+    field = Column(String(1), primary_key=True) # c: 编码, n: 名称
+    # 片段按码位比较：MySQL 默认的 utf8mb4_0900_ai_ci 忽略重音和大小写，"resu" 与 "résu" 会在主键上冲突，
+    # 前缀范围扫描 (gram >= c AND gram < chr(ord(c) + 1)) 也依赖码位顺序。SQLite 默认即为二进制比较
+    gram = Column(String(8).with_variant(String(8, collation="utf8mb4_bin"), "mysql", "mariadb"), primary_key=True)
+    material_id = Column(Integer, ForeignKey("materials.id", ondelete="CASCADE"), primary_key=True, index=True) # 物资 ID
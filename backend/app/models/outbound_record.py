@@ -1,10 +1,19 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, func, Text
+from sqlalchemy import Column, Index, Integer, String, ForeignKey, DateTime, func, Text
 from app.db.database import Base
 from sqlalchemy.orm import relationship
 
 class OutboundRecord(Base):
     # 出库记录表
     __tablename__ = "outbound_records" # 表名修正
+    # flush 时一并取回数据库生成的时间戳等默认值 (支持 RETURNING 时随 INSERT/UPDATE 返回)，提交后无需 refresh
+    __mapper_args__ = {"eager_defaults": True}
+    # 列表按 (outbound_time, id) 倒序分页，复合索引支撑排序和键集分页的范围扫描；
+    # 按物资过滤时使用 (material_id, outbound_time, id)，过滤、时间范围和排序都在同一个索引内完成
+    # 索引变更需同时编写迁移 (migrations/versions)
+    __table_args__ = (
+        Index("ix_outbound_records_outbound_time_id", "outbound_time", "id"),
+        Index("ix_outbound_records_material_id_outbound_time", "material_id", "outbound_time", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True, autoincrement=True) # ID，主键，索引，自增
     outbound_order_number = Column(String(100), unique=True, index=True, nullable=True, comment="出库单号") # 新增：出库单号，唯一，索引
@@ -0,0 +1,18 @@
+from sqlalchemy import Column, Integer, ForeignKey, Index
+from sqlalchemy.orm import relationship
+from app.db.database import Base
+
+class StockAlert(Base):
+    # 库存预警集合：当前库存低于最低库存阈值的物资 (current_quantity < min_stock_level 且 min_stock_level > 0)
+    # 由修改库存数量或阈值的写操作在同一事务中维护，预警列表直接分页读取本表，无需扫描全部库存余額
+    __tablename__ = "stock_alerts"
+    __table_args__ = (
+        Index("ix_stock_alerts_shortage", "shortage", "material_id"), # 按缺口大小排序分页
+    )
+
+    material_id = Column(Integer, ForeignKey("materials.id", ondelete="CASCADE"), primary_key=True) # 物资 ID
+    current_quantity = Column(Integer, nullable=False) # 当前库存数量
+    min_stock_level = Column(Integer, nullable=False) # 最低库存阈值
+    shortage = Column(Integer, nullable=False) # 缺口 = 最低库存阈值 - 当前库存数量 (> 0)
+
+    material = relationship("Material", viewonly=True)
@@ -4,6 +4,7 @@ from . import inventory_balances
 from . import inbound_records   
 from . import outbound_records   
 from . import statistics
+from . import monitoring
 
 api_router = APIRouter()
 
@@ -11,4 +12,5 @@ api_router.include_router(materials.router, prefix="/materials", tags=["物资
 api_router.include_router(inventory_balances.router, prefix="/inventory-balances", tags=["库存余額 (Inventory Balances)"])
 api_router.include_router(inbound_records.router, prefix="/inbound-records", tags=["入库记录 (Inbound Records)"])
 api_router.include_router(outbound_records.router, prefix="/outbound-records", tags=["出库记录 (Outbound Records)"])
-api_router.include_router(statistics.router, prefix="/statistics", tags=["统计数据 (Statistics)"]) 
\ No newline at end of file
+api_router.include_router(statistics.router, prefix="/statistics", tags=["统计数据 (Statistics)"])
+api_router.include_router(monitoring.router, prefix="/monitoring", tags=["系统监控 (Monitoring)"])
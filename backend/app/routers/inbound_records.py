@@ -1,11 +1,20 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
-from typing import List, Optional
+import logging
+
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Literal, Optional
 from datetime import datetime
+from functools import partial
 
 from app import schemas
 from app import crud
 from app.db.database import get_db
+from app.core.pagination import encode_cursor, decode_cursor
+from app.core.export import export_response
+from app.core.fast_json import fast_json_response
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
@@ -16,13 +25,13 @@ router = APIRouter()
     summary="创建入库记录 (UC2)",
     description="创建一个新的物资入库记录，并自动更新相应物资的库存余額。"
 )
-def create_new_inbound_record(
+async def create_new_inbound_record(
     inbound_data: schemas.inbound_record.InboundRecordCreate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
     # current_user: schemas.user.User = Depends(get_current_user) # 权限控制
 ):
     # 检查物资是否存在 (可选，如果外键约束处理不了所有情况，或者想提供更友好的错误信息)
-    material_for_inbound = crud.crud_material.get_material_by_id(db, material_id=inbound_data.material_id) # 假设你有 crud_material
+    material_for_inbound = await crud.crud_material.get_material_by_id(db, material_id=inbound_data.material_id) # 假设你有 crud_material
     if not material_for_inbound:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -30,32 +39,80 @@ def create_new_inbound_record(
         )
     
     try:
-        return crud.crud_inbound_record.create_inbound_record(db=db, inbound_record_data=inbound_data)
+        return await crud.crud_inbound_record.create_inbound_record(db=db, inbound_record_data=inbound_data)
     except HTTPException as e: # 捕获 CRUD 层可能抛出的特定业务异常
         raise e
     except Exception as e_global: # 捕获其他意外错误
-        # Log the error e_global for debugging
+        logger.exception("创建入库记录时发生内部错误 (物资ID %s)", inbound_data.material_id)
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"创建入库记录时发生内部错误: {str(e_global)}")
 
 
+@router.post(
+    "/batch",
+    response_model=schemas.inbound_record.InboundRecordBatchResult,
+    status_code=status.HTTP_201_CREATED,
+    summary="批量创建入库记录",
+    description="一次提交一张到货单的多行入库记录，整批在一个事务中写入并按物资汇总更新库存余額；任一物资不存在时整批拒绝。"
+)
+async def create_inbound_records_batch(
+    inbound_items: List[schemas.inbound_record.InboundRecordCreate],
+    db: AsyncSession = Depends(get_db)
+):
+    if not inbound_items:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="入库记录列表不能为空")
+    return await crud.crud_inbound_record.create_inbound_records_batch(db=db, inbound_records_data=inbound_items)
+
+
 @router.get(
     "/",
     response_model=List[schemas.inbound_record.InboundRecord],
     summary="获取入库记录列表",
-    description="获取入库记录列表，支持分页和按物资ID、时间范围过滤。"
+    description="获取入库记录列表，支持分页和按物资ID、时间范围过滤。分页可使用 skip/limit 偏移分页，或使用 cursor 键集分页 (深分页时耗时不随页深增长)。fast=true 时直接查询响应所需的列并编码输出，跳过逐行的 ORM 对象构建和响应模型校验，返回的字段与默认相同。"
 )
-def read_all_inbound_records(
+async def read_all_inbound_records(
+    response: Response,
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=200),
     material_id: Optional[int] = Query(None, description="按物资ID过滤"),
     start_time: Optional[datetime] = Query(None, description="按入库开始时间过滤 (ISO格式 YYYY-MM-DDTHH:MM:SS)"),
     end_time: Optional[datetime] = Query(None, description="按入库结束时间过滤 (ISO格式 YYYY-MM-DDTHH:MM:SS)"),
-    db: Session = Depends(get_db)
+    cursor: Optional[str] = Query(None, description="键集分页游标，取自上一页响应头 X-Next-Cursor；提供时忽略 skip"),
+    include_material: bool = Query(True, description="是否返回每条记录关联的物资信息"),
+    fast: bool = Query(False, description="快速序列化路径：适合大页列表，输出与默认相同"),
+    db: AsyncSession = Depends(get_db)
 ):
-    records = crud.crud_inbound_record.get_inbound_records(
-        db, skip=skip, limit=limit, material_id=material_id, start_time=start_time, end_time=end_time
+    try:
+        decoded_cursor = decode_cursor(cursor) if cursor else None
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    records = await crud.crud_inbound_record.get_inbound_records(
+        db, skip=skip, limit=limit, material_id=material_id, start_time=start_time, end_time=end_time,
+        cursor=decoded_cursor, include_material=include_material, as_rows=fast
     )
-    return records
+    # 页满时在响应头中返回下一页游标 (偏移分页模式下同样返回，便于客户端切换到游标模式)
+    if len(records) == limit:
+        last = records[-1]
+        response.headers["X-Next-Cursor"] = encode_cursor(last["inbound_time"], last["id"]) if fast else encode_cursor(last.inbound_time, last.id)
+    # fast=true 时 records 已是字典，直接编码，不再经过 response_model 校验
+    return fast_json_response(records, response) if fast else records
+
+@router.get(
+    "/export",
+    summary="导出入库流水",
+    description="按与列表相同的物资和时间过滤条件导出全部入库记录 (CSV 或 NDJSON)。结果通过数据库服务端游标分批流式输出，不受分页上限限制，内存占用与结果集大小无关；gzip=true 时输出压缩文件。",
+    response_class=StreamingResponse,
+)
+async def export_inbound_records(
+    format: Literal["csv", "ndjson"] = Query("csv", description="导出格式：csv / ndjson"),
+    gzip: bool = Query(False, description="是否以 gzip 压缩输出"),
+    material_id: Optional[int] = Query(None, description="按物资ID过滤"),
+    start_time: Optional[datetime] = Query(None, description="按入库开始时间过滤 (ISO格式 YYYY-MM-DDTHH:MM:SS)"),
+    end_time: Optional[datetime] = Query(None, description="按入库结束时间过滤 (ISO格式 YYYY-MM-DDTHH:MM:SS)"),
+):
+    # 涉及已归档月份时，导出会话中依次输出归档表和流水表
+    queries = partial(crud.crud_inbound_record.build_inbound_records_export_queries, material_id=material_id, start_time=start_time, end_time=end_time)
+    return export_response(queries, format, filename="inbound_records", compress=gzip)
 
 @router.get(
     "/{record_id}",
@@ -63,8 +120,8 @@ def read_all_inbound_records(
     summary="获取单个入库记录详情",
     description="根据记录ID获取入库记录的详细信息。"
 )
-def read_single_inbound_record(record_id: int, db: Session = Depends(get_db)):
-    record = crud.crud_inbound_record.get_inbound_record_by_id(db, record_id=record_id)
+async def read_single_inbound_record(record_id: int, db: AsyncSession = Depends(get_db)):
+    record = await crud.crud_inbound_record.get_inbound_record_by_id(db, record_id=record_id)
     if record is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="入库记录未找到")
     return record
\ No newline at end of file
@@ -1,10 +1,14 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
-from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from datetime import datetime
+from typing import List, Literal, Optional
 
 from app import schemas 
 from app import crud 
 from app.db.database import get_db 
+from app.core.stream import balance_stream_response
+from app.core.etag import etag_matches, has_if_none_match, make_etag, not_modified, set_etag
 
 router = APIRouter()
 
@@ -12,24 +16,103 @@ router = APIRouter()
     "/",
     response_model=List[schemas.inventory_balance.InventoryBalance],
     summary="获取库存余額列表 (UC4)",
-    description="获取所有物资的当前库存余額信息，支持分页。"
+    description="获取所有物资的当前库存余額信息，支持分页。响应带有由库存余額和物资集合版本号生成的 ETag，没有任何变化时带 If-None-Match 的请求返回 304。"
 )
-def read_inventory_balances(
+async def read_inventory_balances(
+    request: Request,
+    response: Response,
     skip: int = Query(0, ge=0, description="跳过的记录数"),
     limit: int = Query(100, ge=1, le=200, description="每页返回的记录数"),
-    db: Session = Depends(get_db)
+    include_material: bool = Query(True, description="是否返回每条记录关联的物资信息"),
+    db: AsyncSession = Depends(get_db)
 ):
-    balances = crud.crud_inventory_balance.get_inventory_balances(db, skip=skip, limit=limit)
+    # 条件 GET：先读集合版本号，未变化时直接返回 304，不执行列表查询
+    versions = await crud.crud_inventory_summary.get_collection_versions(db)
+    etag = make_etag("balances", versions[1], versions[0]) if versions else None
+    if etag and etag_matches(request, etag):
+        return not_modified(etag)
+    balances = await crud.crud_inventory_balance.get_inventory_balances(db, skip=skip, limit=limit, include_material=include_material)
+    if etag:
+        set_etag(response, etag)
     return balances
 
+@router.get(
+    "/stream",
+    summary="订阅库存变化 (Server-Sent Events)",
+    description="返回 text/event-stream：先分批发送全部物资当前库存的快照 (snapshot 事件，结束时发送 ready)，"
+                "之后在入库、出库、库存调整、物资新建/删除提交后推送变化 (balance 事件，含物资ID、新数量和预警状态)。"
+                "客户端处理不及时导致缓冲溢出时发送 resync 并断开，EventSource 自动重连后重新获得快照。"
+                "只推送当前 worker 进程内的变化。订阅数超过上限时返回 503。",
+    response_class=StreamingResponse,
+)
+async def stream_inventory_balances():
+    response = balance_stream_response(
+        crud.crud_inventory_balance.build_balance_stream_snapshot_query(),
+        crud.crud_inventory_balance.balance_event
+    )
+    if response is None:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="库存变化订阅数已达上限，请稍后重试")
+    return response
+
+@router.get(
+    "/alerts",
+    response_model=List[schemas.inventory_balance.StockAlert],
+    summary="获取库存预警列表",
+    description="返回当前库存低于最低库存阈值的物资，按缺口 (最低库存阈值 - 当前库存) 排序并分页。数据来自随库存变更同步维护的预警集合，不扫描全部库存余額；总数见仪表盘的 stock_alert_count。"
+)
+async def read_stock_alerts(
+    skip: int = Query(0, ge=0, description="跳过的记录数"),
+    limit: int = Query(100, ge=1, le=200, description="每页返回的记录数"),
+    order: Literal["desc", "asc"] = Query("desc", description="按缺口排序：desc 缺口最大的在前，asc 缺口最小的在前"),
+    include_material: bool = Query(True, description="是否返回每条记录关联的物资信息"),
+    db: AsyncSession = Depends(get_db)
+):
+    return await crud.crud_stock_alert.get_stock_alerts(db, skip=skip, limit=limit, order=order, include_material=include_material)
+
+@router.get(
+    "/as-of",
+    response_model=List[schemas.inventory_balance.InventoryBalanceAsOf],
+    summary="获取全部物资在指定时点的库存",
+    description="按物资ID分页返回每种物资在 ts 时点的库存数量。从不晚于 ts 的最近一次库存快照出发，只累加快照之后的出入库流水。"
+)
+async def read_inventory_balances_as_of(
+    ts: datetime = Query(..., description="查询的时间点 (ISO格式 YYYY-MM-DDTHH:MM:SS)"),
+    skip: int = Query(0, ge=0, description="跳过的记录数"),
+    limit: int = Query(100, ge=1, le=200, description="每页返回的记录数"),
+    db: AsyncSession = Depends(get_db)
+):
+    return await crud.crud_inventory_snapshot.get_stocks_as_of(db, ts=ts, skip=skip, limit=limit)
+
 @router.get(
     "/material/{material_id}",
     response_model=schemas.inventory_balance.InventoryBalance,
     summary="根据物资ID获取库存余額 (UC4)",
-    description="获取指定物资ID的当前库存余額信息。"
+    description="获取指定物资ID的当前库存余額信息。响应带有由库存余額和物资的行版本号生成的 ETag，带 If-None-Match 的请求在两者都未变化时返回 304。"
+)
+async def read_inventory_balance_for_material(material_id: int, request: Request, response: Response, db: AsyncSession = Depends(get_db)):
+    # 条件 GET：只查询两个版本号，未变化时返回 304，不加载关联物资、不序列化响应
+    if has_if_none_match(request):
+        versions = await crud.crud_inventory_balance.get_inventory_balance_versions(db, material_id=material_id)
+        if versions is not None and etag_matches(request, etag := make_etag("balance", material_id, *versions)):
+            return not_modified(etag)
+    balance = await crud.crud_inventory_balance.get_inventory_balance_by_material_id(db, material_id=material_id)
+    if balance is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"物资ID {material_id} 的库存记录未找到")
+    set_etag(response, make_etag("balance", material_id, balance.version, balance.material.version))
+    return balance
+
+@router.get(
+    "/material/{material_id}/as-of",
+    response_model=schemas.inventory_balance.InventoryBalanceAsOf,
+    summary="根据物资ID获取指定时点的库存",
+    description="返回指定物资在 ts 时点的库存数量 (用于盘点审计)。从不晚于 ts 的最近一次库存快照出发，只累加快照之后的出入库流水。"
 )
-def read_inventory_balance_for_material(material_id: int, db: Session = Depends(get_db)):
-    balance = crud.crud_inventory_balance.get_inventory_balance_by_material_id(db, material_id=material_id)
+async def read_inventory_balance_for_material_as_of(
+    material_id: int,
+    ts: datetime = Query(..., description="查询的时间点 (ISO格式 YYYY-MM-DDTHH:MM:SS)"),
+    db: AsyncSession = Depends(get_db)
+):
+    balance = await crud.crud_inventory_snapshot.get_stock_as_of(db, material_id=material_id, ts=ts)
     if balance is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"物资ID {material_id} 的库存记录未找到")
     return balance
@@ -40,13 +123,13 @@ def read_inventory_balance_for_material(material_id: int, db: Session = Depends(
     summary="管理员手动调整物资库存详情 (慎用)",
     description="允许管理员更新指定物资的库存余額详细信息，如最低/最高库存水平，或直接调整当前数量。"
 )
-def update_material_inventory_balance_details(
+async def update_material_inventory_balance_details(
     material_id: int,
     inventory_update: schemas.inventory_balance.InventoryBalanceUpdate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
     # current_user: schemas.user.User = Depends(get_current_active_admin_user) # 权限控制
 ):
-    updated_balance = crud.crud_inventory_balance.update_inventory_balance_details(
+    updated_balance = await crud.crud_inventory_balance.update_inventory_balance_details(
         db=db, material_id=material_id, inventory_update=inventory_update
     )
     if updated_balance is None:
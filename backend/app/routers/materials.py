@@ -1,10 +1,14 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, File, HTTPException, Request, Response, status, Query, UploadFile
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional 
-from sqlalchemy import or_
+from sqlalchemy import func, or_, select
 from app import schemas 
 from app import crud
 from app.db.database import get_db 
+from starlette.concurrency import run_in_threadpool
+from app.core.material_import import check_material_file, iter_material_rows
+from app.core.suggest import material_suggest_index
+from app.core.etag import etag_matches, has_if_none_match, make_etag, not_modified, set_etag
 
 router = APIRouter() # 创建一个新的 API 路由器实例
 
@@ -17,84 +21,143 @@ router = APIRouter() # 创建一个新的 API 路由器实例
     summary="创建新物资",
     description="根据提供的信息创建一个新的物资条目，并为其初始化库存余額。"
 )
-def create_new_material(
+async def create_new_material(
     material_in: schemas.material.MaterialCreate, # 请求体数据，将由 Pydantic 自动校验
-    db: Session = Depends(get_db) # 依赖注入：获取数据库会话
+    db: AsyncSession = Depends(get_db) # 依赖注入：获取数据库会话
 ):
-    db_material_by_code = crud.crud_material.get_material_by_code(db, code=material_in.code)
+    db_material_by_code = await crud.crud_material.get_material_by_code(db, code=material_in.code)
     if db_material_by_code:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,detail=f"物资编码 '{material_in.code}' 已存在.")
-    created_material = crud.crud_material.create_material(db=db, material=material_in)
+    created_material = await crud.crud_material.create_material(db=db, material=material_in)
 
     return created_material
 
 
-@router.get(
-    "/",
-    response_model=schemas.material.MaterialPage,
-    summary="获取物资列表",
-    description="获取所有物资的列表，支持分页和基于名称或编码的简单过滤。"
+@router.post(
+    "/import",
+    response_model=schemas.material.MaterialImportResult,
+    summary="批量导入物资",
+    description="上传 CSV 或 Excel (.xlsx) 文件批量创建物资并初始化库存余額。表头需包含 code/name (或 编码/名称)，可选 model、unit、supplier、remarks、is_active。文件逐行解析、分块写入，返回每个失败行的行号和原因，其余行正常导入。文件本身的问题 (类型、表头、编码、CSV 格式) 在写入前检查，返回 400，不导入任何行。"
 )
+async def import_materials_from_file(
+    file: UploadFile = File(..., description="CSV (UTF-8) 或 Excel (.xlsx) 文件"),
+    db: AsyncSession = Depends(get_db)
+):
+    try:
+        # 写入任何数据之前先完整解析一遍 (在线程池中执行，不阻塞事件循环)
+        await run_in_threadpool(check_material_file, file.file, file.filename)
+    except ValueError as e: # 文件类型不支持、表头缺少必填列、编码无法解析、CSV 格式错误等
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    return await crud.crud_material.import_materials(db, iter_material_rows(file.file, file.filename))
+
+
 @router.get(
     "/",
     response_model=schemas.material.MaterialPage,
     summary="获取物资列表",
-    description="获取所有物资的列表，支持分页和基于名称、编码或激活状态的过滤。"
+    description="获取所有物资的列表，支持分页和基于名称、编码或激活状态的过滤。q 同时搜索编码和名称中的任意子串，并按相关度排序。不需要总页数时传 with_total=false，用 has_more 判断是否有下一页，可省去一次 COUNT 查询。"
+                "响应带有由物资集合版本号生成的 ETag，物资没有任何变化时带 If-None-Match 的请求返回 304。"
 )
-def read_all_materials(
+async def read_all_materials(
+    request: Request,
+    response: Response,
     skip: int = Query(0, ge=0, description="跳过的记录数 (用于分页)"),
     # 你可以根据需要调整 limit 的最大值，例如 le=1000，如果前端确实需要那么多
     limit: int = Query(10, ge=1, le=200, description="每页返回的记录数 (例如最大200)"),
+    q: Optional[str] = Query(None, min_length=1, max_length=100, description="关键字，匹配编码或名称中的任意子串，结果按相关度排序"),
     code: Optional[str] = Query(None, description="按物资编码模糊过滤"),
     name: Optional[str] = Query(None, description="按物资名称模糊过滤"),
     is_active: Optional[bool] = Query(None, description="按激活状态过滤 (true 或 false)"), # <--- 添加 is_active 参数
-    db: Session = Depends(get_db)
+    with_total: bool = Query(True, description="是否返回总数。为 false 时不统计总数，只用 has_more 判断是否有下一页"),
+    db: AsyncSession = Depends(get_db)
 ):
-    materials_query = db.query(crud.crud_material.MaterialModel) #
+    # 条件 GET：先读物资集合版本号 (汇总行的一列)，未变化时直接返回 304，不执行列表查询
+    versions = await crud.crud_inventory_summary.get_collection_versions(db)
+    etag = make_etag("materials", versions[0]) if versions else None
+    if etag and etag_matches(request, etag):
+        return not_modified(etag)
+
+    materials_query = select(crud.crud_material.MaterialModel) #
 
     filter_conditions = []
 
-    # 原有的名称和编码过滤
+    # 名称和编码过滤：通过片段倒排索引 (material_search_grams) 查找，避免前导通配符 LIKE 的全表扫描
     if name and code:
         filter_conditions.append(
             or_(
-                crud.crud_material.MaterialModel.name.ilike(f"%{name}%"),
-                crud.crud_material.MaterialModel.code.ilike(f"%{code}%")
+                crud.crud_material_search.material_search_condition(name, fields=["name"]),
+                crud.crud_material_search.material_search_condition(code, fields=["code"])
             )
         )
     elif name:
-        filter_conditions.append(crud.crud_material.MaterialModel.name.ilike(f"%{name}%"))
+        filter_conditions.append(crud.crud_material_search.material_search_condition(name, fields=["name"]))
     elif code:
-        filter_conditions.append(crud.crud_material.MaterialModel.code.ilike(f"%{code}%"))
+        filter_conditions.append(crud.crud_material_search.material_search_condition(code, fields=["code"]))
+    if q:
+        filter_conditions.append(crud.crud_material_search.material_search_condition(q))
 
     # 新增的 is_active 过滤
     if is_active is not None: # 只有当 is_active 参数被提供时才应用过滤
         filter_conditions.append(crud.crud_material.MaterialModel.is_active == is_active)
 
     if filter_conditions:
-        materials_query = materials_query.filter(*filter_conditions)
-
-    total = materials_query.count()
-    items = materials_query.order_by(crud.crud_material.MaterialModel.id.desc()).offset(skip).limit(limit).all() # 添加排序示例
-
+        materials_query = materials_query.where(*filter_conditions)
+
+    # 多取一行判断是否还有下一页，无需总数
+    order_by = crud.crud_material_search.material_search_order_by(q) if q else [crud.crud_material.MaterialModel.id.desc()]
+    items = (await db.scalars(materials_query.order_by(*order_by).offset(skip).limit(limit + 1))).all()
+    has_more = len(items) > limit
+
+    # 总数：with_total=false 时不统计；无过滤条件时读取库存汇总行中的物资种类数 (O(1))；有过滤条件时才执行 COUNT
+    total = None
+    if with_total:
+        if filter_conditions:
+            total = await db.scalar(select(func.count()).select_from(materials_query.subquery()))
+        else:
+            total = await crud.crud_material.get_material_total(db)
+
+    if etag:
+        set_etag(response, etag)
     return schemas.material.MaterialPage(
-        items=items,
+        items=items[:limit],
         total=total,
         page=(skip // limit) + 1,
         size=limit,
-        pages=(total + limit - 1) // limit if total > 0 else 0
+        pages=((total + limit - 1) // limit if total > 0 else 0) if total is not None else None,
+        has_more=has_more
     )
 
+@router.get(
+    "/suggest",
+    response_model=List[schemas.material.MaterialSuggestion],
+    summary="物资编码/名称自动补全",
+    description="返回编码或名称以 q 开头的前 limit 个启用物资 (编码匹配优先)。数据来自进程内的有序索引，不访问数据库。"
+)
+async def suggest_materials(
+    q: str = Query(..., min_length=1, max_length=100, description="输入的前缀 (不区分大小写)"),
+    limit: int = Query(10, ge=1, le=50, description="返回的候选数量")
+):
+    return [
+        {"id": material_id, "code": code, "name": name}
+        for material_id, code, name in material_suggest_index.suggest(q, limit)
+    ]
+
 @router.get(
     "/{material_id}",
     response_model=schemas.material.Material,
     summary="获取单个物资详情",
-    description="根据物资 ID 获取其详细信息。"
+    description="根据物资 ID 获取其详细信息。响应带有由行版本号生成的 ETag，带 If-None-Match 的请求在物资未变化时返回 304。"
 )
-def read_single_material(material_id: int, db: Session = Depends(get_db)):
-    db_material = crud.crud_material.get_material_by_id(db, material_id=material_id)
+async def read_single_material(material_id: int, request: Request, response: Response, db: AsyncSession = Depends(get_db)):
+    # 条件 GET：只查询版本号，未变化时返回 304，不读取整行、不序列化响应
+    if has_if_none_match(request):
+        version = await crud.crud_material.get_material_version(db, material_id=material_id)
+        if version is not None and etag_matches(request, etag := make_etag("material", material_id, version)):
+            return not_modified(etag)
+    db_material = await crud.crud_material.get_material_by_id(db, material_id=material_id)
     if db_material is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="物资未找到")
+    set_etag(response, make_etag("material", db_material.id, db_material.version))
     return db_material
 
 @router.put(
@@ -103,25 +166,25 @@ def read_single_material(material_id: int, db: Session = Depends(get_db)):
     summary="更新物资信息",
     description="根据物资 ID 更新其部分或全部信息。"
 )
-def update_existing_material(
+async def update_existing_material(
     material_id: int,
     material_in: schemas.material.MaterialUpdate, # 请求体数据
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    db_material = crud.crud_material.get_material_by_id(db, material_id=material_id)
+    db_material = await crud.crud_material.get_material_by_id(db, material_id=material_id)
     if db_material is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="物资未找到")
 
     # 如果请求中包含物资编码，且该编码与当前物资编码不同，则检查新编码是否已存在
     if material_in.code and material_in.code != db_material.code:
-        existing_material_with_new_code = crud.crud_material.get_material_by_code(db, code=material_in.code)
+        existing_material_with_new_code = await crud.crud_material.get_material_by_code(db, code=material_in.code)
         if existing_material_with_new_code:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail=f"物资编码 '{material_in.code}' 已被其他物资使用."
             )
 
-    updated_material = crud.crud_material.update_material(db, material_id=material_id, material_update=material_in)
+    updated_material = await crud.crud_material.update_material(db, material_id=material_id, material_update=material_in)
     return updated_material # update_material 内部已处理了不存在的情况，但为清晰起见再次检查
 
 @router.delete(
@@ -130,29 +193,26 @@ def update_existing_material(
     summary="删除物资",
     description="根据物资 ID 删除一个物资。注意：删除前应检查库存是否为零。"
 )
-def delete_existing_material(
+async def delete_existing_material(
     material_id: int,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     # 检查物资是否存在
-    db_material_to_delete = crud.crud_material.get_material_by_id(db, material_id=material_id)
+    db_material_to_delete = await crud.crud_material.get_material_by_id(db, material_id=material_id)
     if db_material_to_delete is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="物资未找到")
 
     # ---- 业务逻辑：删除前的检查 ----
     # 检查关联的库存余額是否为零
-    balance_record = crud.crud_inventory_balance.get_inventory_balance_by_material_id(db, material_id=material_id)
+    balance_record = await db_material_to_delete.awaitable_attrs.inventory_balance
     if balance_record and balance_record.current_quantity > 0:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=f"无法删除物资 '{db_material_to_delete.name}'，因为其当前库存不为零 ({balance_record.current_quantity} {db_material_to_delete.unit})."
         )
 
-    # 执行删除 (crud_material.delete_material 内部应处理关联库存余額记录的删除，或通过数据库外键级联删除)
-    deleted_material = crud.crud_material.delete_material(db, material_id=material_id)
+    # 执行删除 (关联的库存余額记录通过 cascade 在同一事务中删除)
+    deleted_material = await crud.crud_material.delete_material(db, material_id=material_id)
     if deleted_material is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="物资删除过程中未找到")
-
-    if balance_record:
-       crud.crud_inventory_balance.delete_inventory_balance(db, balance_id=balance_record.id)
     return deleted_material
\ No newline at end of file
@@ -0,0 +1,74 @@
+from fastapi import APIRouter, Response
+
+from app.core.broadcast import balance_broker
+from app.core.cache import cache
+from app.core.metrics import PROMETHEUS_CONTENT_TYPE, registry
+from app.crud.crud_statistics import dashboard_cache_stats
+from app.db.database import engine
+from app.db.pool_metrics import pool_metrics
+from app.schemas.monitoring import CacheStatus, DatabasePoolStatus, StreamStatus
+
+router = APIRouter()
+metrics_router = APIRouter() # GET /metrics，挂载在应用根路径
+
+@router.get(
+    "/db-pool",
+    response_model=DatabasePoolStatus,
+    summary="获取数据库连接池状态",
+    description="返回当前 worker 进程的连接池使用情况 (已借出、空闲、溢出连接数) 以及获取连接的等待时间和超时次数，用于根据数据库容量调整 worker 数和连接池大小。"
+)
+async def read_db_pool_status():
+    return pool_metrics.snapshot(engine.sync_engine)
+
+
+@router.get(
+    "/cache",
+    response_model=CacheStatus,
+    summary="获取仪表盘缓存命中情况",
+    description="返回当前 worker 进程中仪表盘概要缓存的命中、未命中和失效次数。"
+)
+async def read_cache_status():
+    return {"backend": cache.name, **dashboard_cache_stats.snapshot()}
+
+
+@router.get(
+    "/stream",
+    response_model=StreamStatus,
+    summary="获取库存变化推送的订阅情况",
+    description="返回当前 worker 进程中库存变化推送 (GET /inventory-balances/stream) 的订阅连接数、累计发布的变化数和缓冲溢出次数。"
+)
+async def read_stream_status():
+    return balance_broker.snapshot()
+
+
+# ---- Prometheus 指标 ----
+# 连接池、缓存和推送的状态在抓取时读取，与上面各 JSON 接口的数据来源相同
+def _collect_runtime_metrics():
+    pool = pool_metrics.snapshot(engine.sync_engine)
+    cache_stats = dashboard_cache_stats.snapshot()
+    stream = balance_broker.snapshot()
+    return [
+        ("db_pool_checked_out", "gauge", "当前被请求占用的连接数", pool["checked_out"]),
+        ("db_pool_idle", "gauge", "当前空闲在池中的连接数", pool["idle"]),
+        ("db_pool_overflow", "gauge", "当前超出常驻连接数的溢出连接数", pool["overflow"]),
+        ("db_pool_connections_opened_total", "counter", "累计新建的数据库连接数", pool["connections_opened"]),
+        ("db_pool_connections_invalidated_total", "counter", "累计失效的连接数", pool["connections_invalidated"]),
+        ("db_pool_acquisitions_total", "counter", "累计成功获取连接的次数", pool["acquisitions"]),
+        ("db_pool_acquire_timeouts_total", "counter", "累计等待连接超时的次数", pool["acquire_timeouts"]),
+        ("db_pool_acquire_wait_seconds_total", "counter", "获取连接的累计等待时间", pool_metrics.acquire_wait_total),
+        ("dashboard_cache_hits_total", "counter", "仪表盘概要缓存累计命中次数", cache_stats["hits"]),
+        ("dashboard_cache_misses_total", "counter", "仪表盘概要缓存累计未命中次数", cache_stats["misses"]),
+        ("dashboard_cache_invalidations_total", "counter", "仪表盘概要缓存累计失效次数", cache_stats["invalidations"]),
+        ("balance_stream_subscribers", "gauge", "库存变化推送的当前订阅连接数", stream["subscribers"]),
+        ("balance_stream_published_total", "counter", "累计发布的库存变化数", stream["published"]),
+        ("balance_stream_overflows_total", "counter", "累计因缓冲溢出而要求客户端重新同步的次数", stream["overflows"]),
+    ]
+
+
+registry.register_collector(_collect_runtime_metrics)
+
+
+@metrics_router.get("/metrics", include_in_schema=False)
+async def read_metrics():
+    # 当前 worker 进程的指标 (Prometheus 文本格式)；多 worker 部署时每个进程各自累计
+    return Response(registry.render(), media_type=PROMETHEUS_CONTENT_TYPE)
@@ -1,9 +1,12 @@
-from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
+from datetime import date
+from typing import Literal, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.db.database import get_db # 获取数据库会话的依赖项
 from app.crud import crud_statistics # 导入上面创建的 CRUD 函数
-from app.schemas.statistics import DashboardSummary # 导入响应模型 Schema
+from app.schemas.statistics import DashboardSummary, MovementStatistics # 导入响应模型 Schema
 
 router = APIRouter()
 
@@ -11,10 +14,10 @@ router = APIRouter()
     "/dashboard-summary",
     response_model=DashboardSummary, # 指定响应的数据模型
     summary="获取仪表盘概要统计数据",
-    description="提供物资种类总数、当前库存总量和库存预警数量等仪表盘核心指标。"
+    description="提供物资种类总数、当前库存总量和库存预警数量等仪表盘核心指标。结果会被缓存，写操作后自动失效。"
 )
-def read_dashboard_summary(
-    db: Session = Depends(get_db)
+async def read_dashboard_summary(
+    # 不依赖 get_db：缓存命中时不需要数据库连接，未命中时由 get_cached_dashboard_summary 自行打开会话
     # current_user: schemas.user.User = Depends(get_current_active_user) # 如果需要用户认证
 ):
     """
@@ -23,5 +26,28 @@ def read_dashboard_summary(
     - **total_stock_quantity**: 所有物资当前库存数量的总和。
     - **stock_alert_count**: 当前库存量低于最小库存预警线的物资种类数量。
     """
-    summary_data = crud_statistics.get_dashboard_summary_data(db)
-    return summary_data # FastAPI 会自动将字典转换为 DashboardSummary Schema (如果匹配)
\ No newline at end of file
+    summary_data = await crud_statistics.get_cached_dashboard_summary() # 读缓存，物资/出入库/库存写操作会使其失效
+    return summary_data # FastAPI 会自动将字典转换为 DashboardSummary Schema (如果匹配)
+
+@router.get(
+    "/movements",
+    response_model=MovementStatistics,
+    summary="按日/周/月统计出入库数量",
+    description="返回每个统计周期的入库、出库数量和记录条数，数据来自每日出入库汇总表，可按物资和日期范围过滤。同时给定开始和结束日期时，区间最多包含 1000 个统计周期。"
+)
+async def read_movement_statistics(
+    granularity: Literal["day", "week", "month"] = Query("day", description="统计粒度：day / week / month"),
+    material_id: Optional[int] = Query(None, description="按物资ID过滤，不传则统计全部物资"),
+    start: Optional[date] = Query(None, description="开始日期 (含)"),
+    end: Optional[date] = Query(None, description="结束日期 (含)"),
+    db: AsyncSession = Depends(get_db)
+):
+    if start is not None and end is not None and start > end:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="开始日期不能晚于结束日期。")
+    if start is not None and end is not None and crud_statistics.count_movement_buckets(start, end, granularity) > crud_statistics.MAX_MOVEMENT_BUCKETS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"统计区间过长：最多返回 {crud_statistics.MAX_MOVEMENT_BUCKETS} 个统计周期，请缩小日期范围或改用更粗的统计粒度。"
+        )
+    buckets = await crud_statistics.get_movement_statistics(db, granularity=granularity, material_id=material_id, start=start, end=end)
+    return {"granularity": granularity, "material_id": material_id, "start": start, "end": end, "buckets": buckets}
@@ -20,3 +20,13 @@ class InboundRecord(InboundRecordBase):
     class Config:
         orm_mode = True
 
+# 批量入库结果：按物资汇总本次增加的数量和入库后的库存
+class InboundBatchMaterialResult(BaseModel):
+    material_id: int
+    quantity_added: int
+    current_quantity: int
+
+class InboundRecordBatchResult(BaseModel):
+    created_count: int = Field(..., description="本次创建的入库记录条数")
+    total_quantity: int = Field(..., description="本次入库的总数量")
+    materials: List[InboundBatchMaterialResult] = Field(default_factory=list, description="各物资的入库汇总")
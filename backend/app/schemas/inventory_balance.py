@@ -25,3 +25,20 @@ class InventoryBalance(InventoryBalanceBase):
     class Config:
         orm_mode = True 
 
+# 指定时点的库存数量 (由最近一次库存快照加上之后的出入库流水计算)
+class InventoryBalanceAsOf(BaseModel):
+    material_id: int
+    as_of: datetime = Field(..., description="查询的时间点")
+    quantity: int = Field(..., description="该时间点的库存数量")
+    snapshot_time: Optional[datetime] = Field(None, description="计算所依据的库存快照时间点，为空表示从全部流水累加")
+
+# 库存预警 (当前库存低于最低库存阈值)
+class StockAlert(BaseModel):
+    material_id: int
+    current_quantity: int = Field(..., description="当前库存数量")
+    min_stock_level: int = Field(..., description="最低库存阈值")
+    shortage: int = Field(..., description="缺口 (最低库存阈值 - 当前库存数量)")
+    material: Optional[Material] = None
+
+    class Config:
+        from_attributes = True
@@ -44,7 +44,26 @@ class Material(MaterialResponse):
 
 class MaterialPage(BaseModel):
     items: list[Material]
-    total: int
+    total: Optional[int] = Field(None, description="符合条件的物资总数；with_total=false 时不计算，返回 null")
     page: int
     size: int
-    pages: int
\ No newline at end of file
+    pages: Optional[int] = Field(None, description="总页数；total 为 null 时同样为 null")
+    has_more: bool = Field(False, description="之后是否还有数据 (多取一行判断，不依赖 total)")
+# 自动补全的候选物资 (只包含必要字段)
+class MaterialSuggestion(BaseModel):
+    id: int
+    code: str
+    name: str
+
+# 批量导入时单行的错误信息
+class MaterialImportRowError(BaseModel):
+    row: int = Field(..., description="导入文件中的行号 (表头为第 1 行)")
+    code: Optional[str] = Field(None, description="该行的物资编码")
+    message: str = Field(..., description="错误原因")
+
+# 批量导入结果：成功的行已写入，失败的行逐行列出原因
+class MaterialImportResult(BaseModel):
+    total_rows: int = Field(..., description="文件中的数据行数 (不含空行)")
+    created_count: int = Field(..., description="成功创建的物资数量")
+    error_count: int = Field(..., description="失败的行数")
+    errors: list[MaterialImportRowError] = Field(default_factory=list, description="失败行的明细")
@@ -0,0 +1,35 @@
+from pydantic import BaseModel, Field
+from typing import Optional
+
+# 数据库连接池状态与累计指标
+class DatabasePoolStatus(BaseModel):
+    pool_class: str = Field(..., description="连接池实现类")
+    pool_size: Optional[int] = Field(None, description="常驻连接数上限")
+    max_overflow: Optional[int] = Field(None, description="允许的溢出连接数上限")
+    checked_out: Optional[int] = Field(None, description="当前被请求占用的连接数")
+    idle: Optional[int] = Field(None, description="当前空闲在池中的连接数")
+    overflow: Optional[int] = Field(None, description="当前超出常驻连接数的溢出连接数")
+    connections_opened: int = Field(..., description="累计新建的数据库连接数")
+    connections_invalidated: int = Field(..., description="累计失效 (pre-ping 失败、连接断开等) 的连接数")
+    acquisitions: int = Field(..., description="累计成功获取连接的次数")
+    acquire_timeouts: int = Field(..., description="累计等待连接超时的次数")
+    acquire_wait_avg_ms: float = Field(..., description="获取连接的平均等待时间 (毫秒)")
+    acquire_wait_max_ms: float = Field(..., description="获取连接的最长等待时间 (毫秒)")
+
+
+# 仪表盘概要缓存的命中统计
+class CacheStatus(BaseModel):
+    backend: str = Field(..., description="缓存后端 (memory / redis)")
+    hits: int = Field(..., description="累计命中次数")
+    misses: int = Field(..., description="累计未命中次数 (需查询数据库)")
+    invalidations: int = Field(..., description="累计因写操作失效的次数")
+    hit_ratio: float = Field(..., description="命中率")
+
+
+# 库存变化推送 (SSE) 的订阅情况
+class StreamStatus(BaseModel):
+    subscribers: int = Field(..., description="当前订阅连接数")
+    max_subscribers: int = Field(..., description="订阅连接数上限")
+    buffer_size: int = Field(..., description="每个订阅者待发送的物资数上限")
+    published: int = Field(..., description="累计发布的库存变化数")
+    overflows: int = Field(..., description="累计因缓冲溢出而要求客户端重新同步的次数")
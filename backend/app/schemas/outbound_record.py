@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import Optional
+from typing import List, Literal, Optional
 from datetime import datetime
 from app.schemas.material import Material as MaterialSchema
 
@@ -22,4 +22,21 @@ class OutboundRecord(OutboundRecordBase):
     material: Optional[MaterialSchema] = None # 关联的物资信息
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+# 多行出库单：所有明细在一个事务中出库，任一行失败则整单回滚
+class OutboundOrderCreate(BaseModel):
+    lines: List[OutboundRecordCreate] = Field(..., min_length=1, description="出库明细，每行对应一条出库记录")
+
+# 出库单中单行的处理结果
+class OutboundOrderLineResult(BaseModel):
+    line_no: int = Field(..., description="明细行号，从 1 开始")
+    material_id: int
+    requested_quantity: int = Field(..., description="本行申请出库数量")
+    available_quantity: Optional[int] = Field(None, description="出库前该物资的可用库存")
+    status: Literal["ok", "insufficient", "not_found"]
+    record_id: Optional[int] = Field(None, description="成功时生成的出库记录 ID")
+
+class OutboundOrderResult(BaseModel):
+    success: bool
+    lines: List[OutboundOrderLineResult]
@@ -1,5 +1,8 @@
 # app/schemas/statistics.py
-from pydantic import BaseModel
+from datetime import date
+from typing import List, Literal, Optional
+
+from pydantic import BaseModel, Field
 
 class DashboardSummary(BaseModel):
     material_types_count: int
@@ -7,4 +10,20 @@ class DashboardSummary(BaseModel):
     stock_alert_count: int
 
     class Config:
-        from_attributes = True # Pydantic V2 (或 orm_mode = True for V1)
\ No newline at end of file
+        from_attributes = True # Pydantic V2 (或 orm_mode = True for V1)
+
+# 单个统计周期 (日/周/月) 的出入库汇总
+class MovementBucket(BaseModel):
+    period_start: date = Field(..., description="统计周期的第一天 (按周统计时为周一)")
+    inbound_quantity: int = Field(..., description="入库数量")
+    inbound_count: int = Field(..., description="入库记录条数")
+    outbound_quantity: int = Field(..., description="出库数量")
+    outbound_count: int = Field(..., description="出库记录条数")
+    net_quantity: int = Field(..., description="净变化量 (入库 - 出库)")
+
+class MovementStatistics(BaseModel):
+    granularity: Literal["day", "week", "month"]
+    material_id: Optional[int] = None
+    start: Optional[date] = None
+    end: Optional[date] = None
+    buckets: List[MovementBucket] = Field(default_factory=list)
@@ -0,0 +1,2 @@
+# 性能基准测试与并发测试脚本
+# 在 backend 目录下运行，例如: python -m benchmarks.concurrent_outbound
@@ -0,0 +1,87 @@
+# 并发出库测试：多个并发任务同时对同一物资扣减库存，
+# 输出吞吐量，并校验最终库存 = 初始库存 - 成功扣减量 且不为负 (即没有超卖)
+import argparse
+import asyncio
+import time
+
+from benchmarks.common import configure_database, reset_schema, report
+
+
+async def run(args, db_url: str) -> None:
+    from fastapi import HTTPException
+    from sqlalchemy import select
+    from app.db.database import SessionLocal, engine
+    from app.models.material import Material
+    from app.models.inventory_balance import InventoryBalance
+    from app.crud.crud_inventory_balance import update_inventory_balance_quantity
+
+    async with SessionLocal() as db:
+        material = Material(code="HOT-001", name="热点物资")
+        material.inventory_balance = InventoryBalance(current_quantity=args.initial)
+        db.add(material)
+        await db.commit()
+        material_id = material.id
+
+    succeeded = rejected = errors = 0
+    start_event = asyncio.Event()
+
+    async def worker() -> None:
+        nonlocal succeeded, rejected, errors
+        await start_event.wait()
+        for _ in range(args.ops):
+            async with SessionLocal() as db:
+                try:
+                    await update_inventory_balance_quantity(db, material_id=material_id, quantity_change=-1)
+                    await db.commit()
+                    succeeded += 1
+                except HTTPException:
+                    await db.rollback()
+                    rejected += 1
+                except Exception:
+                    await db.rollback()
+                    errors += 1
+
+    tasks = [asyncio.create_task(worker()) for _ in range(args.concurrency)]
+    started = time.perf_counter()
+    start_event.set()
+    await asyncio.gather(*tasks)
+    elapsed = time.perf_counter() - started
+
+    async with SessionLocal() as db:
+        final_quantity = await db.scalar(
+            select(InventoryBalance.current_quantity).where(InventoryBalance.material_id == material_id)
+        )
+    await engine.dispose()
+
+    total_ops = args.concurrency * args.ops
+    report(
+        "concurrent_outbound",
+        db_url=db_url.split("@")[-1],
+        concurrency=args.concurrency,
+        operations=total_ops,
+        succeeded=succeeded,
+        rejected=rejected,
+        errors=errors,
+        seconds=round(elapsed, 3),
+        ops_per_second=round(total_ops / elapsed, 1),
+        initial_quantity=args.initial,
+        final_quantity=final_quantity,
+        correct=final_quantity == args.initial - succeeded and final_quantity >= 0,
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="同一物资的并发出库测试")
+    parser.add_argument("--db-url", default=None, help="数据库连接串，默认使用临时 SQLite 文件")
+    parser.add_argument("--concurrency", type=int, default=16, help="并发任务数")
+    parser.add_argument("--ops", type=int, default=200, help="每个任务的出库次数")
+    parser.add_argument("--initial", type=int, default=2000, help="初始库存，小于总出库量时可验证不会超卖")
+    args = parser.parse_args()
+
+    db_url = configure_database(args.db_url)
+    reset_schema()
+    asyncio.run(run(args, db_url))
+
+
+if __name__ == "__main__":
+    main()
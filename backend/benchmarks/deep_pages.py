@@ -0,0 +1,72 @@
+# 深分页对比：在 N 条入库记录上分别测量偏移分页第一页、偏移分页最后一页、
+# 以及游标分页在同样深度的一页的查询耗时 (取多次运行的中位数)
+import argparse
+import asyncio
+import statistics
+import time
+from datetime import datetime, timedelta
+
+from benchmarks.common import configure_database, reset_schema, report
+
+
+async def run(args, db_url: str) -> None:
+    from sqlalchemy import insert
+    from app.db.database import SessionLocal, engine
+    from app.models.material import Material
+    from app.models.inbound_record import InboundRecord
+    from app.crud.crud_inbound_record import get_inbound_records
+
+    base_time = datetime(2020, 1, 1)
+    async with SessionLocal() as db:
+        db.add(Material(code="PAGE-001", name="分页测试物资"))
+        await db.commit()
+        chunk = 50_000
+        for start in range(0, args.rows, chunk):
+            await db.execute(insert(InboundRecord), [
+                {"id": i + 1, "material_id": 1, "quantity": 1, "inbound_time": base_time + timedelta(seconds=i)}
+                for i in range(start, min(start + chunk, args.rows))
+            ])
+        await db.commit()
+
+    async def measure(**kwargs) -> float:
+        samples = []
+        for _ in range(args.repeat):
+            async with SessionLocal() as db:
+                started = time.perf_counter()
+                rows = await get_inbound_records(db, limit=args.limit, **kwargs)
+                samples.append(time.perf_counter() - started)
+            assert len(rows) == args.limit
+        return round(statistics.median(samples) * 1000, 3)
+
+    # 记录 id 与时间同序递增，倒序第 p 行 (从 0 计) 的 id 为 rows - p；最后一页从 deep_offset 开始
+    deep_offset = args.rows - args.limit
+    cursor_row = args.rows - deep_offset + 1
+    deep_cursor = (base_time + timedelta(seconds=cursor_row - 1), cursor_row)
+
+    report(
+        "deep_pages",
+        db_url=db_url.split("@")[-1],
+        rows=args.rows,
+        limit=args.limit,
+        offset_first_page_ms=await measure(skip=0),
+        offset_last_page_ms=await measure(skip=deep_offset),
+        cursor_last_page_ms=await measure(cursor=deep_cursor),
+    )
+    await engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="偏移分页与键集分页的深分页耗时对比")
+    parser.add_argument("--db-url", default=None, help="数据库连接串，默认使用临时 SQLite 文件")
+    parser.add_argument("--rows", type=int, default=1_000_000, help="入库记录条数")
+    parser.add_argument("--limit", type=int, default=100, help="每页条数")
+    parser.add_argument("--repeat", type=int, default=5, help="每种分页重复测量的次数")
+    args = parser.parse_args()
+
+    db_url = configure_database(args.db_url)
+    reset_schema()
+    asyncio.run(run(args, db_url))
+
+
+if __name__ == "__main__":
+    main()
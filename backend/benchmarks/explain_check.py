@@ -0,0 +1,113 @@
+# 执行计划检查：抓取列表/导出接口实际执行的 SQL，对其执行 EXPLAIN，确认使用了预期的索引且没有额外排序
+# SQLite 使用 EXPLAIN QUERY PLAN，MySQL/PostgreSQL 使用 EXPLAIN；任一查询未使用预期索引时以非零状态码退出
+import argparse
+import asyncio
+import random
+import sys
+
+from benchmarks.common import configure_database, reset_schema, report
+
+# 执行计划中表示额外排序的标记
+SORT_MARKERS = ("TEMP B-TREE", "Using filesort", "Sort")
+
+
+class StatementCapture:
+    def __init__(self) -> None:
+        self.statements: list[tuple[str, object]] = []
+
+    def __call__(self, conn, cursor, statement, parameters, context, executemany) -> None:
+        if not executemany:
+            self.statements.append((statement, parameters))
+
+    # 最近一条包含 marker 的 SELECT 语句
+    def last(self, marker: str) -> tuple[str, object]:
+        for statement, parameters in reversed(self.statements):
+            if statement.lstrip().upper().startswith("SELECT") and marker in statement:
+                return statement, parameters
+        raise LookupError(f"没有捕获到包含 {marker!r} 的查询")
+
+
+def populate(client) -> list[int]:
+    api = "/api/v1"
+    rng = random.Random(7)
+    material_ids = [
+        client.post(f"{api}/materials/", json={"code": f"EX-{i:04d}", "name": f"物资 {i}"}).json()["id"]
+        for i in range(100)
+    ]
+    for material_id in material_ids[::10]:
+        client.put(f"{api}/inventory-balances/material/{material_id}", json={"min_stock_level": 1000})
+    for _ in range(20):
+        client.post(f"{api}/inbound-records/batch", json=[{"material_id": rng.choice(material_ids), "quantity": 50} for _ in range(100)])
+    for _ in range(300):
+        client.post(f"{api}/outbound-records/", json={"material_id": rng.choice(material_ids), "quantity": 1})
+    return material_ids
+
+
+async def explain(statement: str, parameters) -> str:
+    from app.db.database import engine
+
+    prefix = "EXPLAIN QUERY PLAN " if engine.dialect.name == "sqlite" else "EXPLAIN "
+    async with engine.connect() as conn:
+        rows = (await conn.exec_driver_sql(prefix + statement, parameters)).all()
+    await engine.dispose()
+    return "\n".join(" ".join(str(value) for value in row) for row in rows)
+
+
+def check(name: str, statement: str, parameters, expected_index: str, allow_sort: bool = False) -> bool:
+    plan = asyncio.run(explain(statement, parameters))
+    uses_index = expected_index in plan
+    sorts = any(marker in plan for marker in SORT_MARKERS)
+    ok = uses_index and (allow_sort or not sorts)
+    report("explain_check", query=name, expected_index=expected_index, uses_index=uses_index, extra_sort=sorts, ok=ok, plan=plan)
+    return ok
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="列表/导出查询的执行计划检查")
+    parser.add_argument("--db-url", default=None, help="数据库连接串，默认使用临时 SQLite 文件")
+    args = parser.parse_args()
+
+    configure_database(args.db_url)
+    reset_schema()
+
+    from fastapi.testclient import TestClient
+    from sqlalchemy import event
+    from app.main import app
+    from app.db.database import SessionLocal, engine
+    from app.crud.crud_inventory_summary import compute_inventory_summary
+
+    capture = StatementCapture()
+    api = "/api/v1"
+    cases = []
+    with TestClient(app) as client:
+        material_ids = populate(client)
+        hot = material_ids[0]
+        event.listen(engine.sync_engine, "before_cursor_execute", capture)
+        for ledger, time_column in (("inbound", "inbound_time"), ("outbound", "outbound_time")):
+            table = f"{ledger}_records"
+            endpoint = f"{api}/{ledger}-records/"
+            response = client.get(endpoint, params={"limit": 20, "include_material": False})
+            cases.append((f"{ledger} list", capture.last(f"FROM {table}"), f"ix_{table}_{time_column}_id"))
+            response = client.get(endpoint, params={"limit": 1, "material_id": hot, "include_material": False})
+            cases.append((f"{ledger} list by material", capture.last(f"FROM {table}"), f"ix_{table}_material_id_{time_column}"))
+            client.get(endpoint, params={"limit": 1, "material_id": hot, "include_material": False, "cursor": response.headers["X-Next-Cursor"]})
+            cases.append((f"{ledger} list by material (cursor)", capture.last(f"FROM {table}"), f"ix_{table}_material_id_{time_column}"))
+            client.get(f"{endpoint}export", params={"material_id": hot})
+            cases.append((f"{ledger} export by material", capture.last(f"FROM {table}"), f"ix_{table}_material_id_{time_column}"))
+
+    async def capture_alert_count() -> None:
+        async with SessionLocal() as db:
+            await compute_inventory_summary(db)
+        await engine.dispose()
+
+    asyncio.run(capture_alert_count())
+    event.remove(engine.sync_engine, "before_cursor_execute", capture)
+    if engine.dialect.name in ("sqlite", "postgresql"): # 部分索引只在这两种数据库上创建
+        cases.append(("stock alert count", capture.last("min_stock_level >"), "ix_inventory_balance_below_min"))
+
+    ok = all([check(name, statement, parameters, index) for name, (statement, parameters), index in cases])
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+# 批量入库 vs 逐条入库：同样的 N 行入库明细，分别用 N 次 POST /inbound-records/
+# 和一次 POST /inbound-records/batch 写入，对比耗时、SQL 语句数和提交次数
+import argparse
+import random
+import time
+
+from benchmarks.common import configure_database, reset_schema, report
+
+
+def run(client, args) -> None:
+    api = "/api/v1"
+    material_ids = [
+        client.post(f"{api}/materials/", json={"code": f"BENCH-{i:05d}", "name": f"物资 {i}"}).json()["id"]
+        for i in range(args.materials)
+    ]
+    rng = random.Random(42)
+    lines = [{"material_id": rng.choice(material_ids), "quantity": rng.randint(1, 20)} for _ in range(args.lines)]
+
+    queries = commits = 0
+    started = time.perf_counter()
+    for line in lines:
+        response = client.post(f"{api}/inbound-records/", json=line)
+        response.raise_for_status()
+        queries += int(response.headers["X-DB-Queries"])
+        commits += int(response.headers["X-DB-Commits"])
+    single_seconds = time.perf_counter() - started
+    report(
+        "inbound_single",
+        lines=args.lines,
+        seconds=round(single_seconds, 3),
+        lines_per_second=round(args.lines / single_seconds, 1),
+        queries=queries,
+        commits=commits,
+    )
+
+    started = time.perf_counter()
+    response = client.post(f"{api}/inbound-records/batch", json=lines)
+    response.raise_for_status()
+    batch_seconds = time.perf_counter() - started
+    report(
+        "inbound_batch",
+        lines=args.lines,
+        seconds=round(batch_seconds, 3),
+        lines_per_second=round(args.lines / batch_seconds, 1),
+        queries=int(response.headers["X-DB-Queries"]),
+        commits=int(response.headers["X-DB-Commits"]),
+        speedup=round(single_seconds / batch_seconds, 1),
+    )
+
+    # 两轮写入了相同的明细，每种物资的库存应为其明细数量之和的两倍
+    expected: dict[int, int] = {}
+    for line in lines:
+        expected[line["material_id"]] = expected.get(line["material_id"], 0) + 2 * line["quantity"]
+    balances = {b["material_id"]: b["current_quantity"] for b in client.get(f"{api}/inventory-balances/", params={"limit": 200}).json()}
+    report("inbound_consistency", correct=all(balances.get(m, 0) == q for m, q in expected.items()))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="批量入库与逐条入库对比")
+    parser.add_argument("--db-url", default=None, help="数据库连接串，默认使用临时 SQLite 文件")
+    parser.add_argument("--lines", type=int, default=1000, help="入库明细行数")
+    parser.add_argument("--materials", type=int, default=50, help="明细涉及的物资种类数")
+    args = parser.parse_args()
+
+    configure_database(args.db_url)
+    reset_schema()
+
+    from fastapi.testclient import TestClient
+    from app.main import app
+
+    with TestClient(app) as client:
+        run(client, args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+# 列表接口的 SQL 语句数检查：同一接口取 1 条和 200 条时执行的语句数应当相同 (不随行数增长，即没有 N+1)
+# 语句数取自响应头 X-DB-Queries；发现语句数随行数增长时以非零状态码退出
+import argparse
+import sys
+
+from benchmarks.common import configure_database, reset_schema, report
+
+LIST_ENDPOINTS = ["/inbound-records/", "/outbound-records/", "/inventory-balances/"]
+
+
+def run(client) -> bool:
+    api = "/api/v1"
+    material_ids = [
+        client.post(f"{api}/materials/", json={"code": f"N1-{i:04d}", "name": f"物资 {i}"}).json()["id"]
+        for i in range(200)
+    ]
+    client.post(f"{api}/inbound-records/batch", json=[{"material_id": m, "quantity": 10} for m in material_ids])
+    for material_id in material_ids:
+        client.post(f"{api}/outbound-records/", json={"material_id": material_id, "quantity": 1})
+
+    constant = True
+    for endpoint in LIST_ENDPOINTS:
+        for include_material in (True, False):
+            counts = {}
+            for limit in (1, 200):
+                response = client.get(f"{api}{endpoint}", params={"limit": limit, "include_material": include_material})
+                response.raise_for_status()
+                assert len(response.json()) == limit
+                counts[limit] = int(response.headers["X-DB-Queries"])
+            constant = constant and counts[1] == counts[200]
+            report(
+                "list_query_count",
+                endpoint=endpoint,
+                include_material=include_material,
+                queries_1_row=counts[1],
+                queries_200_rows=counts[200],
+            )
+
+    return constant
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="列表接口 SQL 语句数检查")
+    parser.add_argument("--db-url", default=None, help="数据库连接串，默认使用临时 SQLite 文件")
+    args = parser.parse_args()
+
+    configure_database(args.db_url)
+    reset_schema()
+
+    from fastapi.testclient import TestClient
+    from app.main import app
+
+    with TestClient(app) as client:
+        constant = run(client)
+    sys.exit(0 if constant else 1)
+
+
+if __name__ == "__main__":
+    main()
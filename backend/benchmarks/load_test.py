@@ -0,0 +1,105 @@
+# 并发负载测试：模拟大量并发客户端 (默认 500 个) 以读为主、夹带少量入库写入的混合请求，
+# 输出吞吐量和 p50/p95/p99 延迟。
+# 默认通过 ASGI 在进程内驱动应用；传入 --base-url 时改为请求已启动的服务 (例如 uvicorn app.main:app --workers 1)，
+# 可以分别对同步版本和异步版本的服务运行，比较同样并发下的延迟分布
+import argparse
+import asyncio
+import random
+import time
+
+import httpx
+
+from benchmarks.common import configure_database, latency_summary, report
+
+API = "/api/v1"
+
+
+async def seed(client: httpx.AsyncClient, materials: int) -> list[int]:
+    material_ids = []
+    for i in range(materials):
+        response = await client.post(f"{API}/materials/", json={"code": f"LOAD-{i:05d}-{random.randrange(10**9)}", "name": f"负载物资 {i}"})
+        response.raise_for_status()
+        material_ids.append(response.json()["id"])
+    response = await client.post(f"{API}/inbound-records/batch", json=[{"material_id": m, "quantity": 1000} for m in material_ids])
+    response.raise_for_status()
+    return material_ids
+
+
+async def drive(client: httpx.AsyncClient, args, material_ids: list[int]) -> None:
+    latencies: list[float] = []
+    errors = 0
+    start_event = asyncio.Event()
+
+    async def one_client(index: int) -> None:
+        nonlocal errors
+        rng = random.Random(index)
+        await start_event.wait()
+        for _ in range(args.requests):
+            material_id = rng.choice(material_ids)
+            roll = rng.random()
+            started = time.perf_counter()
+            try:
+                if roll < 0.35:
+                    response = await client.get(f"{API}/materials/{material_id}")
+                elif roll < 0.70:
+                    response = await client.get(f"{API}/inventory-balances/material/{material_id}")
+                elif roll < 0.90:
+                    response = await client.get(f"{API}/inbound-records/", params={"material_id": material_id, "limit": 20})
+                else:
+                    response = await client.post(f"{API}/inbound-records/", json={"material_id": material_id, "quantity": 1})
+                if response.status_code >= 400:
+                    errors += 1
+            except httpx.HTTPError:
+                errors += 1
+            latencies.append(time.perf_counter() - started)
+
+    tasks = [asyncio.create_task(one_client(i)) for i in range(args.clients)]
+    started = time.perf_counter()
+    start_event.set()
+    await asyncio.gather(*tasks)
+    elapsed = time.perf_counter() - started
+    pool_status = (await client.get(f"{API}/monitoring/db-pool")).json()
+
+    report(
+        "load_test",
+        target=args.base_url or "in-process",
+        clients=args.clients,
+        requests=len(latencies),
+        errors=errors,
+        seconds=round(elapsed, 3),
+        requests_per_second=round(len(latencies) / elapsed, 1),
+        **latency_summary(latencies),
+        db_pool=pool_status,
+    )
+
+
+async def run(args) -> None:
+    limits = httpx.Limits(max_connections=args.clients, max_keepalive_connections=args.clients)
+    if args.base_url:
+        async with httpx.AsyncClient(base_url=args.base_url, limits=limits, timeout=120) as client:
+            await drive(client, args, await seed(client, args.materials))
+        return
+
+    from app.main import app
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", limits=limits, timeout=120) as client:
+            await drive(client, args, await seed(client, args.materials))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="并发负载测试")
+    parser.add_argument("--base-url", default=None, help="被测服务地址，例如 http://127.0.0.1:8000；不填则在进程内驱动应用")
+    parser.add_argument("--db-url", default=None, help="进程内模式使用的数据库连接串，默认使用临时 SQLite 文件")
+    parser.add_argument("--clients", type=int, default=500, help="并发客户端数")
+    parser.add_argument("--requests", type=int, default=20, help="每个客户端发出的请求数")
+    parser.add_argument("--materials", type=int, default=200, help="预先创建的物资数")
+    args = parser.parse_args()
+
+    if not args.base_url:
+        configure_database(args.db_url)
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
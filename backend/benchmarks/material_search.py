@@ -0,0 +1,89 @@
+# 物资子串搜索：在 N 种物资上对比片段倒排索引 (material_search_grams) 与前导通配符 ILIKE 全表扫描的查询耗时
+# 查询词取自已有物资编码/名称的片段，每次查询返回按相关度排序的前 20 条
+import argparse
+import asyncio
+import random
+import string
+import time
+
+from benchmarks.common import configure_database, latency_summary, report
+
+NAME_WORDS = [
+    "螺丝", "螺母", "垫片", "轴承", "齿轮", "电机", "阀门", "法兰", "管件", "弹簧", "链条", "皮带", "滤芯", "密封圈",
+    "传感器", "继电器", "接触器", "断路器", "变压器", "电缆", "开关", "插座", "灯管", "手套", "口罩", "胶带", "油漆", "焊条",
+]
+
+
+def _material_row(rng: random.Random, i: int) -> dict:
+    code = "".join(rng.choices(string.ascii_uppercase, k=3)) + "-" + "".join(rng.choices(string.digits + string.ascii_uppercase, k=7))
+    spec = f"{rng.choice('MDKSTX')}{rng.randint(1, 999)}x{rng.randint(1, 999)}"
+    return {"code": code, "name": f"{rng.choice(NAME_WORDS)}{rng.choice(NAME_WORDS)} {spec}", "unit": "个"}
+
+
+async def run(args) -> None:
+    from sqlalchemy import func, insert, select
+    from app.db.database import SessionLocal, engine
+    from app.models.material import Material
+    from app.crud.crud_material_search import index_materials, material_search_condition, material_search_order_by
+
+    rng = random.Random(42)
+    started = time.perf_counter()
+    async with SessionLocal() as db:
+        chunk = 20_000
+        for start in range(0, args.materials, chunk):
+            rows = [{"id": i + 1, **_material_row(rng, i)} for i in range(start, min(start + chunk, args.materials))]
+            await db.execute(insert(Material), rows)
+            await index_materials(db, [(row["id"], row["code"], row["name"]) for row in rows])
+            await db.commit()
+    report("material_search_load", materials=args.materials, seconds=round(time.perf_counter() - started, 1))
+
+    # 查询词：随机物资编码中间的 4~6 个字符、名称中的规格部分
+    async with SessionLocal() as db:
+        sample_ids = rng.sample(range(1, args.materials + 1), min(args.queries, args.materials))
+        samples = (await db.execute(select(Material.code, Material.name).where(Material.id.in_(sample_ids)))).all()
+    code_terms = [code[k:k + rng.randint(4, 6)] for code, _ in samples for k in [rng.randint(1, 4)]]
+    name_terms = [name.split(" ")[1][:rng.randint(4, 7)] for _, name in samples]
+
+    async def measure(terms: list[str], use_index: bool, repeat: int) -> tuple[dict, float]:
+        latencies, hits = [], 0
+        async with SessionLocal() as db:
+            for term in terms[:repeat]:
+                if use_index:
+                    query = select(Material).where(material_search_condition(term)).order_by(*material_search_order_by(term))
+                else:
+                    query = select(Material).where((Material.code.ilike(f"%{term}%")) | (Material.name.ilike(f"%{term}%"))).order_by(Material.id.desc())
+                started = time.perf_counter()
+                items = (await db.scalars(query.limit(20))).all()
+                latencies.append(time.perf_counter() - started)
+                hits += len(items)
+        return latency_summary(latencies), round(hits / min(len(terms), repeat), 1)
+
+    for label, terms in (("code_substring", code_terms), ("name_substring", name_terms)):
+        indexed, indexed_hits = await measure(terms, use_index=True, repeat=len(terms))
+        scan, scan_hits = await measure(terms, use_index=False, repeat=args.scan_queries)
+        report(f"material_search_{label}", materials=args.materials, avg_hits=indexed_hits, gram_index=indexed, ilike_scan=scan)
+
+    async with SessionLocal() as db:
+        term = name_terms[0]
+        started = time.perf_counter()
+        total = await db.scalar(select(func.count()).select_from(select(Material.id).where(material_search_condition(term)).subquery()))
+        report("material_search_count", term=term, total=total, ms=round((time.perf_counter() - started) * 1000, 2))
+    await engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="物资子串搜索：片段索引与 ILIKE 全表扫描对比")
+    parser.add_argument("--db-url", default=None, help="数据库连接串，默认使用临时 SQLite 文件")
+    parser.add_argument("--materials", type=int, default=1_000_000, help="物资数量")
+    parser.add_argument("--queries", type=int, default=200, help="使用索引的查询次数")
+    parser.add_argument("--scan-queries", type=int, default=10, help="ILIKE 全表扫描的查询次数 (较慢，次数少一些)")
+    args = parser.parse_args()
+
+    configure_database(args.db_url)
+    from benchmarks.common import reset_schema
+    reset_schema()
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
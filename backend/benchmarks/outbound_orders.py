@@ -0,0 +1,90 @@
+# 多行出库单争用测试：多个并发任务同时提交互相重叠的出库单 (明细顺序随机打乱)，
+# 统计成功/库存不足/错误 (含死锁) 的数量和吞吐量，并校验最终库存与成功出库量一致
+import argparse
+import asyncio
+import random
+import time
+
+from benchmarks.common import configure_database, reset_schema, report
+
+
+async def run(args, db_url: str) -> None:
+    from fastapi import HTTPException
+    from sqlalchemy import select
+    from app.db.database import SessionLocal, engine
+    from app.models.material import Material
+    from app.models.inventory_balance import InventoryBalance
+    from app.crud.crud_outbound_record import create_outbound_order
+    from app.schemas.outbound_record import OutboundOrderCreate, OutboundRecordCreate
+
+    async with SessionLocal() as db:
+        materials = [Material(code=f"HOT-{i:03d}", name=f"热点物资 {i}") for i in range(args.materials)]
+        for material in materials:
+            material.inventory_balance = InventoryBalance(current_quantity=args.initial)
+        db.add_all(materials)
+        await db.commit()
+        material_ids = [material.id for material in materials]
+
+    shipped = dict.fromkeys(material_ids, 0)
+    counts = {"succeeded": 0, "rejected": 0, "errors": 0}
+    start_event = asyncio.Event()
+
+    async def worker(index: int) -> None:
+        rng = random.Random(index)
+        await start_event.wait()
+        for _ in range(args.orders):
+            chosen = rng.sample(material_ids, min(args.lines, len(material_ids)))
+            order = OutboundOrderCreate(lines=[
+                OutboundRecordCreate(material_id=material_id, quantity=rng.randint(1, 10)) for material_id in chosen
+            ])
+            async with SessionLocal() as db:
+                try:
+                    await create_outbound_order(db, order)
+                    counts["succeeded"] += 1
+                    for line in order.lines:
+                        shipped[line.material_id] += line.quantity
+                except HTTPException as e:
+                    counts["rejected" if e.status_code == 400 else "errors"] += 1
+
+    tasks = [asyncio.create_task(worker(i)) for i in range(args.concurrency)]
+    started = time.perf_counter()
+    start_event.set()
+    await asyncio.gather(*tasks)
+    elapsed = time.perf_counter() - started
+
+    async with SessionLocal() as db:
+        final = dict((await db.execute(select(InventoryBalance.material_id, InventoryBalance.current_quantity))).all())
+    await engine.dispose()
+    correct = all(final[m] == args.initial - shipped[m] and final[m] >= 0 for m in material_ids)
+
+    total_orders = args.concurrency * args.orders
+    report(
+        "outbound_orders_contention",
+        db_url=db_url.split("@")[-1],
+        concurrency=args.concurrency,
+        orders=total_orders,
+        lines_per_order=args.lines,
+        **counts,
+        seconds=round(elapsed, 3),
+        orders_per_second=round(total_orders / elapsed, 1),
+        correct=correct,
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="多行出库单争用测试")
+    parser.add_argument("--db-url", default=None, help="数据库连接串，默认使用临时 SQLite 文件")
+    parser.add_argument("--concurrency", type=int, default=16, help="并发任务数")
+    parser.add_argument("--orders", type=int, default=50, help="每个任务提交的出库单数")
+    parser.add_argument("--materials", type=int, default=20, help="热点物资数，出库单都从中挑选物资")
+    parser.add_argument("--lines", type=int, default=10, help="每张出库单的明细行数")
+    parser.add_argument("--initial", type=int, default=2000, help="每种物资的初始库存")
+    args = parser.parse_args()
+
+    db_url = configure_database(args.db_url)
+    reset_schema()
+    asyncio.run(run(args, db_url))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+# 列表接口序列化路径对比 (每个接口、是否包含关联物资分别测量，取多次运行的中位数)：
+#   load_orm_ms / load_rows_ms      查询一页：构建 ORM 对象 (默认路径) / 只查询响应所需的列并转换为字典 (fast=true)
+#   encode_pydantic_ms              响应模型逐行校验 ORM 对象后由 Pydantic 直接编码 JSON (当前 FastAPI 的默认做法)
+#   encode_jsonable_ms              校验后经 jsonable_encoder 再用标准库 json 编码 (旧版本 FastAPI 或未声明响应模型时的做法)
+#   encode_fast_ms                  fast=true 路径：字典直接编码 (安装了 orjson 时使用 orjson)
+#   request_default / request_fast  通过 ASGI 完整请求一次的延迟分位数
+# 同时输出响应体大小及 gzip / br 压缩后的大小，并检查两种路径的响应内容完全相同，不同时以非零状态码退出
+import argparse
+import asyncio
+import gzip
+import json
+import statistics
+import sys
+import time
+
+from benchmarks.common import configure_database, latency_summary, reset_schema, report
+
+ENDPOINTS = {
+    "/inbound-records/": "inbound",
+    "/outbound-records/": "outbound",
+}
+
+
+def _median_ms(func, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - started)
+    return round(statistics.median(samples) * 1000, 3)
+
+
+async def _median_ms_async(func, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        await func()
+        samples.append(time.perf_counter() - started)
+    return round(statistics.median(samples) * 1000, 3)
+
+
+async def seed(args) -> None:
+    from sqlalchemy import insert
+    from app.crud.crud_inventory_summary import rebuild_inventory_summary
+    from app.db.database import SessionLocal
+    from app.models.inbound_record import InboundRecord
+    from app.models.inventory_balance import InventoryBalance
+    from app.models.material import Material
+    from app.models.outbound_record import OutboundRecord
+
+    async with SessionLocal() as db:
+        await db.execute(insert(Material), [
+            {"id": i, "code": f"SER-{i:05d}", "name": f"序列化测试物资 {i}", "model": "M-100", "unit": "个",
+             "supplier": "测试供应商", "remarks": "用于序列化基准测试的物资备注"}
+            for i in range(1, args.materials + 1)
+        ])
+        await db.execute(insert(InventoryBalance), [
+            {"material_id": i, "current_quantity": 1000} for i in range(1, args.materials + 1)
+        ])
+        await db.execute(insert(InboundRecord), [
+            {"material_id": i % args.materials + 1, "quantity": 10, "inbound_order_number": f"IN-{i:08d}", "remarks": "到货入库"}
+            for i in range(args.rows)
+        ])
+        await db.execute(insert(OutboundRecord), [
+            {"material_id": i % args.materials + 1, "quantity": 1, "outbound_order_number": f"OUT-{i:08d}",
+             "recipient": "生产车间", "remarks": "领用出库"}
+            for i in range(args.rows)
+        ])
+        await rebuild_inventory_summary(db)
+
+
+async def measure_encoders(args, endpoint: str, ledger: str, include_material: bool) -> dict:
+    from fastapi.encoders import jsonable_encoder
+    from pydantic import TypeAdapter
+    from app import crud, schemas
+    from app.core.fast_json import dumps
+    from app.db.database import SessionLocal
+
+    get_records = getattr(crud, f"crud_{ledger}_record").__dict__[f"get_{ledger}_records"]
+    adapter = TypeAdapter(list[getattr(schemas, f"{ledger}_record").__dict__[f"{ledger.capitalize()}Record"]])
+
+    async with SessionLocal() as db:
+        records = await get_records(db, limit=args.limit, include_material=include_material)
+        rows = await get_records(db, limit=args.limit, include_material=include_material, as_rows=True)
+        load_orm_ms = await _median_ms_async(lambda: get_records(db, limit=args.limit, include_material=include_material), args.repeat)
+        load_rows_ms = await _median_ms_async(lambda: get_records(db, limit=args.limit, include_material=include_material, as_rows=True), args.repeat)
+
+    return {
+        "load_orm_ms": load_orm_ms,
+        "load_rows_ms": load_rows_ms,
+        "encode_pydantic_ms": _median_ms(lambda: adapter.dump_json(adapter.validate_python(records, from_attributes=True)), args.repeat),
+        "encode_jsonable_ms": _median_ms(
+            lambda: json.dumps(jsonable_encoder(adapter.validate_python(records, from_attributes=True)), ensure_ascii=False).encode("utf-8"),
+            args.repeat
+        ),
+        "encode_fast_ms": _median_ms(lambda: dumps(rows), args.repeat),
+    }
+
+
+def measure_requests(client, args, endpoint: str, include_material: bool) -> tuple[dict, bool]:
+    url = f"/api/v1{endpoint}"
+    params = {"limit": args.limit, "include_material": include_material}
+    results = {}
+    bodies = {}
+    for label, fast in (("default", False), ("fast", True)):
+        samples = []
+        for _ in range(args.repeat):
+            started = time.perf_counter()
+            response = client.get(url, params={**params, "fast": fast}, headers={"Accept-Encoding": "identity"})
+            samples.append(time.perf_counter() - started)
+            response.raise_for_status()
+        bodies[label] = response.content
+        results[f"request_{label}"] = latency_summary(samples)
+
+    body = bodies["fast"]
+    results["body_bytes"] = len(body)
+    results["gzip_bytes"] = len(gzip.compress(body, compresslevel=6))
+    try:
+        import brotli
+        results["br_bytes"] = len(brotli.compress(body, quality=4))
+    except ImportError:
+        results["br_bytes"] = None
+    identical = json.loads(bodies["default"]) == json.loads(bodies["fast"])
+    results["identical"] = identical
+    return results, identical
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="列表接口默认序列化路径与快速路径 (fast=true) 的对比")
+    parser.add_argument("--db-url", default=None, help="数据库连接串，默认使用临时 SQLite 文件")
+    parser.add_argument("--materials", type=int, default=500, help="物资数量")
+    parser.add_argument("--rows", type=int, default=5000, help="入库、出库记录各自的条数")
+    parser.add_argument("--limit", type=int, default=200, help="每页条数")
+    parser.add_argument("--repeat", type=int, default=50, help="每项测量重复的次数")
+    args = parser.parse_args()
+
+    configure_database(args.db_url)
+    reset_schema()
+    asyncio.run(seed(args))
+
+    from fastapi.testclient import TestClient
+    from app.core import fast_json
+    from app.main import app
+
+    all_identical = True
+    with TestClient(app) as client:
+        for endpoint, ledger in ENDPOINTS.items():
+            for include_material in (True, False):
+                encoders = client.portal.call(measure_encoders, args, endpoint, ledger, include_material)
+                requests, identical = measure_requests(client, args, endpoint, include_material)
+                all_identical = all_identical and identical
+                report(
+                    "serialization",
+                    endpoint=endpoint,
+                    include_material=include_material,
+                    limit=args.limit,
+                    json_encoder="orjson" if fast_json.orjson is not None else "json",
+                    **encoders,
+                    **requests,
+                )
+    sys.exit(0 if all_identical else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,352 @@
+# 场景化压测：在合成数据集 (benchmarks.dataset) 上通过 HTTP 接口驱动完整的应用，依次运行以下场景，
+# 每个场景输出请求数、错误数、吞吐量和 p50/p95/p99 延迟：
+#   scan        按物资 (热点偏斜) 用游标分页逐页扫描入库流水
+#   deep_pages  入库/出库流水列表的深页 (偏移分页，页深随机落在后半部分)
+#   dashboard   轮询仪表盘：概要数据、预警列表、带 If-None-Match 的库存余额列表
+#   outbound    并发对热点物资出库 (库存不足返回的 400 计为 rejected，不计为错误)
+# 运行方式：
+#   python -m benchmarks.suite                              进程内通过 ASGI 驱动应用 (默认，临时 SQLite)
+#   python -m benchmarks.suite --serve 4 --processes 4      启动 4 个 worker 的 uvicorn，由 4 个压测进程发出请求
+#   python -m benchmarks.suite --base-url http://127.0.0.1:8000 --processes 4
+#                                                           压测已启动的服务，数据需事先用同样的数据集参数运行 benchmarks.dataset 写入
+# 完整结果为一个 JSON 对象 (--output 写入文件)；传入 --baseline 上一次的结果文件时逐场景对比，
+# p95 延迟上升或吞吐量下降超过 --max-regression 百分比时以非零状态码退出
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import platform
+import random
+import socket
+import subprocess
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+
+import httpx
+
+from benchmarks.common import configure_database, latency_summary, report
+from benchmarks.dataset import MaterialPicker, add_dataset_arguments, prepare_dataset
+
+API = "/api/v1"
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+SCAN_PAGE_SIZE = 200
+LIST_PAGE_SIZE = 50
+
+
+# ---- 场景：每个函数模拟一个客户端，依次发出请求，每个请求交给 record 计时和归类 ----
+
+async def scan(client: httpx.AsyncClient, rng: random.Random, picker: MaterialPicker, args, record) -> None:
+    material_id, cursor = picker.pick(rng), None
+    for _ in range(args.warmup + args.requests):
+        params = {"material_id": material_id, "limit": SCAN_PAGE_SIZE, "include_material": False, "fast": True}
+        if cursor:
+            params["cursor"] = cursor
+        response = await record(client.get(f"{API}/inbound-records/", params=params))
+        cursor = response.headers.get("X-Next-Cursor") if response is not None else None
+        if not cursor: # 扫描完一种物资的流水后换下一种
+            material_id = picker.pick(rng)
+
+
+async def deep_pages(client: httpx.AsyncClient, rng: random.Random, picker: MaterialPicker, args, record) -> None:
+    for _ in range(args.warmup + args.requests):
+        ledger = rng.choice(("inbound-records", "outbound-records"))
+        skip = rng.randrange(args.records // 2, max(args.records - LIST_PAGE_SIZE, args.records // 2 + 1))
+        await record(client.get(f"{API}/{ledger}/", params={"skip": skip, "limit": LIST_PAGE_SIZE}))
+
+
+async def dashboard(client: httpx.AsyncClient, rng: random.Random, picker: MaterialPicker, args, record) -> None:
+    etag = None
+    for i in range(args.warmup + args.requests):
+        step = i % 3
+        if step == 0:
+            await record(client.get(f"{API}/statistics/dashboard-summary"))
+        elif step == 1:
+            await record(client.get(f"{API}/inventory-balances/alerts", params={"limit": 20}))
+        else:
+            headers = {"If-None-Match": etag} if etag else {}
+            response = await record(client.get(f"{API}/inventory-balances/", params={"limit": 20}, headers=headers))
+            if response is not None and response.headers.get("ETag"):
+                etag = response.headers["ETag"]
+
+
+async def outbound(client: httpx.AsyncClient, rng: random.Random, picker: MaterialPicker, args, record) -> None:
+    for _ in range(args.warmup + args.requests):
+        material_id = rng.choice(picker.hot_ids)
+        await record(
+            client.post(f"{API}/outbound-records/", json={"material_id": material_id, "quantity": 1, "recipient": "压测"}),
+            rejected_status=400,
+        )
+
+
+SCENARIOS = {"scan": scan, "deep_pages": deep_pages, "dashboard": dashboard, "outbound": outbound}
+
+
+# ---- 驱动 ----
+
+# 同时启动 args.clients 个客户端运行一个场景，返回原始样本 (多个压测进程的结果由 merge_results 合并)
+async def run_clients(client: httpx.AsyncClient, name: str, args, process_index: int = 0) -> dict:
+    picker = MaterialPicker.from_args(args)
+    latencies: list[float] = []
+    counts = {"errors": 0, "rejected": 0}
+    window = [float("inf"), 0.0] # 计入统计的请求的最早开始、最晚结束时间 (time.time()，可跨进程比较)
+    start_event = asyncio.Event()
+
+    async def one_client(client_index: int) -> None:
+        rng = random.Random(f"{args.seed}-{name}-{process_index}-{client_index}")
+        sent = 0
+
+        async def record(request, rejected_status: int | None = None) -> httpx.Response | None:
+            nonlocal sent
+            sent += 1
+            measured = sent > args.warmup # 每个客户端的前 warmup 个请求用于预热，不计入统计
+            wall_started, started = time.time(), time.perf_counter()
+            response = None
+            try:
+                response = await request
+            except httpx.HTTPError:
+                outcome = "errors"
+            else:
+                if response.status_code == rejected_status:
+                    outcome = "rejected"
+                elif response.status_code >= 400:
+                    outcome = "errors"
+                else:
+                    outcome = None
+            if measured:
+                latencies.append(time.perf_counter() - started)
+                window[0] = min(window[0], wall_started)
+                window[1] = max(window[1], time.time())
+                if outcome is not None:
+                    counts[outcome] += 1
+            return response
+
+        await start_event.wait()
+        await SCENARIOS[name](client, rng, picker, args, record)
+
+    tasks = [asyncio.create_task(one_client(i)) for i in range(args.clients)]
+    start_event.set()
+    await asyncio.gather(*tasks)
+    return {"latencies": latencies, **counts, "started": window[0], "finished": window[1]}
+
+
+def merge_results(parts: list[dict]) -> dict:
+    latencies = [sample for part in parts for sample in part["latencies"]]
+    seconds = max(part["finished"] for part in parts) - min(part["started"] for part in parts)
+    return {
+        "requests": len(latencies),
+        "errors": sum(part["errors"] for part in parts),
+        "rejected": sum(part["rejected"] for part in parts),
+        "seconds": round(seconds, 3),
+        "requests_per_second": round(len(latencies) / seconds, 1) if seconds > 0 else None,
+        **latency_summary(latencies),
+    }
+
+
+def _http_client(base_url: str, args) -> httpx.AsyncClient:
+    limits = httpx.Limits(max_connections=args.clients, max_keepalive_connections=args.clients)
+    return httpx.AsyncClient(base_url=base_url, limits=limits, timeout=120)
+
+
+# 压测进程的入口 (需可被 pickle，放在模块顶层)
+def _run_in_worker(base_url: str, name: str, args, process_index: int) -> dict:
+    async def _run() -> dict:
+        async with _http_client(base_url, args) as client:
+            return await run_clients(client, name, args, process_index)
+
+    return asyncio.run(_run())
+
+
+async def _negative_balances(client: httpx.AsyncClient, picker: MaterialPicker) -> int:
+    negative = 0
+    for material_id in picker.hot_ids:
+        response = await client.get(f"{API}/inventory-balances/material/{material_id}")
+        if response.status_code == 200 and response.json()["current_quantity"] < 0:
+            negative += 1
+    return negative
+
+
+async def run_in_process(args) -> dict:
+    from app.main import app
+
+    results = {}
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=120) as client:
+            for name in args.scenarios:
+                results[name] = merge_results([await run_clients(client, name, args)])
+                if name == "outbound": # 出库后热点物资的库存不应为负 (没有超卖)
+                    results[name]["negative_balances"] = await _negative_balances(client, MaterialPicker.from_args(args))
+    return results
+
+
+async def _negative_balances_over_http(base_url: str, args) -> int:
+    async with _http_client(base_url, args) as client:
+        return await _negative_balances(client, MaterialPicker.from_args(args))
+
+
+def run_over_http(args, base_url: str) -> dict:
+    results = {}
+    # spawn：压测进程不继承父进程中已导入的应用和事件循环
+    with ProcessPoolExecutor(max_workers=args.processes, mp_context=multiprocessing.get_context("spawn")) as pool:
+        for name in args.scenarios:
+            futures = [pool.submit(_run_in_worker, base_url, name, args, index) for index in range(args.processes)]
+            results[name] = merge_results([future.result() for future in futures])
+            if name == "outbound": # 出库后热点物资的库存不应为负 (没有超卖)
+                results[name]["negative_balances"] = asyncio.run(_negative_balances_over_http(base_url, args))
+    return results
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+# 在本机启动 uvicorn (数据库已由本进程写好，不再自动迁移)，等待服务可用
+def start_server(db_url: str, workers: int) -> tuple[subprocess.Popen, str]:
+    port = _free_port()
+    env = {**os.environ, "SQLALCHEMY_DATABASE_URL": db_url, "DB_AUTO_MIGRATE": "false"}
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(port),
+         "--workers", str(workers), "--log-level", "warning", "--no-access-log"],
+        cwd=BACKEND_DIR, env=env,
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError(f"uvicorn 启动失败，退出码 {server.returncode}")
+        try:
+            if httpx.get(f"{base_url}/", timeout=1).status_code == 200:
+                return server, base_url
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    server.terminate()
+    raise RuntimeError("等待 uvicorn 启动超时")
+
+
+def _git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+# 影响结果可比性的运行参数
+COMPARABLE_RUN_KEYS = ("mode", "target", "processes", "clients_per_process", "requests_per_client")
+COMPARABLE_DATASET_KEYS = ("materials", "records", "hot_ratio", "hot_share", "days", "seed")
+
+
+# 与基线的运行参数或数据集参数不同的项 (此时对比结果仅供参考)
+def baseline_differences(result: dict, baseline: dict) -> list[str]:
+    differences = [
+        f"run.{key}" for key in COMPARABLE_RUN_KEYS if result["run"].get(key) != baseline.get("run", {}).get(key)
+    ]
+    differences += [
+        f"dataset.{key}" for key in COMPARABLE_DATASET_KEYS if result["dataset"].get(key) != baseline.get("dataset", {}).get(key)
+    ]
+    return differences
+
+
+# 与基线逐场景对比：p95 上升或吞吐量下降超过阈值的场景记为回归
+def compare(results: dict, baseline: dict, max_regression: float) -> tuple[dict, list[str]]:
+    comparison, regressions = {}, []
+    for name, current in results.items():
+        previous = baseline.get("scenarios", {}).get(name)
+        if not previous or not previous.get("p95_ms") or not previous.get("requests_per_second"):
+            continue
+        p95_change = round((current["p95_ms"] / previous["p95_ms"] - 1) * 100, 1)
+        rps_change = round((current["requests_per_second"] / previous["requests_per_second"] - 1) * 100, 1)
+        comparison[name] = {"p95_change_pct": p95_change, "requests_per_second_change_pct": rps_change}
+        if p95_change > max_regression or rps_change < -max_regression:
+            regressions.append(name)
+    return comparison, regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="在合成数据集上运行场景化压测")
+    parser.add_argument("--db-url", default=None, help="数据库连接串，默认使用临时 SQLite 文件 (--base-url 模式下不使用)")
+    add_dataset_arguments(parser)
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS), help=f"逗号分隔的场景，按顺序运行：{', '.join(SCENARIOS)}")
+    parser.add_argument("--clients", type=int, default=50, help="每个压测进程的并发客户端数")
+    parser.add_argument("--requests", type=int, default=40, help="每个客户端在每个场景中计入统计的请求数")
+    parser.add_argument("--warmup", type=int, default=2, help="每个客户端在每个场景中先发出、不计入统计的请求数")
+    parser.add_argument("--serve", type=int, default=0, metavar="WORKERS", help="写入数据后在本机启动指定 worker 数的 uvicorn 并通过 HTTP 压测")
+    parser.add_argument("--base-url", default=None, help="压测已启动的服务 (数据需事先用 benchmarks.dataset 以同样参数写入)")
+    parser.add_argument("--processes", type=int, default=1, help="HTTP 模式下的压测进程数")
+    parser.add_argument("--output", default=None, help="把完整结果写入该 JSON 文件")
+    parser.add_argument("--baseline", default=None, help="上一次的结果文件，用于对比")
+    parser.add_argument("--max-regression", type=float, default=20, help="允许的 p95 上升 / 吞吐量下降百分比")
+    args = parser.parse_args()
+
+    args.scenarios = [name.strip() for name in args.scenarios.split(",") if name.strip()]
+    unknown = [name for name in args.scenarios if name not in SCENARIOS]
+    if unknown:
+        parser.error(f"未知场景: {', '.join(unknown)}")
+    if args.serve and args.base_url:
+        parser.error("--serve 与 --base-url 不能同时使用")
+    if args.processes > 1 and not (args.serve or args.base_url):
+        parser.error("多个压测进程需要通过 HTTP 驱动服务，请同时指定 --serve 或 --base-url")
+
+    dataset = None
+    db_url = None
+    if not args.base_url:
+        db_url = configure_database(args.db_url)
+        started = time.perf_counter()
+        dataset = {**prepare_dataset(args), "seed_seconds": round(time.perf_counter() - started, 3)}
+
+    if args.base_url:
+        mode, results = "http", run_over_http(args, args.base_url)
+    elif args.serve:
+        server, base_url = start_server(db_url, args.serve)
+        try:
+            mode, results = "http", run_over_http(args, base_url)
+        finally:
+            server.terminate()
+            server.wait()
+    else:
+        mode, results = "asgi", asyncio.run(run_in_process(args))
+
+    result = {
+        "run": {
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "git_commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "mode": mode,
+            "target": args.base_url or (f"uvicorn --workers {args.serve}" if args.serve else "in-process"),
+            "db_url": db_url.split("@")[-1] if db_url else None,
+            "processes": args.processes,
+            "clients_per_process": args.clients,
+            "requests_per_client": args.requests,
+        },
+        "dataset": {
+            "materials": args.materials, "records": args.records, "hot_ratio": args.hot_ratio,
+            "hot_share": args.hot_share, "days": args.days, "seed": args.seed, **(dataset or {}),
+        },
+        "scenarios": results,
+    }
+    regressions = []
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as file:
+            baseline = json.load(file)
+        result["comparison"], regressions = compare(results, baseline, args.max_regression)
+        result["regressions"] = regressions
+        result["baseline_differences"] = baseline_differences(result, baseline)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(result, file, ensure_ascii=False, indent=2)
+    report("suite", **result)
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+import asyncio
+from logging.config import fileConfig
+
+from alembic import context
+from sqlalchemy.engine import Connection
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.core.config import settings
+from app.db.database import Base
+# 导入全部模型，使 Base.metadata 完整 (autogenerate 对比用)
+from app.models import daily_movement, inbound_record, inventory_balance, inventory_snapshot, inventory_summary, ledger_archive, material, material_search_gram, outbound_record, stock_alert  # noqa: F401
+from app.models.ledger_archive import is_archive_table_name
+
+config = context.config
+if config.config_file_name is not None and config.attributes.get("configure_logger", True):
+    fileConfig(config.config_file_name)
+
+target_metadata = Base.metadata
+
+
+# 归档任务动态创建的按月归档表不由迁移脚本管理，autogenerate 时忽略，避免生成删除这些表的迁移
+def include_name(name, type_, parent_names) -> bool:
+    if type_ == "table":
+        return not is_archive_table_name(name)
+    return True
+
+
+def run_migrations_offline() -> None:
+    # alembic upgrade head --sql：只输出 SQL 脚本，不连接数据库
+    context.configure(
+        url=settings.SQLALCHEMY_DATABASE_URL,
+        target_metadata=target_metadata,
+        literal_binds=True,
+        dialect_opts={"paramstyle": "named"},
+        render_as_batch=True,
+        include_name=include_name,
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def do_run_migrations(connection: Connection) -> None:
+    # render_as_batch: SQLite 不支持大部分 ALTER TABLE，batch 模式下以重建表的方式完成变更
+    context.configure(connection=connection, target_metadata=target_metadata, render_as_batch=True, include_name=include_name)
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+async def run_async_migrations() -> None:
+    engine = create_async_engine(settings.SQLALCHEMY_DATABASE_URL)
+    async with engine.connect() as connection:
+        await connection.run_sync(do_run_migrations)
+    await engine.dispose()
+
+
+def run_migrations_online() -> None:
+    # 应用启动时 (app.db.migrations) 会传入已打开的连接，直接在该连接上执行；命令行调用时自行创建异步引擎
+    connection = config.attributes.get("connection")
+    if connection is not None:
+        do_run_migrations(connection)
+    else:
+        asyncio.run(run_async_migrations())
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
@@ -0,0 +1,123 @@
+"""initial schema: materials, inventory_balance, inbound_records, outbound_records
+
+Revision ID: 0001
+Revises: 
+Create Date: 2026-10-18 15:00:00
+
+此前的版本在启动时通过 Base.metadata.create_all 建表，已有的数据库中这些表可能已经存在：
+这里只创建缺少的表和索引，已有数据库无需手工 stamp 即可直接 upgrade。
+"""
+from typing import Sequence, Union
+
+from alembic import context, op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0001'
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _existing_tables() -> set[str]:
+    if context.is_offline_mode(): # 只输出 SQL 时按空库处理
+        return set()
+    return set(sa.inspect(op.get_bind()).get_table_names())
+
+
+def _existing_indexes(table: str) -> set[str]:
+    if context.is_offline_mode():
+        return set()
+    return {index["name"] for index in sa.inspect(op.get_bind()).get_indexes(table)}
+
+
+def _create_indexes(table: str, indexes: list[tuple[str, list[str], bool]]) -> None:
+    existing = _existing_indexes(table)
+    for name, columns, unique in indexes:
+        if name not in existing:
+            op.create_index(name, table, columns, unique=unique)
+
+
+def upgrade() -> None:
+    tables = _existing_tables()
+
+    if 'materials' not in tables:
+        op.create_table('materials',
+        sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('code', sa.String(length=100), nullable=False),
+        sa.Column('name', sa.String(length=255), nullable=False),
+        sa.Column('model', sa.String(length=255), nullable=True),
+        sa.Column('unit', sa.String(length=50), nullable=True),
+        sa.Column('supplier', sa.String(length=255), nullable=True),
+        sa.Column('remarks', sa.Text(), nullable=True),
+        sa.Column('is_active', sa.Boolean(), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+        )
+    _create_indexes('materials', [
+        ('ix_materials_code', ['code'], True),
+        ('ix_materials_id', ['id'], False),
+        ('ix_materials_name', ['name'], False),
+    ])
+
+    if 'inventory_balance' not in tables:
+        op.create_table('inventory_balance',
+        sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('material_id', sa.Integer(), nullable=False),
+        sa.Column('current_quantity', sa.Integer(), nullable=False),
+        sa.Column('min_stock_level', sa.Integer(), nullable=True),
+        sa.Column('max_stock_level', sa.Integer(), nullable=True),
+        sa.Column('last_updated_at', sa.DateTime(timezone=True), nullable=True),
+        sa.ForeignKeyConstraint(['material_id'], ['materials.id'], ),
+        sa.PrimaryKeyConstraint('id')
+        )
+    _create_indexes('inventory_balance', [
+        ('ix_inventory_balance_id', ['id'], False),
+        ('ix_inventory_balance_material_id', ['material_id'], True),
+    ])
+
+    if 'inbound_records' not in tables:
+        op.create_table('inbound_records',
+        sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('inbound_order_number', sa.String(length=100), nullable=True, comment='入库单号'),
+        sa.Column('material_id', sa.Integer(), nullable=False),
+        sa.Column('quantity', sa.Integer(), nullable=False, comment='入库数量'),
+        sa.Column('inbound_time', sa.DateTime(timezone=True), nullable=False, comment='入库时间'),
+        sa.Column('remarks', sa.Text(), nullable=True, comment='备注'),
+        sa.ForeignKeyConstraint(['material_id'], ['materials.id'], ),
+        sa.PrimaryKeyConstraint('id')
+        )
+    _create_indexes('inbound_records', [
+        ('ix_inbound_records_id', ['id'], False),
+        ('ix_inbound_records_inbound_order_number', ['inbound_order_number'], True),
+        ('ix_inbound_records_material_id', ['material_id'], False),
+        ('ix_inbound_records_inbound_time_id', ['inbound_time', 'id'], False),
+    ])
+
+    if 'outbound_records' not in tables:
+        op.create_table('outbound_records',
+        sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('outbound_order_number', sa.String(length=100), nullable=True, comment='出库单号'),
+        sa.Column('material_id', sa.Integer(), nullable=False),
+        sa.Column('quantity', sa.Integer(), nullable=False, comment='出库数量'),
+        sa.Column('recipient', sa.String(length=255), nullable=True, comment='领用人或客户'),
+        sa.Column('outbound_time', sa.DateTime(timezone=True), nullable=False, comment='出库时间'),
+        sa.Column('remarks', sa.Text(), nullable=True, comment='备注'),
+        sa.ForeignKeyConstraint(['material_id'], ['materials.id'], ),
+        sa.PrimaryKeyConstraint('id')
+        )
+    _create_indexes('outbound_records', [
+        ('ix_outbound_records_id', ['id'], False),
+        ('ix_outbound_records_outbound_order_number', ['outbound_order_number'], True),
+        ('ix_outbound_records_material_id', ['material_id'], False),
+        ('ix_outbound_records_outbound_time_id', ['outbound_time', 'id'], False),
+    ])
+
+
+def downgrade() -> None:
+    op.drop_table('outbound_records')
+    op.drop_table('inbound_records')
+    op.drop_table('inventory_balance')
+    op.drop_table('materials')
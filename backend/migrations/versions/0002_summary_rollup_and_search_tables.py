@@ -0,0 +1,113 @@
+"""inventory_summary, daily_movements and material_search_grams tables
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18 15:00:00
+
+与 0001 相同，create_all 建过的表会被跳过。库存汇总行由应用启动时补建；
+每日出入库汇总和搜索索引在此回填 (表为空时)。离线模式 (--sql) 无法读取物资数据，不回填搜索索引，
+执行脚本后请运行 python -m app.cli rebuild-search-index。
+"""
+from typing import Sequence, Union
+
+from alembic import context, op
+import sqlalchemy as sa
+
+from app.crud.crud_material_search import gram_rows
+from app.models.ledger_archive import ARCHIVE_TABLE_NAME
+
+BACKFILL_CHUNK_SIZE = 5000
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0002'
+down_revision: Union[str, None] = '0001'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    tables = set() if context.is_offline_mode() else set(sa.inspect(op.get_bind()).get_table_names())
+
+    if 'inventory_summary' not in tables:
+        op.create_table('inventory_summary',
+        sa.Column('id', sa.Integer(), autoincrement=False, nullable=False),
+        sa.Column('material_types_count', sa.Integer(), nullable=False),
+        sa.Column('total_stock_quantity', sa.BigInteger(), nullable=False),
+        sa.Column('stock_alert_count', sa.Integer(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+        )
+
+    if 'daily_movements' not in tables:
+        op.create_table('daily_movements',
+        sa.Column('material_id', sa.Integer(), nullable=False),
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('inbound_quantity', sa.BigInteger(), nullable=False),
+        sa.Column('inbound_count', sa.Integer(), nullable=False),
+        sa.Column('outbound_quantity', sa.BigInteger(), nullable=False),
+        sa.Column('outbound_count', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['material_id'], ['materials.id'], ),
+        sa.PrimaryKeyConstraint('material_id', 'day')
+        )
+        op.create_index('ix_daily_movements_day', 'daily_movements', ['day'], unique=False)
+    _backfill_daily_movements(tables)
+
+    if 'material_search_grams' not in tables:
+        op.create_table('material_search_grams',
+        sa.Column('field', sa.String(length=1), nullable=False),
+        sa.Column('gram', sa.String(length=8).with_variant(sa.String(length=8, collation='utf8mb4_bin'), 'mysql', 'mariadb'), nullable=False),
+        sa.Column('material_id', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['material_id'], ['materials.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('field', 'gram', 'material_id'),
+        sqlite_with_rowid=False
+        )
+        op.create_index('ix_material_search_grams_material_id', 'material_search_grams', ['material_id'], unique=False)
+    if not context.is_offline_mode():
+        _backfill_material_search_grams(op.get_bind())
+
+
+# 按出入库流水 (含已存在的按月归档表) 汇总每日出入库数量，与 rebuild-daily-movements 结果相同；表中已有数据时跳过
+def _backfill_daily_movements(tables: set) -> None:
+    if not context.is_offline_mode():
+        if op.get_bind().execute(sa.text('SELECT 1 FROM daily_movements LIMIT 1')).first() is not None:
+            return
+    sources = [('inbound', 'inbound_records'), ('outbound', 'outbound_records')]
+    sources += [(match.group(1), name) for name in sorted(tables) if (match := ARCHIVE_TABLE_NAME.match(name))]
+    columns = {
+        'inbound': 'quantity AS in_quantity, 1 AS in_count, 0 AS out_quantity, 0 AS out_count',
+        'outbound': '0 AS in_quantity, 0 AS in_count, quantity AS out_quantity, 1 AS out_count',
+    }
+    movements = ' UNION ALL '.join(
+        f'SELECT material_id, DATE({direction}_time) AS day, {columns[direction]} FROM {table}'
+        for direction, table in sources
+    )
+    op.execute(
+        'INSERT INTO daily_movements (material_id, day, inbound_quantity, inbound_count, outbound_quantity, outbound_count) '
+        'SELECT material_id, day, SUM(in_quantity), SUM(in_count), SUM(out_quantity), SUM(out_count) '
+        f'FROM ({movements}) AS movements GROUP BY material_id, day'
+    )
+
+
+# 为已有物资写入搜索片段 (与 rebuild-search-index 相同)；表中已有数据时跳过
+def _backfill_material_search_grams(bind) -> None:
+    grams = sa.table('material_search_grams', sa.column('field'), sa.column('gram'), sa.column('material_id'))
+    materials = sa.table('materials', sa.column('id'), sa.column('code'), sa.column('name'))
+    if bind.execute(sa.select(grams.c.material_id).limit(1)).first() is not None:
+        return
+    last_id = 0
+    while True:
+        chunk = bind.execute(
+            sa.select(materials.c.id, materials.c.code, materials.c.name)
+            .where(materials.c.id > last_id).order_by(materials.c.id).limit(BACKFILL_CHUNK_SIZE)
+        ).all()
+        if not chunk:
+            return
+        bind.execute(grams.insert(), [row for material_id, code, name in chunk for row in gram_rows(material_id, code, name)])
+        last_id = chunk[-1].id
+
+
+def downgrade() -> None:
+    op.drop_table('material_search_grams')
+    op.drop_table('daily_movements')
+    op.drop_table('inventory_summary')
@@ -0,0 +1,44 @@
+"""(material_id, time, id) indexes on the ledgers and a partial index for below-min balances
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18 15:00:00
+
+出入库列表按物资过滤、按时间范围过滤并按 (时间, id) 倒序分页，
+(material_id, time, id) 复合索引使过滤、范围和排序都在同一个索引内完成，无需回表排序。
+低于最低库存的余額行使用部分索引，只有 SQLite 和 PostgreSQL 支持，MySQL 上跳过。
+"""
+from typing import Sequence, Union
+
+from alembic import context, op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0003'
+down_revision: Union[str, None] = '0002'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BELOW_MIN_PREDICATE = 'current_quantity < min_stock_level AND min_stock_level > 0'
+
+
+def _supports_partial_index() -> bool:
+    return context.get_context().dialect.name in ('sqlite', 'postgresql')
+
+
+def upgrade() -> None:
+    op.create_index('ix_inbound_records_material_id_inbound_time', 'inbound_records', ['material_id', 'inbound_time', 'id'], unique=False)
+    op.create_index('ix_outbound_records_material_id_outbound_time', 'outbound_records', ['material_id', 'outbound_time', 'id'], unique=False)
+    if _supports_partial_index():
+        op.create_index(
+            'ix_inventory_balance_below_min', 'inventory_balance', ['material_id'], unique=False,
+            sqlite_where=sa.text(BELOW_MIN_PREDICATE), postgresql_where=sa.text(BELOW_MIN_PREDICATE)
+        )
+
+
+def downgrade() -> None:
+    if _supports_partial_index():
+        op.drop_index('ix_inventory_balance_below_min', table_name='inventory_balance')
+    op.drop_index('ix_outbound_records_material_id_outbound_time', table_name='outbound_records')
+    op.drop_index('ix_inbound_records_material_id_inbound_time', table_name='inbound_records')
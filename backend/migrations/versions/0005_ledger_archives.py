@@ -0,0 +1,34 @@
+"""ledger_archives registry for monthly ledger archive tables
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18 17:00:00
+
+按月归档表 (inbound_records_archive_YYYYMM 等) 由归档任务 (python -m app.cli archive-ledger) 动态创建，
+这里只创建登记表。
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0005'
+down_revision: Union[str, None] = '0004'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('ledger_archives',
+    sa.Column('ledger', sa.String(length=16), nullable=False),
+    sa.Column('month', sa.Date(), nullable=False),
+    sa.Column('table_name', sa.String(length=64), nullable=False),
+    sa.Column('row_count', sa.BigInteger(), nullable=False),
+    sa.PrimaryKeyConstraint('ledger', 'month')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('ledger_archives')
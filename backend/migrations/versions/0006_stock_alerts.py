@@ -0,0 +1,41 @@
+"""stock_alerts set of materials below their minimum stock level
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-18 18:00:00
+
+创建后按当前库存余額回填，之后由各写操作在同一事务中维护。
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0006'
+down_revision: Union[str, None] = '0005'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('stock_alerts',
+    sa.Column('material_id', sa.Integer(), nullable=False),
+    sa.Column('current_quantity', sa.Integer(), nullable=False),
+    sa.Column('min_stock_level', sa.Integer(), nullable=False),
+    sa.Column('shortage', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['material_id'], ['materials.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('material_id')
+    )
+    op.create_index('ix_stock_alerts_shortage', 'stock_alerts', ['shortage', 'material_id'], unique=False)
+    op.execute(
+        'INSERT INTO stock_alerts (material_id, current_quantity, min_stock_level, shortage) '
+        'SELECT material_id, current_quantity, min_stock_level, min_stock_level - current_quantity '
+        'FROM inventory_balance WHERE current_quantity < min_stock_level AND min_stock_level > 0'
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_stock_alerts_shortage', table_name='stock_alerts')
+    op.drop_table('stock_alerts')
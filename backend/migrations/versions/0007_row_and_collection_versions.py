@@ -0,0 +1,36 @@
+"""row version columns and collection version counters for ETags
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-18 20:00:00
+
+materials / inventory_balance 的行版本号由每次 UPDATE 加 1，inventory_summary 中的集合版本号由写操作在同一事务中加 1。
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0007'
+down_revision: Union[str, None] = '0006'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('materials', sa.Column('version', sa.Integer(), server_default=sa.text('1'), nullable=False))
+    op.add_column('inventory_balance', sa.Column('version', sa.Integer(), server_default=sa.text('1'), nullable=False))
+    op.add_column('inventory_summary', sa.Column('materials_version', sa.BigInteger(), server_default=sa.text('0'), nullable=False))
+    op.add_column('inventory_summary', sa.Column('balances_version', sa.BigInteger(), server_default=sa.text('0'), nullable=False))
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('inventory_summary') as batch_op:
+        batch_op.drop_column('balances_version')
+        batch_op.drop_column('materials_version')
+    with op.batch_alter_table('inventory_balance') as batch_op:
+        batch_op.drop_column('version')
+    with op.batch_alter_table('materials') as batch_op:
+        batch_op.drop_column('version')
@@ -0,0 +1,33 @@
+"""binary collation for material_search_grams.gram on MySQL
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-18 21:00:00
+
+0002 最初建表时 gram 列使用数据库默认排序规则 (utf8mb4_0900_ai_ci 等忽略重音和大小写)，
+"resu" 与 "résu" 这类片段会在主键上冲突，前缀范围扫描也不按码位顺序。已建好的 MySQL 表在此改为 utf8mb4_bin；
+SQLite 默认按二进制比较，无需处理。
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0008'
+down_revision: Union[str, None] = '0007'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    if op.get_context().dialect.name not in ('mysql', 'mariadb'):
+        return
+    op.alter_column('material_search_grams', 'gram',
+                    existing_type=sa.String(length=8), type_=sa.String(length=8, collation='utf8mb4_bin'), existing_nullable=False)
+
+
+def downgrade() -> None:
+    # 保持二进制排序规则：改回忽略重音的排序规则后，已有的 "resu" / "résu" 片段会在主键上冲突
+    pass
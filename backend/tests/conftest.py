@@ -0,0 +1,17 @@
+# 测试使用临时目录中的 SQLite 数据库 (与基准测试相同)，连接串须在导入 app 之前设置
+import pytest
+from fastapi.testclient import TestClient
+
+from benchmarks.common import configure_database, reset_schema
+
+configure_database()
+
+
+# 每个测试模块从空库开始：按迁移脚本重建数据表后启动应用
+@pytest.fixture(scope="module")
+def client():
+    from app.main import app
+
+    reset_schema()
+    with TestClient(app) as client:
+        yield client
@@ -0,0 +1,65 @@
+# 并发出库不超卖 (对应 benchmarks.concurrent_outbound)：并发扣减的总量超过库存时，
+# 成功扣减量恰好等于初始库存，最终库存为 0，其余请求以库存不足被拒绝
+import asyncio
+
+from fastapi import HTTPException
+from sqlalchemy import select
+
+from app.crud.crud_inventory_balance import update_inventory_balance_quantity
+from app.db.database import SessionLocal, engine
+from app.models.inventory_balance import InventoryBalance
+from app.models.material import Material
+from benchmarks.common import reset_schema
+
+INITIAL_QUANTITY = 100
+CONCURRENCY = 8
+OPS_PER_TASK = 20 # 共 160 次扣减，超过初始库存
+
+
+async def _run_concurrent_outbound() -> tuple[int, int, int, int]:
+    async with SessionLocal() as db:
+        material = Material(code="HOT-001", name="热点物资")
+        material.inventory_balance = InventoryBalance(current_quantity=INITIAL_QUANTITY)
+        db.add(material)
+        await db.commit()
+        material_id = material.id
+
+    succeeded = rejected = errors = 0
+    start_event = asyncio.Event()
+
+    async def worker() -> None:
+        nonlocal succeeded, rejected, errors
+        await start_event.wait()
+        for _ in range(OPS_PER_TASK):
+            async with SessionLocal() as db:
+                try:
+                    await update_inventory_balance_quantity(db, material_id=material_id, quantity_change=-1)
+                    await db.commit()
+                    succeeded += 1
+                except HTTPException:
+                    await db.rollback()
+                    rejected += 1
+                except Exception:
+                    await db.rollback()
+                    errors += 1
+
+    tasks = [asyncio.create_task(worker()) for _ in range(CONCURRENCY)]
+    start_event.set()
+    await asyncio.gather(*tasks)
+
+    async with SessionLocal() as db:
+        final_quantity = await db.scalar(
+            select(InventoryBalance.current_quantity).where(InventoryBalance.material_id == material_id)
+        )
+    await engine.dispose()
+    return succeeded, rejected, errors, final_quantity
+
+
+def test_concurrent_outbound_does_not_oversell():
+    reset_schema()
+    succeeded, rejected, errors, final_quantity = asyncio.run(_run_concurrent_outbound())
+
+    assert errors == 0
+    assert succeeded == INITIAL_QUANTITY
+    assert rejected == CONCURRENCY * OPS_PER_TASK - INITIAL_QUANTITY
+    assert final_quantity == INITIAL_QUANTITY - succeeded == 0
@@ -0,0 +1,75 @@
+# 列表/导出查询的执行计划 (对应 benchmarks.explain_check)：抓取接口实际执行的 SQL，
+# 在 SQLite 上执行 EXPLAIN QUERY PLAN，确认使用了预期的索引且没有额外排序
+import asyncio
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+from app.core.config import settings
+from app.crud.crud_inventory_summary import compute_inventory_summary
+from app.db.database import SessionLocal, engine
+from benchmarks.common import reset_schema
+from benchmarks.explain_check import SORT_MARKERS, StatementCapture, explain, populate
+
+API = settings.API_V1_STR
+
+# (查询名称, 预期使用的索引)
+CASES = [
+    (f"{ledger} {query}", index)
+    for ledger, time_column in (("inbound", "inbound_time"), ("outbound", "outbound_time"))
+    for query, index in (
+        ("list", f"ix_{ledger}_records_{time_column}_id"),
+        ("list by material", f"ix_{ledger}_records_material_id_{time_column}"),
+        ("list by material (cursor)", f"ix_{ledger}_records_material_id_{time_column}"),
+        ("export by material", f"ix_{ledger}_records_material_id_{time_column}"),
+    )
+] + [("stock alert count", "ix_inventory_balance_below_min")] # 部分索引，SQLite 上会创建
+
+
+# 写入测试数据后抓取各查询的 SQL，应用关闭后再逐条 EXPLAIN (连接与 TestClient 的事件循环绑定)
+@pytest.fixture(scope="module")
+def plans() -> dict[str, str]:
+    from app.main import app
+
+    reset_schema()
+    capture = StatementCapture()
+    statements = {}
+    with TestClient(app) as client:
+        hot = populate(client)[0]
+        event.listen(engine.sync_engine, "before_cursor_execute", capture)
+        try:
+            for ledger in ("inbound", "outbound"):
+                table = f"FROM {ledger}_records"
+                endpoint = f"{API}/{ledger}-records/"
+                client.get(endpoint, params={"limit": 20, "include_material": False})
+                statements[f"{ledger} list"] = capture.last(table)
+                response = client.get(endpoint, params={"limit": 1, "material_id": hot, "include_material": False})
+                statements[f"{ledger} list by material"] = capture.last(table)
+                client.get(endpoint, params={"limit": 1, "material_id": hot, "include_material": False, "cursor": response.headers["X-Next-Cursor"]})
+                statements[f"{ledger} list by material (cursor)"] = capture.last(table)
+                client.get(f"{endpoint}export", params={"material_id": hot})
+                statements[f"{ledger} export by material"] = capture.last(table)
+        finally:
+            event.remove(engine.sync_engine, "before_cursor_execute", capture)
+
+    async def capture_alert_count() -> None:
+        async with SessionLocal() as db:
+            await compute_inventory_summary(db)
+        await engine.dispose()
+
+    event.listen(engine.sync_engine, "before_cursor_execute", capture)
+    try:
+        asyncio.run(capture_alert_count())
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", capture)
+    statements["stock alert count"] = capture.last("min_stock_level >")
+
+    return {name: asyncio.run(explain(statement, parameters)) for name, (statement, parameters) in statements.items()}
+
+
+@pytest.mark.parametrize(("query", "expected_index"), CASES, ids=[name for name, _ in CASES])
+def test_query_uses_expected_index(plans, query, expected_index):
+    plan = plans[query]
+    assert expected_index in plan, plan
+    assert not any(marker in plan for marker in SORT_MARKERS), plan
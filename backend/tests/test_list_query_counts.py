@@ -0,0 +1,34 @@
+# 列表接口的 SQL 语句数 (对应 benchmarks.list_query_counts)：每页的语句数固定，不随行数增长 (没有 N+1)
+import pytest
+
+from app.core.config import settings
+
+API = settings.API_V1_STR
+
+# 接口 -> 每页执行的语句数 (取自响应头 X-DB-Queries)
+EXPECTED_QUERIES = {
+    "/inbound-records/": 1,
+    "/outbound-records/": 1,
+    "/inventory-balances/": 2, # 集合版本号 (ETag) + 列表
+}
+
+
+@pytest.fixture(scope="module", autouse=True)
+def populate(client):
+    material_ids = [
+        client.post(f"{API}/materials/", json={"code": f"N1-{i:04d}", "name": f"物资 {i}"}).json()["id"]
+        for i in range(200)
+    ]
+    client.post(f"{API}/inbound-records/batch", json=[{"material_id": m, "quantity": 10} for m in material_ids])
+    for material_id in material_ids:
+        client.post(f"{API}/outbound-records/", json={"material_id": material_id, "quantity": 1})
+
+
+@pytest.mark.parametrize("include_material", [True, False])
+@pytest.mark.parametrize("endpoint", list(EXPECTED_QUERIES))
+def test_list_query_count_is_fixed(client, endpoint, include_material):
+    for limit in (1, 200):
+        response = client.get(f"{API}{endpoint}", params={"limit": limit, "include_material": include_material})
+        assert response.status_code == 200
+        assert len(response.json()) == limit
+        assert int(response.headers["X-DB-Queries"]) == EXPECTED_QUERIES[endpoint]